@@ -0,0 +1,137 @@
+##################################################################################
+#
+#    Raster Funcs
+#
+#    Apply an elementwise function (e.g. ClimFuncs.C_to_F or heatindex, or an
+#    atmos.thermo function) to one or more aligned rasters and write the result
+#    as a GeoTIFF, block by block, instead of reading a whole band, masking
+#    -9999 with np.where and writing it in one shot (see
+#    031_rasterio_and_calculate_average_heat.ipynb).
+#
+#    The output keeps the profile of the first input (CRS, transform, nodata,
+#    tiling, compression), and is tiled and compressed if the input is not.
+#    Each output block is read, computed and written separately by a pool of
+#    threads, so memory is bounded by a few blocks whatever the raster size,
+#    and reading, compression and numpy/numba work (which release the GIL) run
+#    on all cores. Many files are converted with one pool over the files:
+#
+#       map_raster(C_to_F, 'himax.tif', 'himax-F.tif')
+#       map_raster(heatindex, ['tmax.tif', 'rh.tif'], 'hi.tif', unit_in='C', unit_out='C')
+#       map_files(C_to_F, './data/himax-2016/*.tif', './data/himax-2016-F')
+#
+#################################################################################
+
+
+#### Dependencies
+import glob
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+#### Settings
+# used when the input is not tiled (e.g. striped GeoTIFFs), so output blocks are square tiles
+TILED = dict(tiled=True, blockxsize=256, blockysize=256)
+COMPRESS = dict(compress='deflate', predictor=3) # predictor 3 for float data
+
+#### Functions
+def out_profile(profile, dtype='float32', nodata=None, **updates):
+    """ Output profile from an input profile: same grid, CRS, nodata, tiling and compression, one band
+    of dtype. Adds 256 x 256 tiles and deflate compression if the input has none. Integer output needs a
+    nodata value (given, or that of the input), as NaN results are written as nodata"""
+    profile = dict(profile, driver='GTiff', count=1, dtype=dtype)
+    if nodata is not None:
+        profile['nodata'] = nodata
+    if profile.get('nodata') is None and np.dtype(dtype).kind == 'f':
+        profile['nodata'] = np.nan
+    if np.dtype(dtype).kind != 'f' and (profile.get('nodata') is None or np.isnan(profile['nodata'])):
+        raise ValueError(f'{np.dtype(dtype).name} output needs a nodata value that is not NaN')
+    if not profile.get('tiled', False):
+        profile.update(TILED)
+    if profile.get('compress') is None:
+        profile.update(COMPRESS if np.dtype(dtype).kind == 'f' else dict(compress='deflate'))
+    profile.update(updates)
+
+    return profile
+
+def _read_masked(src, band, window):
+    "One window of a band as float, with nodata as NaN"
+    arr = src.read(band, window=window).astype(np.float64 if src.dtypes[band - 1] == 'float64' else np.float32)
+    if src.nodata is not None and not np.isnan(src.nodata):
+        arr[arr == src.nodata] = np.nan
+
+    return arr
+
+def map_raster(func, src_fns, dst_fn, *args, band=1, dtype='float32', nodata=None, n_threads=8,
+               profile=None, cache_mb=64, **kwargs):
+    """ Write func(input rasters, *args, **kwargs) to a GeoTIFF block by block with a pool of threads.
+        Args:
+            func = elementwise function of one array per input raster (e.g. C_to_F, heatindex)
+            src_fns = raster file name, or list of aligned raster file names (func's first arguments)
+            dst_fn = output GeoTIFF
+            band = band to read from each input
+            dtype = output dtype
+            nodata = output nodata (default that of the first input, or NaN for float output; required
+                for integer output if the first input has none)
+            n_threads = number of blocks processed at once
+            profile = dict of output profile updates (e.g. blockxsize, compress)
+            cache_mb = GDAL block cache (MB), which bounds the memory used for blocks waiting to be written
+        Input nodata pixels are NaN when func is called and NaN results are written as nodata.
+        Returns dst_fn
+    """
+    import rasterio
+
+    src_fns = [src_fns] if isinstance(src_fns, (str, os.PathLike)) else list(src_fns)
+    with rasterio.open(src_fns[0]) as src:
+        shape, transform = src.shape, src.transform
+        dst_profile = out_profile(src.profile, dtype, nodata, **(profile or {}))
+    for fn in src_fns[1:]:
+        with rasterio.open(fn) as src:
+            if src.shape != shape or not np.allclose(tuple(src.transform)[:6], tuple(transform)[:6]):
+                raise ValueError(fn + ' is not aligned with ' + src_fns[0])
+    out_nodata = dst_profile['nodata']
+
+    # rasterio datasets are not thread safe: one set of readers per thread, and one writer
+    local = threading.local()
+    readers, write_lock = [], threading.Lock()
+
+    def sources():
+        if not hasattr(local, 'srcs'):
+            local.srcs = [rasterio.open(fn) for fn in src_fns]
+            readers.extend(local.srcs)
+        return local.srcs
+
+    with rasterio.Env(GDAL_CACHEMAX=cache_mb), rasterio.open(dst_fn, 'w', **dst_profile) as dst:
+        def process(window):
+            arrays = [_read_masked(src, band, window) for src in sources()]
+            with np.errstate(invalid='ignore'):
+                out = np.asarray(func(*arrays, *args, **kwargs), dtype=np.float64)
+            out = np.where(np.isnan(out), out_nodata, out).astype(dtype)
+            with write_lock:
+                dst.write(out, 1, window=window)
+
+        try:
+            with ThreadPoolExecutor(n_threads) as pool:
+                list(pool.map(process, [w for _, w in dst.block_windows(1)]))
+        finally:
+            for src in readers:
+                src.close()
+
+    return dst_fn
+
+def map_files(func, pattern, out_dir, *args, suffix='', n_threads=8, **kwargs):
+    """ Apply map_raster to every raster matching a glob pattern (or in a list of files), writing
+    out_dir/<name><suffix>.tif. Files are processed n_threads at a time, each with one thread, which
+    is faster than splitting each file when there are many small files. Returns the output file names"""
+    files = sorted(glob.glob(pattern)) if isinstance(pattern, str) else list(pattern)
+    if not files:
+        raise ValueError('no files match ' + str(pattern))
+    os.makedirs(out_dir, exist_ok=True)
+    out_fns = [os.path.join(out_dir, os.path.splitext(os.path.basename(fn))[0] + suffix + '.tif')
+               for fn in files]
+
+    def convert(i):
+        return map_raster(func, files[i], out_fns[i], *args, n_threads=1, **kwargs)
+
+    with ThreadPoolExecutor(n_threads) as pool:
+        return list(pool.map(convert, range(len(files))))
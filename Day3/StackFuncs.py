@@ -0,0 +1,139 @@
+##################################################################################
+#
+#    Stack Funcs
+#
+#    Convert a directory of aligned single-band rasters (e.g. the 366 daily
+#    himax-2016 GeoTIFFs) into one on-disk cube once, and open it instantly as
+#    an xarray DataArray in later sessions, instead of decoding every GeoTIFF
+#    with rio.open_rasterio and xr.concat-ing them each time (see
+#    032_xarray_dhs_heat_data_extraction.ipynb).
+#
+#    The cube is a raw .npy file (float32, nodata as NaN) stored pixel-major,
+#    (rows, cols, time), so the time series at a pixel is one contiguous slice
+#    of the file. A JSON file next to it keeps the georeferencing (transform,
+#    CRS), the dates and the source files, so a stale cube is rebuilt. The
+#    loader memory-maps the .npy: nothing is read until it is indexed, and
+#    only the pages indexed are read:
+#
+#       himax = load_or_build_cube('./data/himax-2016/*.tif', './data/himax-2016-cube')
+#       himax.sel(lat=7.95, long=-1.03, method='nearest')  # one pixel, all days
+#
+#################################################################################
+
+
+#### Dependencies
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+import xarray as xr
+from ZonalFuncs import dates_from_names, read_stack
+
+#### Settings
+CUBE_FN = 'cube.npy'
+META_FN = 'cube.json'
+
+#### Functions
+def _sources(files):
+    "File names, sizes and modification times, to check a cube is up to date"
+    return [[os.path.abspath(fn), os.path.getsize(fn), os.path.getmtime(fn)] for fn in files]
+
+def build_cube(files, out_dir, dates=None, band=1, block=32, n_threads=8):
+    """ Write aligned single-band rasters into a memory-mappable pixel-major cube.
+        Args:
+            files = raster file names, in time order
+            out_dir = directory for the cube (.npy) and its metadata (.json)
+            dates = date of each file (default the dates in the file names, else 0..n-1)
+            band = band to read
+            block = number of files read and written at once (memory is block x rows x cols floats)
+            n_threads = number of files read at once
+        Returns the metadata dict
+    """
+    import rasterio
+
+    if len(files) == 0:
+        raise ValueError('no files to convert')
+    if dates is None:
+        dates = dates_from_names(files)
+    if dates is not None and len(dates) != len(files):
+        raise ValueError('dates must have one date per file')
+
+    with rasterio.open(files[0]) as src:
+        shape, transform = src.shape, tuple(src.transform)[:6]
+        crs = None if src.crs is None else src.crs.to_wkt()
+    os.makedirs(out_dir, exist_ok=True)
+    meta_fn = os.path.join(out_dir, META_FN)
+    if os.path.exists(meta_fn):
+        os.remove(meta_fn)  # the old metadata must not describe the new cube if the build fails
+
+    # write to a temporary file and rename once complete, so a failed build never looks valid
+    tmp_fn = os.path.join(out_dir, CUBE_FN + '.tmp')
+    cube = np.lib.format.open_memmap(tmp_fn, mode='w+', dtype=np.float32,
+                                     shape=tuple(shape) + (len(files),))
+    for t0 in range(0, len(files), block):
+        stack = read_stack(files[t0:t0 + block], band=band, n_threads=n_threads, check=(shape, transform))
+        cube[:, :, t0:t0 + stack.shape[0]] = np.moveaxis(stack, 0, -1)
+    cube.flush()
+    del cube
+    os.replace(tmp_fn, os.path.join(out_dir, CUBE_FN))
+
+    meta = dict(shape=list(shape), transform=list(transform), crs=crs, band=band,
+                dates=None if dates is None else [str(d) for d in pd.DatetimeIndex(dates)],
+                sources=_sources(files))
+    with open(meta_fn + '.tmp', 'w') as f:
+        json.dump(meta, f, indent=1)
+    os.replace(meta_fn + '.tmp', meta_fn)
+
+    return meta
+
+def open_cube(out_dir, chunks=None, name='himax', y_name='lat', x_name='long'):
+    """ Open a cube from build_cube as a (time, lat, long) DataArray backed by a read-only memory map,
+    so indexing reads only the pages needed. chunks = dask chunks (e.g. {'time': -1, 'lat': 100}) for
+    a dask-backed array instead. transform and crs are kept in attrs"""
+    with open(os.path.join(out_dir, META_FN)) as f:
+        meta = json.load(f)
+    data = np.moveaxis(np.load(os.path.join(out_dir, CUBE_FN), mmap_mode='r'), -1, 0)
+
+    a, b, c, d, e, f = meta['transform']
+    rows, cols = meta['shape']
+    n = data.shape[0]
+    time = pd.DatetimeIndex(meta['dates']) if meta['dates'] is not None else np.arange(n)
+    coords = {'time': time, y_name: f + e * (np.arange(rows) + 0.5), x_name: c + a * (np.arange(cols) + 0.5)}
+
+    if chunks is not None:
+        import dask.array as dsa
+        sizes = dict(time=n, **{y_name: rows, x_name: cols})
+        chunks = tuple(chunks.get(dim, size) for dim, size in sizes.items())
+        data = dsa.from_array(data, chunks=chunks, name='cube-' + os.path.abspath(out_dir))
+
+    return xr.DataArray(data, dims=('time', y_name, x_name), coords=coords, name=name,
+                        attrs=dict(transform=meta['transform'], crs=meta['crs'] or ''))
+
+def cube_is_current(files, out_dir):
+    "True if out_dir has a complete cube built from exactly these (unchanged) files"
+    fn = os.path.join(out_dir, META_FN)
+    if not (os.path.exists(fn) and os.path.exists(os.path.join(out_dir, CUBE_FN))):
+        return False
+    try:
+        with open(fn) as f:
+            meta = json.load(f)
+        return meta['sources'] == _sources(files)
+    except (OSError, ValueError, KeyError, TypeError):  # unreadable or truncated metadata: rebuild
+        return False
+
+def load_or_build_cube(pattern, out_dir, band=1, chunks=None, **kwargs):
+    """ Open the cube for all rasters matching a glob pattern (sorted by the dates in their names),
+    building it first if it does not exist or the files have changed. kwargs go to open_cube"""
+    files = sorted(glob.glob(pattern))
+    if not files:
+        raise ValueError('no files match ' + pattern)
+    dates = dates_from_names(files)
+    if dates is not None:
+        order = np.argsort(dates.values, kind='stable')
+        files, dates = [files[i] for i in order], dates[order]
+
+    if not cube_is_current(files, out_dir):
+        build_cube(files, out_dir, dates, band)
+
+    return open_cube(out_dir, chunks, **kwargs)
@@ -0,0 +1,296 @@
+##################################################################################
+#
+#    Zonal Funcs
+#
+#    Zonal statistics for many rasters on the same grid (e.g. the 366 daily
+#    himax-2016 GeoTIFFs) over a fixed set of polygons (e.g. buffered DHS
+#    clusters), without re-rasterising the polygons for every raster as
+#    rasterstats.zonal_stats does (see 034_pointextract.ipynb).
+#
+#    The polygons are rasterised once into a sparse (polygon x pixel) matrix of
+#    weights, which is cached on disk. Weights are 1 for every pixel touched by
+#    a polygon (weights='binary', the same pixels and results as zonal_stats
+#    with all_touched=True) or the fraction of the pixel covered by the polygon
+#    (weights='coverage'). The mean and sum of any number of rasters are then a
+#    sparse matrix product, and the max/min a reduction over each polygon's
+#    pixels:
+#
+#       index = load_or_build_index(polys_in, files[0], 'data/dhs-5km-index.npz')
+#       df = zonal_files(index, files, stats=('mean', 'max'))
+#
+#################################################################################
+
+
+#### Dependencies
+import glob
+import hashlib
+import os
+import re
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+#### Settings
+STATS = ('mean', 'max', 'min', 'sum', 'count')
+
+#### Functions
+def _index_key(polys, ids, transform, shape, all_touched, weights):
+    "Hash of everything the index depends on, to check a cached index is still valid"
+    h = hashlib.sha1()
+    for geom in polys.geometry.to_wkb():
+        h.update(geom)
+    h.update(np.asarray(ids).astype(str).tobytes())
+    h.update(np.asarray(tuple(transform)[:6], dtype=float).tobytes())
+    h.update(str((tuple(shape), all_touched, weights)).encode())
+
+    return h.hexdigest()
+
+def build_index(polys, transform, shape, id_col=None, all_touched=True, weights='binary'):
+    """ Rasterise polygons once into a sparse weight matrix.
+        Args:
+            polys = GeoDataFrame of polygons in the raster CRS
+            transform = affine transform of the rasters (north up)
+            shape = (rows, cols) of the rasters
+            id_col = column with polygon ids (default is the index)
+            all_touched = include every pixel touched by a polygon (as in zonal_stats)
+            weights = 'binary' (1 per pixel) or 'coverage' (fraction of the pixel inside the polygon)
+        Returns dict with the CSR matrix 'weights' (polygons x pixels), 'ids', 'transform', 'shape'
+    """
+    import shapely
+    from rasterio.features import geometry_mask
+    from rasterio.windows import Window, transform as window_transform
+
+    if weights not in ('binary', 'coverage'):
+        raise ValueError("weights must be 'binary' or 'coverage'")
+    n_rows, n_cols = shape
+    t = transform
+    ids = polys.index.values if id_col is None else polys[id_col].values
+
+    rows, cols, vals = [], [], []
+    for k, geom in enumerate(polys.geometry.values):
+        if geom is None or geom.is_empty:
+            continue
+
+        # Window around the polygon, one pixel of padding for all_touched
+        minx, miny, maxx, maxy = geom.bounds
+        c0 = max(int(np.floor((minx - t.c) / t.a)) - 1, 0)
+        c1 = min(int(np.ceil((maxx - t.c) / t.a)) + 1, n_cols)
+        r0 = max(int(np.floor((maxy - t.f) / t.e)) - 1, 0)
+        r1 = min(int(np.ceil((miny - t.f) / t.e)) + 1, n_rows)
+        if c1 <= c0 or r1 <= r0:
+            continue
+        win = Window(c0, r0, c1 - c0, r1 - r0)
+        inside = geometry_mask([geom], out_shape=(r1 - r0, c1 - c0), all_touched=all_touched,
+                               transform=window_transform(win, t), invert=True)
+        r, c = np.nonzero(inside)
+        r, c = r + r0, c + c0
+
+        if weights == 'coverage':
+            x0, y0 = t.c + c * t.a, t.f + r * t.e
+            boxes = shapely.box(np.minimum(x0, x0 + t.a), np.minimum(y0, y0 + t.e),
+                                np.maximum(x0, x0 + t.a), np.maximum(y0, y0 + t.e))
+            w = shapely.area(shapely.intersection(boxes, geom)) / abs(t.a * t.e)
+            keep = w > 0
+            r, c, w = r[keep], c[keep], w[keep]
+        else:
+            w = np.ones(r.size)
+
+        rows.append(np.full(r.size, k))
+        cols.append(r * n_cols + c)
+        vals.append(w)
+
+    rows = np.concatenate(rows) if rows else np.zeros(0, int)
+    cols = np.concatenate(cols) if cols else np.zeros(0, int)
+    vals = np.concatenate(vals) if vals else np.zeros(0)
+    W = sp.csr_matrix((vals, (rows, cols)), shape=(len(polys), n_rows * n_cols))
+    W.sort_indices()
+
+    return dict(weights=W, ids=ids, transform=np.array(tuple(t)[:6]), shape=np.array(shape))
+
+def save_index(index, fn):
+    "Save an index from build_index to an .npz file"
+    W = index['weights']
+    np.savez(fn, data=W.data, indices=W.indices, indptr=W.indptr,
+             **{k: v for k, v in index.items() if k != 'weights'})
+
+def load_index(fn):
+    "Load an index saved by save_index"
+    with np.load(fn, allow_pickle=False) as f:
+        index = {k: f[k] for k in f.files if k not in ('data', 'indices', 'indptr')}
+        n_pix = int(np.prod(index['shape']))
+        index['weights'] = sp.csr_matrix((f['data'], f['indices'], f['indptr']),
+                                         shape=(len(index['ids']), n_pix))
+
+    return index
+
+def load_or_build_index(polys, rst_in, cache_fn, id_col=None, all_touched=True, weights='binary'):
+    """ Index for polygons on the grid of the raster rst_in, loaded from cache_fn if it was built for the
+    same polygons, ids, grid and options, otherwise built (polygons are reprojected to the raster CRS)
+    and saved to cache_fn"""
+    import rasterio
+    with rasterio.open(rst_in) as src:
+        transform, shape, crs = src.transform, src.shape, src.crs
+    polys = polys.to_crs(crs)
+    ids = polys.index.values if id_col is None else polys[id_col].values
+    key = _index_key(polys, ids, transform, shape, all_touched, weights)
+
+    if os.path.exists(cache_fn):
+        index = load_index(cache_fn)
+        if str(index.get('key', '')) == key:
+            return index
+
+    index = build_index(polys, transform, shape, id_col, all_touched, weights)
+    index['key'] = np.array(key)
+    save_index(index, cache_fn)
+
+    return index
+
+def zonal_arrays(index, arrays, stats=('mean',), nodata=None):
+    """ Zonal stats of one raster (rows, cols) or a stack (n, rows, cols) aligned with the index grid.
+    mean and sum are weighted (plain for binary weights), max/min/count use every pixel with a
+    weight. NaN and nodata pixels are skipped. Returns dict of stat -> (polygons,) or (polygons, n)"""
+    for stat in stats:
+        if stat not in STATS:
+            raise ValueError('stats must be from ' + ', '.join(STATS))
+    W = index['weights']
+    arrays = np.asarray(arrays)
+    single = arrays.ndim == 2
+    X = arrays.reshape(1 if single else arrays.shape[0], -1).T # pixels x rasters
+    if X.shape[0] != W.shape[1]:
+        raise ValueError('rasters do not match the grid of the index')
+    X = X.astype(np.float64)
+    if nodata is not None:
+        X[X == nodata] = np.nan
+    valid = np.isfinite(X).astype(np.float64)
+
+    out = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if 'mean' in stats or 'sum' in stats:
+            total = W @ np.where(valid > 0, X, 0.)
+            if 'sum' in stats:
+                out['sum'] = total
+            if 'mean' in stats:
+                out['mean'] = total / (W @ valid)
+        if 'count' in stats:
+            out['count'] = (W != 0).astype(np.float64) @ valid
+
+        # max/min over each polygon's pixels (CSR rows are contiguous runs of pixel indices),
+        # polygons without pixels are NaN
+        if 'max' in stats or 'min' in stats:
+            filled = np.diff(W.indptr) > 0
+            Xp = X[W.indices]
+            for stat, ufunc in (('max', np.fmax), ('min', np.fmin)):
+                if stat in stats:
+                    out[stat] = np.full((W.shape[0], X.shape[1]), np.nan)
+                    if filled.any():
+                        out[stat][filled] = ufunc.reduceat(Xp, W.indptr[:-1][filled], axis=0)
+
+    if single:
+        out = {stat: res[:, 0] for stat, res in out.items()}
+
+    return out
+
+def window_index(index):
+    """ Restrict an index to the bounding box of its polygons' pixels, so only that window of each raster
+    needs to be read. Returns (index for the window, (row_off, col_off, rows, cols))"""
+    W = index['weights']
+    n_cols = int(index['shape'][1])
+    r, c = np.divmod(W.indices, n_cols)
+    if r.size == 0:
+        r, c = np.zeros(1, int), np.zeros(1, int)
+    r0, c0 = r.min(), c.min()
+    h, w = r.max() - r0 + 1, c.max() - c0 + 1
+
+    W_win = sp.csr_matrix((W.data, (r - r0) * w + (c - c0), W.indptr), shape=(W.shape[0], h * w))
+    win_index = dict(index, weights=W_win, shape=np.array((h, w)))
+
+    return win_index, (int(r0), int(c0), int(h), int(w))
+
+def read_stack(files, window=None, band=1, n_threads=8, check=None):
+    """ Read one band (or a window (row_off, col_off, rows, cols) of it) from each raster into a
+    (files, rows, cols) float32 array with nodata as NaN, using a pool of threads (rasterio releases
+    the GIL while reading). check = (shape, transform) the rasters must have"""
+    import rasterio
+    from rasterio.windows import Window
+    from concurrent.futures import ThreadPoolExecutor
+
+    win = None if window is None else Window(window[1], window[0], window[3], window[2])
+    out = None
+
+    def read(i):
+        with rasterio.open(files[i]) as src:
+            if check is not None and (tuple(src.shape) != tuple(check[0]) or
+                                      not np.allclose(tuple(src.transform)[:6], check[1])):
+                raise ValueError(files[i] + ' is not on the grid of the index')
+            arr = src.read(band, window=win)
+            out[i] = arr
+            if src.nodata is not None:
+                out[i][arr == src.nodata] = np.nan
+
+    # size the stack from the first file, then fill it in parallel
+    with rasterio.open(files[0]) as src:
+        shape = src.shape if window is None else window[2:]
+    out = np.empty((len(files),) + tuple(shape), dtype=np.float32)
+    with ThreadPoolExecutor(n_threads) as pool:
+        list(pool.map(read, range(len(files))))
+
+    return out
+
+def dates_from_names(files):
+    "Dates in file names like himax.2016.01.01-Ghana.tif (YYYY.MM.DD, YYYY-MM-DD or YYYYMMDD), else None"
+    dates = []
+    for fn in files:
+        m = re.search(r'(\d{4})[.\-_]?(\d{2})[.\-_]?(\d{2})', os.path.basename(fn))
+        if m is None:
+            return None
+        dates.append(pd.Timestamp('-'.join(m.groups())))
+
+    return pd.DatetimeIndex(dates)
+
+def zonal_files(index, files, stats=('mean',), band=1, labels=None, form='wide', n_threads=8):
+    """ Zonal stats for a list of GeoTIFFs on the index grid (e.g. a year of daily himax files). Only
+    the window around the polygons is read from each file, with n_threads parallel reads, and the
+    stats for all files are computed in one pass.
+        Args:
+            index = from load_or_build_index
+            files = raster file names
+            stats = any of 'mean', 'max', 'min', 'sum', 'count'
+            band = band to read
+            labels = label for each file (default the dates in the file names, else the file names)
+            form = 'wide' (one row per polygon, columns (stat, label)) or 'long' (tidy: id, label, stats)
+            n_threads = number of files read at once
+        Returns DataFrame
+    """
+    if labels is None:
+        labels = dates_from_names(files)
+        labels = [os.path.basename(fn) for fn in files] if labels is None else labels
+
+    win_index, window = window_index(index)
+    stack = read_stack(files, window, band, n_threads, check=(index['shape'], index['transform']))
+    res = zonal_arrays(win_index, stack, stats)
+
+    return _to_frame(index['ids'], labels, res, stats, form)
+
+def zonal_stack(index, pattern, stats=('mean', 'max'), band=1, n_threads=8):
+    """ Tidy (id, date, stats) DataFrame of zonal stats for every raster matching a glob pattern, e.g.
+    './data/himax-2016/*.tif', sorted by date"""
+    files = sorted(glob.glob(pattern))
+    if not files:
+        raise ValueError('no files match ' + pattern)
+    dates = dates_from_names(files)
+    if dates is not None:
+        files = [files[i] for i in np.argsort(dates.values, kind='stable')]
+    df = zonal_files(index, files, stats, band, form='long', n_threads=n_threads)
+
+    return df.rename(columns={'label': 'date' if dates is not None else 'file'})
+
+def _to_frame(ids, labels, res, stats, form):
+    "DataFrame of zonal stats (polygons x labels for each stat)"
+    if form == 'long':
+        return pd.DataFrame(dict(id=np.repeat(ids, len(labels)), label=np.tile(labels, len(ids)),
+                                 **{stat: res[stat].ravel() for stat in stats}))
+    df = pd.concat({stat: pd.DataFrame(res[stat], index=ids, columns=labels) for stat in stats},
+                   axis=1)
+    df.index.name = 'id'
+
+    return df
@@ -15,6 +15,8 @@
 import numpy as np
 import xarray
 import pandas as pd
+from numba import vectorize
+from atmos.moisture import relative_humidity_from_dewpoint_temperature
 
 #### Functions
 def C_to_F(Tmax_C):
@@ -29,6 +31,40 @@ def F_to_C(Tmax_F):
     
     return Tmax_C
 
+@vectorize(['float32(float32, float32, int64, int64)',
+            'float64(float64, float64, int64, int64)'], cache=True)
+def _heatindex(T, RH, c_in, c_out):
+    """Heat index for one element in a single pass (see heatindex). T in °F, or °C if c_in,
+    returned in °C if c_out"""
+
+    if c_in:
+        T = (T * (9/5)) + 32
+
+    # Steadman, used if its average with T is below 80 °F, otherwise Rothfusz
+    steadman = 0.5 * (T + 61.0 + ((T-68.0)*1.2) + (RH*0.094))
+    avg = (steadman + T) / 2
+    if avg < 80:
+        HI = steadman
+    elif avg > 80:
+        HI = (-42.379 + 2.04901523*T + 10.14333127*RH - .22475541*T*RH - .00683783*T*T
+              - .05481717*RH*RH + .00122874*T*T*RH + .00085282*T*RH*RH - .00000199*T*T*RH*RH)
+    elif avg == 80:
+        HI = 0.0 # neither branch applies at exactly 80 °F (kept from the masked-sum version)
+    else:
+        HI = T + RH # NaN input
+
+    # Adjustments (as in the masked-sum version these are also applied to Steadman values when
+    # T is just above 80 °F, and skipped for RH == 0)
+    if (RH < 13) and (T > 80) and (T < 112) and (RH != 0):
+        HI -= ((13-RH)/4)*np.sqrt((17-abs(T-95.))/17)
+    elif (RH > 85) and (T > 80) and (T < 87):
+        HI += ((RH-85)/10) * ((87-T)/5)
+
+    if c_out:
+        HI = (HI - 32) * (5/9)
+
+    return HI
+
 def heatindex(Tmax, RH, unit_in, unit_out):
     
     """Make Heat Index from 2m air and relative humidity following NOAA's guidelines: 
@@ -37,6 +73,8 @@ def heatindex(Tmax, RH, unit_in, unit_out):
     to the funciton.
     
     --- update as needed cpt 2020.02.17
+    --- now a single pass numba ufunc (_heatindex): works the same on numpy, xarray and dask
+        (lazy) inputs with no full-size temporaries, float32 in gives float32 out
     
     Args:
         Tmax = x-array of tempatures
@@ -47,60 +85,7 @@ def heatindex(Tmax, RH, unit_in, unit_out):
     Returns HI
     """
     
-    # Make all data as float 
-#     Tmax = Tmax.astype('float')
-#     RH = RH.astype('float')
-    
-    # 1 convert C to F if needed
-    if unit_in == 'C':
-        Tmax = C_to_F(Tmax)
-        
-    # 2 Apply Steadman's and average with Tmax
-    USE_STEADMAN = (0.5 * (Tmax + 61.0 + ((Tmax-68.0)*1.2) + (RH*0.094)) + Tmax) / 2 < 80
-    STEADMAN = USE_STEADMAN * (0.5 * (Tmax + 61.0 + ((Tmax-68.0)*1.2) + (RH*0.094))) #.astype(int)
-    
-    # 3 Use Rothfusz if (STEADMAN + Tmax) / 2 > 80
-    USE_ROTH = (0.5 * (Tmax + 61.0 + ((Tmax-68.0)*1.2) + (RH*0.094)) + Tmax) / 2 > 80
-    ROTH = USE_ROTH * (-42.379 + 2.04901523*Tmax + 10.14333127*RH - .22475541*Tmax *RH - .00683783*Tmax*Tmax - .05481717*RH*RH + .00122874*Tmax*Tmax*RH + .00085282*Tmax*RH*RH - .00000199*Tmax*Tmax*RH*RH)
-
-    # 3 Adjust Roth 1
-    USE_ADJ1 = (RH < 13) & (Tmax > 80) & (Tmax < 112)
-    ADJ1_RH = USE_ADJ1 * RH #.astype(int)
-    ADJ1_RH = ADJ1_RH.where(ADJ1_RH != 0) #ADJ1_RH[ADJ1_RH == 0] = np.nan
-    ADJ1_Tmax = USE_ADJ1 * Tmax # .astype(int)
-    ADJ1_Tmax = ADJ1_Tmax.where(ADJ1_Tmax != 0) #ADJ1_Tmax[ADJ1_Tmax == 0] = np.nan
-    ADJ1 = ((13-ADJ1_RH)/4)*np.sqrt((17-abs(ADJ1_Tmax-95.))/17)
-    ADJ1 = np.nan_to_num(ADJ1, 0)
-    
-    ADJ1_ROTH = ROTH * USE_ADJ1
-    ADJ1_ROTH = ADJ1_ROTH - ADJ1
-    
-    # 4 Adjust Roth 2
-    USE_ADJ2 = (RH > 85) & (Tmax > 80) & (Tmax < 87)
-    ADJ2_RH = USE_ADJ2 * RH #.astype(int)
-    ADJ2_RH = ADJ2_RH.where(ADJ2_RH != 0) #ADJ2_RH[ADJ2_RH == 0] = np.nan
-    ADJ2_Tmax = USE_ADJ2.astype(int) * Tmax
-    ADJ2_Tmax = ADJ2_Tmax.where(ADJ2_Tmax != 0) #ADJ2_Tmax[ADJ2_Tmax == 0] = np.nan
-    ADJ2 = ((ADJ2_RH-85)/10) * ((87-ADJ2_Tmax)/5)
-    ADJ2 = np.nan_to_num(ADJ2, 0)
-    
-    ADJ2_ROTH = ROTH * USE_ADJ2
-    ADJ2_ROTH = ADJ2_ROTH + ADJ2
-    
-    # Roth w/o adjustments
-    ROTH = ROTH * ~USE_ADJ1 * ~USE_ADJ2
-    
-    # sum the stacked arrays
-    HI = ROTH + STEADMAN + ADJ1_ROTH +  ADJ2_ROTH 
-    
-    # Convert HI to C if desired
-    if unit_out == 'C':
-        HI = F_to_C(HI)
-    
-    # return for test
-    # return STEADMAN, ADJ1_ROTH, ADJ2_ROTH, ROTH, HI
-    
-    return HI
+    return _heatindex(Tmax, RH, int(unit_in == 'C'), int(unit_out == 'C'))
 
 def make_rh(tmax, vpdmax):
     """ Equation from Spangler et al 2018 to caluclate relative min humidity from Tmax and vpdmax 
@@ -126,4 +111,190 @@ def hi_to_wbgt(HI):
     
     WBGT = -0.0034*HI**2 + 0.96*HI - 34
     
-    return WBGT
\ No newline at end of file
+    return WBGT
+
+def _daily_heat_block(t2m, d2m, day):
+    """Daily tmin, tmax, himax and wbgtmax (°C) stacked as (4, days, ...) from hourly t2m and d2m (K),
+    where day is the day number of each hour. Hourly rh/hi/wbgt only exist for one day at a time"""
+    days = np.unique(day)
+    out = np.empty((4, len(days)) + t2m.shape[1:], dtype=np.result_type(t2m, np.float32))
+    for i, d in enumerate(days):
+        T, Td = t2m[day == d], d2m[day == d]
+        rh = relative_humidity_from_dewpoint_temperature(T, Td) * 100 # fraction to %
+        hi = heatindex(T - 273.15, rh, 'C', 'F')
+
+        # fmin/fmax skip NaNs like xarray's resample().min()/.max()
+        out[0, i] = np.fmin.reduce(T, axis=0) - 273.15
+        out[1, i] = np.fmax.reduce(T, axis=0) - 273.15
+        out[2, i] = F_to_C(np.fmax.reduce(hi, axis=0))
+        out[3, i] = np.fmax.reduce(hi_to_wbgt(hi), axis=0)
+
+    return out
+
+def daily_heat(ds, t2m='t2m', d2m='d2m', time=None, days_per_chunk=1, offset=0):
+    """ Daily tmin, tmax, himax and wbgtmax (°C) from hourly ERA5 2m air and dewpoint temperature (K),
+    the same steps as make_hi_wbgt then resample(time='1D').min/max in ERA5_HI_WBGT_AirTemps.ipynb but as
+    a streaming per-day reduction: hourly rh, hi and wbgt are made and reduced one day at a time inside
+    each task, so only the daily fields are kept. Dask inputs give a lazy result with one task per chunk.
+    Note rh is passed to heatindex in % as NOAA's formula expects, whereas the notebook passes the
+    fraction from relative_humidity_from_dewpoint_temperature, so tmin and tmax match the notebook but
+    himax and wbgtmax do not (by tens of °C on hot, humid days).
+        Args:
+            ds = xarray dataset with hourly t2m and d2m
+            t2m, d2m = variable names
+            time = name of the time dim ('valid_time' or 'time' if None)
+            days_per_chunk = days of hourly input per dask chunk (time chunks are aligned to days)
+            offset = local time offset from UTC in hours, days run from local midnight (see daily_stats)
+        Returns dataset of tmin, tmax, himax, wbgtmax with one step per (local) day
+    """
+    if time is None:
+        time = 'valid_time' if 'valid_time' in ds.dims else 'time'
+    T, Td = ds[t2m].transpose(time, ...), ds[d2m].transpose(time, ...)
+
+    # day number of each hour, and the start of each day for the output
+    days = (pd.DatetimeIndex(ds[time].values) + pd.Timedelta(hours=offset)).floor('D')
+    day, labels = pd.factorize(days)
+    counts = np.bincount(day)
+
+    if T.chunks is None:
+        out = _daily_heat_block(T.values, Td.values, day)
+    else:
+        import dask.array as da
+
+        # rechunk time to whole days so each task reduces its own days
+        time_chunks = tuple(int(counts[i:i + days_per_chunk].sum())
+                            for i in range(0, len(counts), days_per_chunk))
+        day_chunks = tuple(min(days_per_chunk, len(counts) - i) for i in range(0, len(counts), days_per_chunk))
+        T_d = T.data.rechunk((time_chunks,) + T.data.chunks[1:])
+        Td_d = Td.data.rechunk(T_d.chunks)
+
+        def block(t, td, block_info=None):
+            start, stop = block_info[0]['array-location'][0]
+            return _daily_heat_block(t, td, day[start:stop])
+
+        out = da.map_blocks(block, T_d, Td_d, new_axis=0, dtype=np.result_type(T.dtype, np.float32),
+                            chunks=((4,), day_chunks) + T_d.chunks[1:])
+
+    coords = {k: v for k, v in T.coords.items() if time not in v.dims}
+    coords[time] = labels.values
+    ds_out = xarray.Dataset({name: ((time,) + T.dims[1:], out[i], {'units': '°C'})
+                         for i, name in enumerate(['tmin', 'tmax', 'himax', 'wbgtmax'])},
+                            coords=coords)
+
+    return ds_out
+
+# Statistics available in daily_stats
+DAILY_STATS = ('min', 'max', 'mean', 'argmax')
+
+def _reduce_days(x, stats, min_hours):
+    """Reduce hourly x (days * 24, ...) starting at local midnight to (stats, days, ...) with a
+    reshape, skipping NaNs. Days with fewer than min_hours valid hours are NaN"""
+    x = x.reshape((-1, 24) + x.shape[1:])
+    valid = np.isfinite(x).sum(axis=1)
+    out = np.empty((len(stats),) + valid.shape, dtype=np.result_type(x, np.float32))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for i, stat in enumerate(stats):
+            if stat == 'min':
+                out[i] = np.fmin.reduce(x, axis=1)
+            elif stat == 'max':
+                out[i] = np.fmax.reduce(x, axis=1)
+            elif stat == 'mean':
+                out[i] = np.nansum(x, axis=1) / valid
+            elif stat == 'argmax':
+                out[i] = np.argmax(np.where(np.isnan(x), -np.inf, x), axis=1)
+    out[:, valid < min_hours] = np.nan
+
+    return out
+
+def _local_days(x, offset, start, n_days, stats, min_hours, days_per_chunk):
+    """Daily stats of hourly x (time first, numpy or dask) in local time UTC + offset hours. Pads with
+    NaN so the series runs from local midnight at start for n_days"""
+    before = int(offset - start) # hours from the first local midnight to the first value
+    after = n_days * 24 - before - x.shape[0]
+    pad = [(before, after)] + [(0, 0)] * (x.ndim - 1)
+
+    if not hasattr(x, 'dask'):
+        return _reduce_days(np.pad(x, pad, constant_values=np.nan), stats, min_hours)
+
+    import dask.array as da
+    x = da.pad(x, pad, mode='constant', constant_values=np.nan)
+    day_chunks = (days_per_chunk,) * (n_days // days_per_chunk)
+    day_chunks += ((n_days % days_per_chunk,) if n_days % days_per_chunk else ())
+    x = x.rechunk((tuple(24 * d for d in day_chunks),) + x.chunks[1:])
+
+    return da.map_blocks(_reduce_days, x, stats, min_hours, new_axis=0,
+                         dtype=np.result_type(x.dtype, np.float32),
+                         chunks=((len(stats),), day_chunks) + x.chunks[1:])
+
+def daily_stats(da, stats=DAILY_STATS, offset=0, solar=False, time=None, lon='longitude',
+                min_hours=24, days_per_chunk=1):
+    """ Daily min, max, mean and argmax hour of hourly data (e.g. t2m, tw, hi, wbgt) over local days,
+    instead of UTC days from resample(time='1D'). Days are made by padding to whole local days and
+    reshaping to (days, 24) so each stat is one vectorised reduction - no groupby. Dask inputs stay
+    lazy with one task per chunk of days_per_chunk days.
+        Args:
+            da = hourly xarray DataArray (or Dataset, every variable is reduced)
+            stats = any of 'min', 'max', 'mean', 'argmax' (local hour of the max, 0-23)
+            offset = fixed offset of local time from UTC in whole hours, e.g. 6 for Bangladesh
+            solar = use local solar time, UTC + longitude / 15 rounded to the hour (ignores offset)
+            time = name of the time dim ('valid_time' or 'time' if None)
+            lon = name of the longitude dim (for solar)
+            min_hours = days with fewer valid hours are NaN (e.g. partial days at the ends)
+        Returns dataset of <name>_<stat>, one step per local day labelled by the local date
+    """
+    if isinstance(da, xarray.Dataset):
+        return xarray.merge([daily_stats(da[name], stats, offset, solar, time, lon, min_hours,
+                                         days_per_chunk) for name in da.data_vars])
+    if time is None:
+        time = 'valid_time' if 'valid_time' in da.dims else 'time'
+    for stat in stats:
+        if stat not in DAILY_STATS:
+            raise ValueError("stats must be from 'min', 'max', 'mean', 'argmax'")
+    times = pd.DatetimeIndex(da[time].values)
+    if len(times) > 1 and not (np.diff(times.values) == np.timedelta64(1, 'h')).all():
+        raise ValueError('daily_stats needs contiguous hourly data')
+
+    # Offset in hours for each longitude (solar) or for all data
+    if solar:
+        da = da.transpose(time, ..., lon)
+        offsets = np.round(((da[lon].values + 180) % 360 - 180) / 15).astype(int)
+    else:
+        if offset != int(offset):
+            raise ValueError('offset must be a whole number of hours for hourly data')
+        da = da.transpose(time, ...)
+        offsets = np.array([int(offset)])
+
+    # Local days covered by any offset, counted in hours from local midnight of the first day
+    t0 = times[0].hour
+    start = 24 * ((t0 + offsets.min()) // 24) - t0
+    end = t0 + offsets.max() + len(times) - 1
+    n_days = int((end - start - t0) // 24 + 1)
+    first_day = times[0].floor('D') + pd.Timedelta(hours=int(start + t0))
+
+    x = da.data
+    if solar:
+        # one reduction per group of longitudes sharing an offset, then back in longitude order
+        groups = np.unique(offsets)
+        parts = [_local_days(x[..., offsets == off], off, start, n_days, stats, min_hours,
+                             days_per_chunk) for off in groups]
+        order = np.argsort(np.concatenate([np.flatnonzero(offsets == off) for off in groups]),
+                           kind='stable')
+        if hasattr(x, 'dask'):
+            import dask.array
+            out = dask.array.concatenate(parts, axis=-1)[..., order]
+        else:
+            out = np.concatenate(parts, axis=-1)[..., order]
+    else:
+        out = _local_days(x, offsets[0], start, n_days, stats, min_hours, days_per_chunk)
+
+    name = da.name or 'var'
+    coords = {k: v for k, v in da.coords.items() if time not in v.dims}
+    coords[time] = xarray.Variable(time, pd.date_range(first_day, periods=n_days, freq='D'),
+                                   {'long_name': 'local solar date' if solar else
+                                    'local date (UTC%+d)' % offsets[0]})
+    ds_out = xarray.Dataset({f'{name}_{stat}': ((time,) + da.dims[1:], out[i],
+                                                {'units': 'hour'} if stat == 'argmax' else
+                                                dict(da.attrs))
+                             for i, stat in enumerate(stats)}, coords=coords)
+
+    return ds_out
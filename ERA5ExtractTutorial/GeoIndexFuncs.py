@@ -0,0 +1,188 @@
+##################################################################################
+#
+#    Geo Index Funcs
+#
+#    Spatial index over grid cell centres for nearest-cell and within-radius
+#    lookups on any grid (regular, curvilinear or irregular), using
+#    great-circle distances rather than degree approximations such as
+#    km_to_d (0.01 * km / 1.11, which ignores latitude).
+#
+#    Cell centres are put on the unit sphere as 3D points and indexed with a
+#    scipy cKDTree, where the straight-line (chord) distance between points is
+#    a monotonic function of the great-circle distance, so nearest-k and
+#    radius queries are exact. The tree is built once per grid and cached in
+#    memory (and optionally on disk). Queries take arrays of points (e.g. all
+#    DHS clusters) in one vectorised call.
+#
+#    A haversine BallTree (sklearn.neighbors, scikit-learn is in
+#    environment.yml) would give the same cells. cKDTree is used because its
+#    nearest and radius queries run in parallel threads (workers=), the chord
+#    distances it returns convert exactly to great-circle km, and radius hits
+#    go straight into the CSR weight matrices below.
+#
+#    Radius queries return a sparse (point x cell) weight matrix in the same
+#    form as ZonalFuncs indexes, so zonal stats over km buffers are a sparse
+#    matrix product:
+#
+#       tree = GeoIndexFuncs.grid_tree(ds)
+#       index = GeoIndexFuncs.radius_index(tree, lat, lon, 5, ids=cluster_id)
+#       W = index['weights']  # clusters x cells
+#
+#################################################################################
+
+
+#### Dependencies
+import hashlib
+import os
+import pickle
+import numpy as np
+import scipy.sparse as sp
+from scipy.spatial import cKDTree
+
+#### Settings
+EARTH_RADIUS = 6371.0088 # km, mean radius
+
+# Trees by grid hash, so each grid is indexed once per session
+_TREES = {}
+
+#### Functions
+def to_xyz(lat, lon):
+    "Unit vectors (n, 3) for latitudes and longitudes in degrees"
+    lat, lon = np.radians(np.asarray(lat, dtype=float)), np.radians(np.asarray(lon, dtype=float))
+    cos_lat = np.cos(lat)
+
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+def chord_to_km(chord):
+    "Great-circle distance (km) from chord length on the unit sphere"
+    return 2 * EARTH_RADIUS * np.arcsin(np.clip(chord / 2, 0, 1))
+
+def km_to_chord(km):
+    "Chord length on the unit sphere for a great-circle distance (km)"
+    return 2 * np.sin(np.minimum(km / EARTH_RADIUS, np.pi) / 2)
+
+def haversine(lat1, lon1, lat2, lon2):
+    "Great-circle distance (km) between points in degrees"
+    lat1, lon1, lat2, lon2 = [np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2)]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+def km_to_deg(km, lat):
+    """ Latitude and longitude extent (degrees) of a distance at a latitude, a replacement for km_to_d
+    that accounts for the narrowing of longitude towards the poles"""
+    dlat = np.degrees(km / EARTH_RADIUS)
+    dlon = dlat / np.maximum(np.cos(np.radians(lat)), 1e-12)
+
+    return dlat, dlon
+
+def _grid_centres(ds, lat_name, lon_name):
+    "Cell-centre latitudes and longitudes (flattened), grid shape and dims from 1D or 2D coords"
+    lat, lon = ds[lat_name], ds[lon_name]
+    if lat.ndim == 1 and lon.ndim == 1 and lat.dims != lon.dims:
+        # regular grid, 1D axes
+        lat2, lon2 = np.meshgrid(lat.values, lon.values, indexing='ij')
+        return lat2.ravel(), lon2.ravel(), (lat.size, lon.size), (lat.dims[0], lon.dims[0])
+
+    # curvilinear (2D) or irregular (1D, shared dim) coords
+    return lat.values.ravel(), lon.values.ravel(), lat.shape, lat.dims
+
+def build_tree(lat, lon, shape=None, dims=None):
+    "Index cell centres (flattened lat/lon arrays in degrees). Returns dict with the tree and grid info"
+    lat, lon = np.ravel(lat), np.ravel(lon)
+    valid = np.isfinite(lat) & np.isfinite(lon)
+    cells = np.flatnonzero(valid)
+    tree = cKDTree(to_xyz(lat[valid], lon[valid]))
+    shape = (lat.size,) if shape is None else tuple(shape)
+
+    return dict(tree=tree, cells=cells, shape=shape, dims=dims)
+
+def grid_tree(ds, lat_name='latitude', lon_name='longitude', cache_dir=None):
+    """ Tree over the cell centres of a dataset's grid, built once per grid (in memory, and in cache_dir
+    as a pickle if given)"""
+    lat, lon, shape, dims = _grid_centres(ds, lat_name, lon_name)
+    key = hashlib.sha1(np.ascontiguousarray(lat).tobytes() + np.ascontiguousarray(lon).tobytes() +
+                       str((shape, dims)).encode()).hexdigest()
+    if key in _TREES:
+        return _TREES[key]
+
+    fn = None if cache_dir is None else os.path.join(cache_dir, 'geoindex-' + key + '.pkl')
+    if fn is not None and os.path.exists(fn):
+        with open(fn, 'rb') as f:
+            tree = pickle.load(f)
+    else:
+        tree = build_tree(lat, lon, shape, dims)
+        if fn is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(fn, 'wb') as f:
+                pickle.dump(tree, f, protocol=pickle.HIGHEST_PROTOCOL)
+    _TREES[key] = tree
+
+    return tree
+
+def nearest(tree, lat, lon, k=1, max_km=None, workers=-1):
+    """ Nearest k cells to each point.
+        Args:
+            tree = from grid_tree or build_tree
+            lat, lon = point coordinates (degrees)
+            k = number of neighbours
+            max_km = cells further away are not returned (index -1, distance inf)
+            workers = threads for the query (-1 = all CPUs)
+        Returns (cells, km): flat cell indices into the grid and great-circle distances, (n,) for k=1
+        else (n, k)
+    """
+    upper = np.inf if max_km is None else km_to_chord(max_km)
+    chord, i = tree['tree'].query(to_xyz(lat, lon), k=k, distance_upper_bound=upper, workers=workers)
+    missing = ~np.isfinite(chord)
+    cells = np.where(missing, -1, tree['cells'][np.minimum(i, tree['cells'].size - 1)])
+
+    return cells, np.where(missing, np.inf, chord_to_km(np.where(missing, 0, chord)))
+
+def unravel(tree, cells):
+    "Grid indices (one array per grid dim) of flat cell indices, -1 where cells is -1"
+    idx = np.unravel_index(np.maximum(cells, 0), tree['shape'])
+
+    return tuple(np.where(cells < 0, -1, i) for i in idx)
+
+def radius_index(tree, lat, lon, radius_km, ids=None, weights='binary', min_km=1.0, workers=-1):
+    """ Cells within radius_km (great-circle) of each point, as a sparse weight matrix.
+        Args:
+            tree = from grid_tree or build_tree
+            lat, lon = point coordinates (degrees)
+            radius_km = radius (km), a scalar or one per point
+            ids = point ids (default 0..n-1)
+            weights = 'binary' (1 per cell), 'idw' (1 / max(distance, min_km), so a cell at 0 km gets
+                      1 / min_km, 1 by default), or 'gaussian' (exp(-d^2 / (2 (radius/2)^2)))
+            min_km = for idw, distances (km) below this count as min_km, so weights stay finite
+        Returns dict with the CSR matrix 'weights' (points x cells), 'distance' (same pattern, km), 'ids'
+        and the grid 'shape', usable with ZonalFuncs.zonal_arrays
+    """
+    if weights not in ('binary', 'idw', 'gaussian'):
+        raise ValueError("weights must be 'binary', 'idw', or 'gaussian'")
+    if weights == 'idw' and not min_km > 0:
+        raise ValueError('min_km must be positive for idw weights')
+    xyz = to_xyz(lat, lon)
+    radius = np.broadcast_to(np.asarray(radius_km, dtype=float), (xyz.shape[0],))
+    hits = tree['tree'].query_ball_point(xyz, km_to_chord(radius), workers=workers)
+
+    counts = np.array([len(h) for h in hits])
+    rows = np.repeat(np.arange(len(hits)), counts)
+    cols = np.concatenate([np.asarray(h, dtype=int) for h in hits]) if rows.size else np.zeros(0, int)
+    km = chord_to_km(np.linalg.norm(xyz[rows] - tree['tree'].data[cols], axis=1))
+    cols = tree['cells'][cols]
+
+    if weights == 'binary':
+        w = np.ones(km.size)
+    elif weights == 'idw':
+        w = 1 / np.maximum(km, min_km)
+    else:
+        w = np.exp(-km ** 2 / (2 * (radius[rows] / 2) ** 2))
+
+    n_cells = int(np.prod(tree['shape']))
+    W = sp.csr_matrix((w, (rows, cols)), shape=(xyz.shape[0], n_cells))
+    D = sp.csr_matrix((km, (rows, cols)), shape=(xyz.shape[0], n_cells))
+    W.sort_indices()
+    D.sort_indices()
+
+    return dict(weights=W, distance=D, ids=np.arange(xyz.shape[0]) if ids is None else np.asarray(ids),
+                shape=np.array(tree['shape']))
@@ -0,0 +1,131 @@
+##################################################################################
+#
+#    Plan Funcs
+#
+#    Functions to pick dask chunk shapes and the worker/thread layout for gridded
+#    runs (e.g. hourly_tw.py) from the dataset shape, the memory available, and
+#    the measured cost of the kernel being applied.
+#
+#    The memory needed by one task is
+#        elements x itemsize x (inputs + outputs + temporaries)
+#    where temporaries is the peak number of full-size temporary arrays the
+#    kernel allocates (measured with tracemalloc). Each worker runs
+#    threads_per_worker tasks at once and should stay under about half of its
+#    memory limit (dask starts spilling at 60%). Within that bound chunks are
+#    made as large as possible for throughput, but small enough that there are
+#    at least 2 tasks per thread to keep all workers busy.
+#
+#################################################################################
+
+
+#### Dependencies
+import os
+import time
+import tracemalloc
+import numpy as np
+from dask.utils import parse_bytes, format_bytes
+
+#### Functions
+def system_resources():
+    "Number of CPUs and total memory (bytes) of this machine"
+    n_cpu = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    try:
+        import psutil # pinned in environment.yml; os.sysconf does not exist on Windows
+        mem = psutil.virtual_memory().total
+    except ImportError:
+        mem = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+
+    return n_cpu, mem
+
+def measure_kernel(func, args, repeats=3):
+    """ Measure the cost of a kernel on sample inputs.
+        Args:
+            func = function applied elementwise, e.g. hourly_tw's q + tw kernel
+            args = list of sample numpy arrays (same shape, e.g. a few hours of real data)
+            repeats = number of timed calls (the fastest is used)
+        Returns seconds per element and the peak temporary memory as a multiple of one input array
+    """
+    func(*[a[:10] for a in args]) # compile / warm up
+    n = args[0].size
+    best = np.inf
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - t0)
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best / n, peak / (n * args[0].dtype.itemsize)
+
+def _time_chunk(n_time, max_time):
+    "Largest time chunk <= max_time that is a whole number of days (or divides a day), capped at n_time"
+    if max_time >= 24:
+        return int(min(n_time, 24 * (max_time // 24)))
+    for c in (12, 8, 6, 4, 3, 2, 1):
+        if c <= max_time:
+            return min(c, n_time)
+
+def plan_chunks(sizes, itemsize, n_inputs, n_outputs, temp_mult, cost, n_workers, threads_per_worker,
+                memory_limit, mem_fraction=0.5, min_task_seconds=0.1, max_time_chunk=None):
+    """ Pick chunk sizes for a (time, latitude, longitude) run.
+        Args:
+            sizes = dict of dim sizes, e.g. dict(time=8784, latitude=721, longitude=1440)
+            itemsize = bytes per element (4 for float32)
+            n_inputs, n_outputs = number of full-size input and output arrays per task
+            temp_mult = peak temporaries as a multiple of one array (see measure_kernel)
+            cost = seconds per element (see measure_kernel)
+            n_workers, threads_per_worker = dask layout
+            memory_limit = memory per worker (bytes)
+            mem_fraction = fraction of the worker memory the running tasks may use
+            min_task_seconds = smallest worthwhile task (dask overhead is ~1 ms per task)
+            max_time_chunk = cap on the time chunk, e.g. 24 so that monthly blocks start on a chunk
+        Returns dict with chunks and the estimated memory/time per task
+    """
+    bytes_per_elem = itemsize * (n_inputs + n_outputs + temp_mult)
+    total = int(np.prod(list(sizes.values())))
+
+    # Memory bound, then keep at least 2 tasks per thread if that still gives worthwhile tasks
+    max_elems = int(mem_fraction * memory_limit / (threads_per_worker * bytes_per_elem))
+    n_threads = n_workers * threads_per_worker
+    elems = min(max_elems, max(total // (2 * n_threads), int(min_task_seconds / cost)))
+    elems = max(elems, 1)
+
+    # Whole days in time first (keeps time blocks aligned with chunks), then square spatial tiles
+    n_time, n_lat, n_lon = sizes['time'], sizes['latitude'], sizes['longitude']
+    max_time = max(1, elems // (n_lat * n_lon))
+    if max_time_chunk is not None:
+        max_time = min(max_time, max_time_chunk)
+    t = _time_chunk(n_time, max_time)
+    lat = min(n_lat, max(1, int(np.sqrt(elems / t))))
+    lon = min(n_lon, max(1, elems // (t * lat)))
+    chunks = dict(time=t, latitude=lat, longitude=lon)
+
+    chunk_elems = chunks['time'] * chunks['latitude'] * chunks['longitude']
+    n_tasks = int(np.prod([-(-sizes[d] // chunks[d]) for d in chunks]))
+    return dict(chunks=chunks,
+                task_memory=chunk_elems * bytes_per_elem,
+                task_seconds=chunk_elems * cost,
+                n_tasks=n_tasks,
+                est_seconds=n_tasks * chunk_elems * cost / n_threads,
+                memory_bound=max_elems < total // (2 * n_threads))
+
+def plan_workers(n_cpu=None, memory=None, threads_per_worker=1):
+    """ Worker layout: the numba/numpy kernels hold the GIL for much of their run time, so one thread
+        per worker (processes) is the default. memory is the total to share between workers"""
+    sys_cpu, sys_mem = system_resources()
+    n_cpu = sys_cpu if n_cpu is None else n_cpu
+    memory = 0.8 * sys_mem if memory is None else parse_bytes(memory) if isinstance(memory, str) else memory
+    n_workers = max(1, n_cpu // threads_per_worker)
+
+    return dict(n_workers=n_workers, threads_per_worker=threads_per_worker,
+                memory_limit=int(memory // n_workers))
+
+def describe(workers, plan):
+    "Readable summary of a plan"
+    return (f"{workers['n_workers']} workers x {workers['threads_per_worker']} threads, "
+            f"{format_bytes(workers['memory_limit'])} each; chunks {plan['chunks']}, "
+            f"{format_bytes(plan['task_memory'])} and ~{plan['task_seconds']:.2f} s per task, "
+            f"{plan['n_tasks']} tasks, ~{plan['est_seconds']:.0f} s total")
@@ -0,0 +1,159 @@
+##################################################################################
+#
+#    Point Funcs
+#
+#    Functions to extract gridded heat data (e.g. the daily NetCDF from
+#    ERA5_HI_WBGT_AirTemps.ipynb) at point locations such as DHS clusters, for
+#    all points at once instead of a ds.sel(..., method='nearest') loop per
+#    point (see pointextract_netcdf.ipynb).
+#
+#    Grid indices are found once for all points with np.searchsorted, each grid
+#    cell used by any point is read once with a single vectorised isel, and the
+#    result is returned as one long (point x time rows) or wide (time x point
+#    columns) DataFrame. Works for ascending or descending (ERA5) latitudes,
+#    0-360 or -180-180 longitudes, and lazy multi-file datasets
+#    (xr.open_mfdataset), where only the cells needed are read.
+#
+#    Curvilinear (2D latitude/longitude) or irregular grids, or nearest cells
+#    within a great-circle distance (max_km), use a KD-tree over the cell
+#    centres built once per grid (see GeoIndexFuncs.py).
+#
+#################################################################################
+
+
+#### Dependencies
+import numpy as np
+import xarray as xr
+import GeoIndexFuncs
+
+#### Functions
+def _wrap_lon(lon, grid_lon):
+    "Put point longitudes in the convention of the grid (0-360 or -180-180)"
+    lon = np.asarray(lon, dtype=float)
+    if np.nanmax(grid_lon) > 180:
+        return lon % 360
+    return (lon + 180) % 360 - 180
+
+def _axis_index(coord, x, method):
+    """ Indices (and weights) of positions x on a regular or irregular 1D coordinate (ascending or
+    descending). nearest: returns index. bilinear: returns the two bracketing indices and the
+    weight of the second. Positions outside the coordinate get index -1"""
+    coord = np.asarray(coord, dtype=float)
+    flip = coord[0] > coord[-1]
+    c = coord[::-1] if flip else coord
+    n = c.size
+
+    i = np.clip(np.searchsorted(c, x), 1, n - 1) # c[i-1] <= x <= c[i]
+    lo, hi = c[i - 1], c[i]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        w = np.clip((x - lo) / (hi - lo), 0., 1.)
+    inside = (x >= c[0]) & (x <= c[-1])
+
+    if method == 'nearest':
+        # ties go to the larger coordinate value on ascending and descending axes, as in pandas
+        # get_indexer(method='nearest') and so ds.sel(method='nearest')
+        idx = np.where(x - lo < hi - x, i - 1, i)
+        idx = n - 1 - idx if flip else idx
+        return np.where(np.isnan(x), -1, idx), inside
+
+    i0, i1 = i - 1, i
+    if flip:
+        i0, i1 = n - 1 - i0, n - 1 - i1
+    i0 = np.where(inside, i0, -1)
+    i1 = np.where(inside, i1, -1)
+
+    return i0, i1, w
+
+def grid_indices(ds, lat, lon, lat_name='latitude', lon_name='longitude', tolerance=None):
+    """ Nearest grid indices (iy, ix) for arrays of point lat/lon. Like ds.sel(method='nearest'),
+    points outside the grid get the edge cell unless tolerance (degrees) is given, in which case
+    they get -1"""
+    lat = np.asarray(lat, dtype=float)
+    lon = _wrap_lon(lon, ds[lon_name].values)
+    iy, in_y = _axis_index(ds[lat_name].values, lat, 'nearest')
+    ix, in_x = _axis_index(ds[lon_name].values, lon, 'nearest')
+
+    if tolerance is not None:
+        far = (np.abs(ds[lat_name].values[iy] - lat) > tolerance) | \
+              (np.abs(_wrap_lon(ds[lon_name].values[ix], ds[lon_name].values) - lon) > tolerance)
+        iy, ix = np.where(far, -1, iy), np.where(far, -1, ix)
+
+    return iy, ix
+
+def _read_cells(ds, idx, dims):
+    """ Read the grid cells idx (one index array per dim in dims) with one vectorised isel, reading
+    each distinct cell once"""
+    valid = np.all([i >= 0 for i in idx], axis=0)
+    cells, inverse = np.unique(np.stack([np.where(valid, i, 0) for i in idx]),
+                               axis=1, return_inverse=True)
+    vals = ds.isel({d: xr.DataArray(c, dims='point') for d, c in zip(dims, cells)}).load()
+    vals = vals.isel(point=inverse.ravel())
+
+    return vals.where(xr.DataArray(valid, dims='point'))
+
+def extract_points(ds, lat, lon, ids=None, method='nearest', variables=None, form='long',
+                   id_name='cluster_id', lat_name='latitude', lon_name='longitude', tolerance=None,
+                   max_km=None):
+    """ Extract gridded data at many points in one pass.
+        Args:
+            ds = xarray dataset (or DataArray) with latitude and longitude dims
+            lat, lon = arrays of point latitudes and longitudes
+            ids = point identifiers (default 0..n-1)
+            method = 'nearest' (same cells as ds.sel(method='nearest')) or 'bilinear' (weighted
+                     mean of the 4 surrounding cells, renormalised where some are NaN; NaN outside
+                     the grid)
+            variables = data variables to extract (default all)
+            form = 'long' (one row per point and time, like the per-cluster loop) or 'wide' (index
+                   time, columns (variable, id)); 'dataset' returns the xarray result
+            tolerance = for nearest, max distance (degrees) to the cell centre, else NaN
+            max_km = for nearest, max great-circle distance (km) to the cell centre, else NaN. Uses
+                     the KD-tree index, as do grids with 2D (curvilinear) or point-wise coords
+        Returns DataFrame (or Dataset with a point dim)
+    """
+    if isinstance(ds, xr.DataArray):
+        ds = ds.to_dataset(name=ds.name or 'var')
+    if variables is not None:
+        ds = ds[list(variables)]
+    if method not in ('nearest', 'bilinear'):
+        raise ValueError("method must be 'nearest' or 'bilinear'")
+    if form not in ('long', 'wide', 'dataset'):
+        raise ValueError("form must be 'long', 'wide', or 'dataset'")
+    lat = np.asarray(lat, dtype=float)
+    ids = np.arange(lat.size) if ids is None else np.asarray(ids)
+
+    regular = ds[lat_name].ndim == 1 and ds[lon_name].ndim == 1 and ds[lat_name].dims != ds[lon_name].dims
+    if not regular and method != 'nearest':
+        raise ValueError("method must be 'nearest' for curvilinear or irregular grids")
+
+    if method == 'nearest' and (max_km is not None or not regular):
+        tree = GeoIndexFuncs.grid_tree(ds, lat_name, lon_name)
+        cells, _ = GeoIndexFuncs.nearest(tree, lat, lon, max_km=max_km)
+        out = _read_cells(ds, GeoIndexFuncs.unravel(tree, cells), tree['dims'])
+    elif method == 'nearest':
+        iy, ix = grid_indices(ds, lat, lon, lat_name, lon_name, tolerance)
+        out = _read_cells(ds, (iy, ix), (lat_name, lon_name))
+    else:
+        lon = _wrap_lon(lon, ds[lon_name].values)
+        y0, y1, wy = _axis_index(ds[lat_name].values, lat, 'bilinear')
+        x0, x1, wx = _axis_index(ds[lon_name].values, lon, 'bilinear')
+        total, weight = 0, 0
+        for iy, ix, w in [(y0, x0, (1 - wy) * (1 - wx)), (y0, x1, (1 - wy) * wx),
+                          (y1, x0, wy * (1 - wx)), (y1, x1, wy * wx)]:
+            vals = _read_cells(ds, (iy, ix), (lat_name, lon_name))
+            w = xr.DataArray(w, dims='point').where(vals.notnull(), 0.)
+            total = total + (vals * w).fillna(0.)
+            weight = weight + w
+        out = (total / weight).where(weight > 0)
+        out = out.drop_vars([lat_name, lon_name], errors='ignore')
+
+    out = out.assign_coords({id_name: ('point', ids)}).swap_dims(point=id_name)
+    out = out.drop_vars('point', errors='ignore')
+    if form == 'dataset':
+        return out
+
+    dim_order = [id_name] + [d for d in out.dims if d != id_name]
+    df = out.to_dataframe(dim_order=dim_order)
+    if form == 'wide':
+        return df[list(out.data_vars)].unstack(id_name)
+
+    return df.reset_index()
@@ -0,0 +1,297 @@
+##################################################################################
+#
+#    Store Funcs
+#
+#    Functions to write gridded heat products (tw, HI, WBGT) to Zarr or NetCDF4
+#    with compression, optional int16/float16 packing, and explicit chunk
+#    layouts, and to rechunk an existing store to a different layout.
+#
+#    Chunk layouts:
+#       'space' - one day of hours x large spatial tiles, good for maps and for
+#                 writing block by block (see hourly_tw.py)
+#       'time'  - the full time series x small spatial tiles, good for point
+#                 extraction and time series at a few locations
+#
+#    Typical use is to write with the 'space' layout while computing, then make
+#    a 'time' copy with rechunk() for point/time-series readers.
+#
+#    For daily operational updates, day_checksums() finds the days whose hourly
+#    inputs are new or changed since the last run, and upsert() writes just
+#    those days into an existing Zarr store (replacing days already there,
+#    appending later ones).
+#
+#    Zarr output needs zarr>=3 (zarr.codecs) and numcodecs, with an xarray that
+#    supports zarr-python 3 (2025.1 or later). environment.yml pins an older
+#    xarray and neither zarr package, so install them before writing Zarr:
+#        conda install -c conda-forge "zarr>=3" numcodecs "xarray>=2025.1"
+#
+#################################################################################
+
+
+#### Dependencies
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+#### Settings
+
+# Chunk sizes for each layout (-1 = whole dimension)
+LAYOUTS = {'space': dict(time=24, latitude=512, longitude=512),
+           'time': dict(time=-1, latitude=16, longitude=16)}
+
+# Physical ranges used for int16 packing (units of the stored variable)
+PACK_RANGES = {'tw': (-60., 60.),    # °C
+               'hi': (-60., 110.),   # °C or °F
+               'wbgt': (-60., 60.)}  # °C
+
+#### Functions
+def layout_chunks(ds, layout):
+    "Chunk sizes for the dims of ds for a named layout ('space' or 'time') or a dict of sizes"
+    sizes = LAYOUTS[layout] if isinstance(layout, str) else layout
+    chunks = {}
+    for dim, n in ds.sizes.items():
+        c = sizes.get(dim, -1)
+        chunks[dim] = n if c == -1 else min(c, n)
+
+    return chunks
+
+def pack_params(name, vrange=None):
+    """Scale factor and offset to pack a variable into int16, keeping -32768 as the fill value.
+    The precision is (vmax - vmin) / 65534, e.g. 0.002 °C for tw"""
+    if vrange is None:
+        if name.lower() not in PACK_RANGES:
+            raise ValueError('no packing range for ' + name + ', pass vrange=(vmin, vmax)')
+        vrange = PACK_RANGES[name.lower()]
+    vmin, vmax = vrange
+    scale = (vmax - vmin) / 65534.
+    offset = (vmax + vmin) / 2.
+
+    return scale, offset
+
+def _zarr_compressors(compression, level):
+    "Zarr (v3) codecs for a compression name"
+    import zarr
+    if compression is None:
+        return None
+    if compression == 'zstd':
+        return (zarr.codecs.ZstdCodec(level=level),)
+    if compression == 'blosc':
+        return (zarr.codecs.BloscCodec(cname='zstd', clevel=level, shuffle='shuffle'),)
+    raise ValueError("compression must be one of 'zstd', 'blosc', or None for zarr")
+
+def _netcdf_compression(compression, level):
+    "NetCDF4 encoding for a compression name"
+    if compression is None:
+        return {}
+    if compression == 'zlib':
+        return dict(zlib=True, complevel=level, shuffle=True)
+    if compression == 'zstd':
+        return dict(compression='zstd', complevel=level, shuffle=True)
+    if compression == 'blosc':
+        return dict(compression='blosc_zstd', complevel=level, shuffle=True)
+    raise ValueError("compression must be one of 'zlib', 'zstd', 'blosc', or None for netcdf")
+
+def make_encoding(ds, fmt, layout='space', compression='zstd', level=3, packing=None, vranges=None):
+    """ Encoding for each data variable in ds.
+        Args:
+            ds = xarray dataset to write
+            fmt = 'zarr' or 'netcdf'
+            layout = chunk layout, 'space', 'time', or a dict of chunk sizes
+            compression = 'zstd', 'blosc', 'zlib' (netcdf only) or None
+            level = compression level
+            packing = None, 'int16' (scale/offset packing) or 'float16' (zarr only)
+            vranges = dict of (vmin, vmax) by variable name for int16 packing (defaults PACK_RANGES)
+    """
+    if fmt not in ('zarr', 'netcdf'):
+        raise ValueError("fmt must be 'zarr' or 'netcdf'")
+    if packing not in (None, 'int16', 'float16'):
+        raise ValueError("packing must be None, 'int16', or 'float16'")
+    if packing == 'float16' and fmt == 'netcdf':
+        raise ValueError('NetCDF has no float16 type, use int16 packing instead')
+    vranges = {} if vranges is None else vranges
+
+    chunks = layout_chunks(ds, layout)
+    encoding = {}
+    for name, da in ds.data_vars.items():
+        enc = {}
+        var_chunks = tuple(chunks[d] for d in da.dims)
+        if fmt == 'zarr':
+            enc['chunks'] = var_chunks
+            enc['compressors'] = _zarr_compressors(compression, level)
+        else:
+            enc['chunksizes'] = var_chunks
+            enc.update(_netcdf_compression(compression, level))
+
+        if packing == 'int16':
+            scale, offset = pack_params(name, vranges.get(name))
+            enc.update(dtype='int16', scale_factor=scale, add_offset=offset, _FillValue=-32768)
+        elif packing == 'float16':
+            enc.update(dtype='float16')
+        encoding[name] = enc
+
+    return encoding
+
+def write(ds, path, fmt='zarr', layout='space', compression='zstd', level=3, packing=None,
+          vranges=None, compute=True):
+    """ Write ds to a Zarr store or NetCDF4 file with the given chunk layout, compression and packing
+        (see make_encoding). Dask chunks are aligned to the storage chunks first. With compute=False
+        returns a dask delayed object"""
+    chunks = layout_chunks(ds, layout)
+    ds = ds.chunk(chunks)
+    encoding = make_encoding(ds, fmt, layout, compression, level, packing, vranges)
+    if fmt == 'zarr':
+        return ds.to_zarr(path, mode='w', encoding=encoding, compute=compute)
+
+    return ds.to_netcdf(path, engine='netcdf4', encoding=encoding, compute=compute)
+
+def open_store(path, chunks={}):
+    "Open a Zarr store, a NetCDF file, or a directory of NetCDF block files (from hourly_tw.py) lazily"
+    if path.rstrip('/').endswith('.zarr'):
+        return xr.open_zarr(path, chunks=chunks)
+    if os.path.isdir(path):
+        return xr.open_mfdataset(os.path.join(path, '*.nc'), chunks=chunks)
+
+    return xr.open_dataset(path, chunks=chunks)
+
+def rechunk(src, dst, layout='time', fmt='zarr', compression='zstd', level=3, packing=None,
+            vranges=None):
+    """ Copy the store at src to dst with a new chunk layout, e.g. spatial tiles -> time-contiguous
+        for point extraction. Packed variables are unpacked on read and repacked on write"""
+    ds = open_store(src)
+    for name in ds.data_vars:
+        ds[name].encoding = {}
+
+    write(ds, dst, fmt=fmt, layout=layout, compression=compression, level=level,
+          packing=packing, vranges=vranges)
+    ds.close()
+
+def store_size(path):
+    "Size on disk of a file or directory store in bytes"
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+
+    return total
+
+def day_checksums(ds, variables, time='time', days=None):
+    """ sha1 of the hourly values (and timestamps) of variables for each day of ds, read one day at a
+    time, as a dict of 'YYYY-MM-DD' -> hex digest. days = only these 'YYYY-MM-DD' days"""
+    labels = pd.DatetimeIndex(ds[time].values).strftime('%Y-%m-%d')
+    sums = {}
+    for day in pd.unique(labels):
+        if days is not None and day not in days:
+            continue
+        pos = np.flatnonzero(labels == day)
+        block = ds.isel({time: slice(pos[0], pos[-1] + 1)})
+        h = hashlib.sha1(block[time].values.tobytes())
+        for name in variables:
+            h.update(np.ascontiguousarray(block[name].values).tobytes())
+        sums[day] = h.hexdigest()
+
+    return sums
+
+def read_checksums(fn):
+    "Day checksums saved by write_checksums, or {} if there are none"
+    if not os.path.exists(fn):
+        return {}
+    with open(fn) as f:
+        return json.load(f)
+
+def write_checksums(fn, sums):
+    "Save day checksums, replacing the file in one step so a crash never leaves it half written"
+    with open(fn + '.tmp', 'w') as f:
+        json.dump(dict(sorted(sums.items())), f, indent=0)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(fn + '.tmp', fn)
+
+def store_times(path, time='time'):
+    "Time coordinate of an existing Zarr store, or None if there is no store"
+    if not os.path.exists(path):
+        return None
+    with xr.open_zarr(path) as ds:
+        return ds[time].values
+
+def store_chunks(path, time='time'):
+    "Zarr chunk size of each dim of the variables with a time dim in an existing Zarr store"
+    with xr.open_zarr(path) as ds:
+        chunks = {}
+        for da in ds.data_vars.values():
+            if time in da.dims:
+                chunks.update(da.encoding['preferred_chunks'])
+
+    return chunks
+
+def _time_pieces(start, n, chunk):
+    """ Split n timestamps written from store position start at the store's time chunk boundaries,
+    into a partial leading chunk, whole chunks, and a partial trailing chunk (each may be empty)"""
+    head = min(-start % chunk, n)
+    tail = (n - head) % chunk
+    bounds = (0, head, n - tail, n)
+
+    return [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+def write_pieces(ds, path, start, chunks=None, time='time', **kwargs):
+    """ Write ds into an existing Zarr store from time position start, split at the store's time chunk
+        boundaries (see _time_pieces) so no zarr chunk is written by two tasks: whole chunks lazily
+        with dask chunks matching the store's, partial chunks from memory (at most one time chunk).
+        Args:
+            ds = dataset with a time dim, without the coords that have no time dim (already in the store)
+            path = Zarr store
+            start = position of the first time of ds in the store's time dim
+            chunks = chunk size of each dim in the store (default is store_chunks(path))
+            time = name of the time dim
+            **kwargs = passed to to_zarr, e.g. append_dim=time to append (start is then the store length)
+    """
+    if chunks is None:
+        chunks = store_chunks(path, time)
+    for piece in _time_pieces(start, ds.sizes[time], chunks[time]):
+        part = ds.isel({time: piece})
+        if piece.stop - piece.start < chunks[time]:
+            part = part.load()
+        else:
+            part = part.chunk({dim: c for dim, c in chunks.items() if dim in part.dims})
+        if 'append_dim' in kwargs:
+            part.to_zarr(path, **kwargs)
+        else:
+            part.to_zarr(path, region={time: slice(start + piece.start, start + piece.stop)}, **kwargs)
+
+def upsert(ds, path, time='time', encoding=None):
+    """ Write ds into the Zarr store at path by time: timestamps already in the store are overwritten
+        in place, later ones are appended, and the store is created (with encoding) if it does not
+        exist. Existing timestamps must be contiguous in the store and new ones later than its end.
+        Data is written in the store's time chunks, so only about one chunk per task is in memory.
+        Returns (number of timestamps updated, number appended)"""
+    times = store_times(path, time)
+    if times is None:
+        chunks = {}
+        for name, enc in (encoding or {}).items():
+            if 'chunks' in enc:
+                chunks.update(zip(ds[name].dims, enc['chunks']))
+        ds.chunk(chunks).to_zarr(path, mode='w', encoding=encoding)
+        return 0, ds.sizes[time]
+
+    new = ds[time].values
+    pos = np.searchsorted(times, new)
+    found = (pos < len(times)) & (times[np.minimum(pos, len(times) - 1)] == new)
+    if np.any(found[1:] & ~found[:-1]) or (np.any(~found) and new[~found].min() <= times[-1]):
+        raise ValueError('new timestamps must come after the end of ' + path)
+
+    n_found = int(found.sum())
+    chunks = store_chunks(path, time)
+    static = [v for v in ds.coords if time not in ds[v].dims]
+    ds = ds.drop_vars(static)
+    if n_found:
+        if not np.array_equal(times[int(pos[0]):int(pos[0]) + n_found], new[:n_found]):
+            raise ValueError('timestamps to update are not contiguous in ' + path)
+        write_pieces(ds.isel({time: slice(0, n_found)}), path, int(pos[0]), chunks, time)
+    if n_found < len(new):
+        write_pieces(ds.isel({time: slice(n_found, None)}), path, len(times), chunks, time,
+                      append_dim=time)
+
+    return n_found, len(new) - n_found
@@ -0,0 +1,365 @@
+"""
+On-disk cache of the results of the expensive functions in atmos.thermo and
+atmos.moisture (wet-bulb and saturation-point temperatures, moist adiabats),
+so that rerunning an analysis on the same ERA5 data reads the results back
+instead of recomputing them.
+
+Results are content-addressed: the key is a hash of the function name, the
+bytes, dtype and shape of every array argument, every other argument (e.g.
+phase, pseudo_method, converged, with defaults filled in), and the source
+code of the atmos package, so changing the inputs, the options, or the code
+gives a new key. Each result is stored as an .npz file, written atomically,
+and the store is kept below a size cap by deleting the least recently used
+results. Dask inputs are cached block by block, so a recomputed graph reads
+back every block whose inputs are unchanged.
+
+Example:
+    from atmos import cache, thermo
+    cache.enable('/scratch/atmos-cache', max_bytes=20e9)
+    Tw = thermo.adiabatic_wet_bulb_temperature(p, T, q)  # computed, stored
+    Tw = thermo.adiabatic_wet_bulb_temperature(p, T, q)  # read from disk
+    cache.disable()
+
+While enabled, the cached functions replace those in atmos.thermo and
+atmos.moisture, so code that calls them (including ds.atmos.wet_bulb) is
+cached without changes. Calls with out or work arrays are not cached.
+
+"""
+
+import functools
+import glob
+import hashlib
+import inspect
+import os
+import threading
+import numpy as np
+from atmos import thermo, moisture
+
+# Functions cached by enable() (by module)
+CACHED = {
+    thermo: ('adiabatic_wet_bulb_temperature',
+             'isobaric_wet_bulb_temperature',
+             'saturation_point_temperature',
+             'lifting_saturation_level',
+             'follow_moist_adiabat',
+             'wet_bulb_temperature',
+             'wet_bulb_potential_temperature',
+             'saturation_wet_bulb_potential_temperature',
+             'equivalent_potential_temperature'),
+    moisture: ('saturation_point_temperature_from_specific_humidity',
+               'saturation_point_temperature_from_mixing_ratio',
+               'saturation_point_temperature_from_vapour_pressure',
+               'saturation_point_temperature_from_relative_humidity',
+               'saturation_point_temperature_from_dewpoint_temperature',
+               'saturation_point_temperature_from_frost_point_temperature')
+}
+
+_STORE = None
+_ORIGINAL = {}
+_CODE_VERSION = None
+_state = threading.local()
+
+
+def code_version():
+    """
+    Returns a hash of the atmos source code and tables (and the NumPy
+    version), so that results cached by different code are not reused.
+
+    """
+    global _CODE_VERSION
+    if _CODE_VERSION is None:
+        h = hashlib.sha1(np.__version__.encode())
+        folder = os.path.dirname(os.path.abspath(__file__))
+        for fn in sorted(glob.glob(os.path.join(folder, '*.py')) +
+                         glob.glob(os.path.join(folder, '*.npz'))):
+            with open(fn, 'rb') as f:
+                h.update(os.path.basename(fn).encode() + f.read())
+        _CODE_VERSION = h.hexdigest()
+
+    return _CODE_VERSION
+
+
+def _hash_value(h, x):
+    """
+    Adds an argument to a hash. Raises TypeError for arguments that cannot
+    be hashed by value.
+
+    """
+    if isinstance(x, np.ndarray) or isinstance(x, np.generic):
+        x = np.asarray(x)
+        h.update(f'array{x.dtype.str}{x.shape}'.encode())
+        h.update(np.ascontiguousarray(x).view(np.uint8).data)
+    elif x is None or isinstance(x, (bool, int, float, complex, str)):
+        h.update(f'{type(x).__name__}:{x!r};'.encode())
+    elif isinstance(x, (tuple, list)):
+        h.update(f'{type(x).__name__}{len(x)}('.encode())
+        for item in x:
+            _hash_value(h, item)
+        h.update(b')')
+    else:
+        raise TypeError(f'cannot hash argument of type {type(x).__name__}')
+
+
+def result_key(func, args, kwargs):
+    """
+    Returns the cache key for a call: a hash of the function, its arguments
+    (with defaults filled in), and the atmos code version.
+
+    Args:
+        func (callable): function
+        args (tuple): positional arguments
+        kwargs (dict): keyword arguments
+
+    Returns:
+        key (str): hex digest
+
+    """
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f'{func.__module__}.{func.__name__}:{code_version()};'.encode())
+    for name, value in bound.arguments.items():
+        h.update(name.encode() + b'=')
+        _hash_value(h, value)
+
+    return h.hexdigest()
+
+
+class ResultStore:
+    """
+    Directory of cached results with a size cap. Results are .npz files
+    named by their key; reading a result marks it as recently used, and
+    the least recently used results are deleted when the cap is exceeded.
+    Writes are atomic, so several processes can share a store.
+
+    Args:
+        directory (str): directory of the store (created if needed)
+        max_bytes (float, optional): size cap (default is 4 GiB)
+
+    """
+
+    def __init__(self, directory, max_bytes=4 * 2**30):
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self.size = sum(size for _, size, _ in self._entries())
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.npz')
+
+    def _entries(self):
+        """
+        Returns (path, size, last use) for every stored result.
+
+        """
+        entries = []
+        for fn in glob.glob(os.path.join(self.directory, '*', '*.npz')):
+            try:
+                st = os.stat(fn)
+            except FileNotFoundError:  # evicted by another process
+                continue
+            entries.append((fn, st.st_size, st.st_mtime))
+
+        return entries
+
+    def get(self, key):
+        """
+        Returns the stored result for a key (array or tuple of arrays), or
+        None if there is none.
+
+        """
+        fn = self._path(key)
+        try:
+            with np.load(fn) as f:
+                arrays = [f[f'arr_{i}'] for i in range(len(f.files) - 1)]
+                is_tuple = bool(f['is_tuple'])
+            os.utime(fn)  # mark as recently used
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        arrays = [a[()] if a.ndim == 0 else a for a in arrays]
+
+        return tuple(arrays) if is_tuple else arrays[0]
+
+    def put(self, key, result):
+        """
+        Stores a result (array or tuple of arrays) under a key, then
+        evicts least recently used results if the store is over its cap.
+
+        """
+        is_tuple = isinstance(result, tuple)
+        arrays = result if is_tuple else (result,)
+        fn = self._path(key)
+        os.makedirs(os.path.dirname(fn), exist_ok=True)
+        tmp = f'{fn}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, *arrays, is_tuple=is_tuple)
+        os.replace(tmp, fn)
+        self.size += os.path.getsize(fn)
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def evict(self, max_bytes=None):
+        """
+        Deletes least recently used results until the store is at most
+        max_bytes (default is the cap).
+
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        self.size = sum(size for _, size, _ in entries)
+        for fn, size, _ in entries:
+            if self.size <= max_bytes:
+                break
+            try:
+                os.remove(fn)
+            except FileNotFoundError:
+                pass
+            self.size -= size
+
+    def clear(self):
+        """
+        Deletes every stored result.
+
+        """
+        self.evict(0)
+
+
+def _n_outputs(func):
+    """
+    Returns the number of arrays a function returns.
+
+    """
+    from atmos.xarray import MULTIPLE_OUTPUTS
+    return MULTIPLE_OUTPUTS.get(func.__name__, 1)
+
+
+def _apply_xarray(wrapper, nout, *args, **kwargs):
+    """
+    Applies a cached function to the data of xarray arguments (block by
+    block for dask-backed data) and returns xarray objects, as the uncached
+    function does.
+
+    """
+    import xarray as xr
+
+    names = [k for k, v in kwargs.items() if thermo._is_xarray(v)]
+    static = {k: v for k, v in kwargs.items() if k not in names}
+
+    def inner(*data):
+        return wrapper(*data[:len(args)], **static,
+                       **dict(zip(names, data[len(args):])))
+
+    return xr.apply_ufunc(inner, *args, *[kwargs[k] for k in names],
+                          dask='allowed', output_core_dims=[[]] * nout)
+
+
+def cached(func, store):
+    """
+    Returns a version of a thermo or moisture function that reads its
+    results from (and writes them to) a ResultStore. Dask array inputs are
+    cached block by block, and xarray inputs give xarray outputs as they do
+    without the cache. Calls with out or work arrays, arguments that cannot
+    be hashed, calls made inside another cached function, dask inputs to
+    functions with several outputs, and xarray or dask inputs with
+    return_iterations are computed as normal.
+
+    Args:
+        func (callable): function
+        store (ResultStore): store
+
+    Returns:
+        wrapper (callable): cached function
+
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if getattr(_state, 'active', False) or \
+                kwargs.get('out') is not None or kwargs.get('work') is not None:
+            return func(*args, **kwargs)
+        nout = _n_outputs(func)
+        if thermo._is_xarray(*args, *kwargs.values()):
+            if kwargs.get('return_iterations'):
+                return func(*args, **kwargs)
+            return _apply_xarray(wrapper, nout, *args, **kwargs)
+        if thermo._is_lazy(*args, *kwargs.values()):
+            if nout > 1 or kwargs.get('return_iterations'):
+                return func(*args, **kwargs)
+            return thermo._map_blocks(wrapper, *args, **kwargs)
+
+        try:
+            key = result_key(func, args, kwargs)
+        except TypeError:
+            return func(*args, **kwargs)
+        result = store.get(key)
+        if result is None:
+            _state.active = True
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                _state.active = False
+            store.put(key, result)
+
+        return result
+
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def enable(directory=None, max_bytes=4 * 2**30, names=None):
+    """
+    Replaces the expensive thermo and moisture functions with cached
+    versions.
+
+    Args:
+        directory (str, optional): cache directory (default is
+            $ATMOS_CACHE_DIR, or ~/.cache/atmos)
+        max_bytes (float, optional): size cap (default is 4 GiB)
+        names (list, optional): names of the thermo/moisture functions to
+            cache (default is all those in CACHED)
+
+    Returns:
+        store (ResultStore): the store (e.g. for store.hits, store.clear())
+
+    """
+    global _STORE
+    disable()
+    if directory is None:
+        directory = os.environ.get('ATMOS_CACHE_DIR',
+                                   os.path.join('~', '.cache', 'atmos'))
+    _STORE = ResultStore(directory, max_bytes)
+
+    if names is None:
+        targets = [(module, name) for module, module_names in CACHED.items()
+                   for name in module_names]
+    else:
+        targets = []
+        for name in names:
+            module = next((m for m in (thermo, moisture)
+                           if callable(getattr(m, name, None))), None)
+            if module is None:
+                raise ValueError(f'atmos.thermo and atmos.moisture have no '
+                                 f'function {name!r}')
+            targets.append((module, name))
+
+    for module, name in targets:
+        _ORIGINAL[module, name] = getattr(module, name)
+        setattr(module, name, cached(_ORIGINAL[module, name], _STORE))
+
+    return _STORE
+
+
+def disable():
+    """
+    Restores the uncached thermo and moisture functions.
+
+    """
+    global _STORE
+    for (module, name), func in _ORIGINAL.items():
+        setattr(module, name, func)
+    _ORIGINAL.clear()
+    _STORE = None
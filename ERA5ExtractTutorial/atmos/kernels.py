@@ -0,0 +1,375 @@
+"""
+Fused Numba kernels for the following thermodynamic variables:
+* adiabatic wet-bulb temperature, Tw (liquid phase)
+* wet-bulb potential temperature, thetaw (liquid phase)
+* parcel temperature following a pseudoadiabat (liquid, ice, or mixed phase)
+
+The wet-bulb kernels evaluate the lifting condensation level (LCL) and the
+pseudoadiabat polynomial fits for a single element at a time, so that no
+intermediate arrays are created. The results match those obtained by chaining
+thermo.lifting_condensation_level and pseudoadiabat.wbpt/pseudoadiabat.temp
+to within round-off. Single-precision inputs give single-precision outputs,
+but the arithmetic is carried out in double precision.
+
+The pseudoadiabat integrator uses the same pressure increments and implicit
+layer-mean scheme as the iterative method in thermo.follow_moist_adiabat, but
+integrates each parcel independently (and in parallel), without array copies.
+Dask arrays are integrated lazily, block by block, and xarray inputs give
+xarray outputs, as for the polynomial fits and bicubic tables.
+
+References:
+* Romps, D. M., 2017: Exact expression for the lifting condensation level.
+    J. Atmos. Sci., 74, 3033-3057, https://doi.org/10.1175/JAS-D-17-0102.1.
+
+"""
+
+from functools import partial
+import numpy as np
+from numba import njit, prange, vectorize
+from atmos.constant import (Rd, Rv, eps, cpd, cpv, cpl, cpi, p_ref, T0, es0,
+                            Lv0, Ls0, T_liq, T_ice)
+from atmos.lambertw import lambertw_m1
+import atmos.pseudoadiabat as pseudoadiabat
+
+
+@njit(cache=True)
+def _lifting_condensation_level(p, T, q):
+    """
+    Computes pressure and temperature at the LCL for a single element
+    (cf. thermo.lifting_condensation_level).
+
+    Args:
+        p: pressure (Pa)
+        T: temperature (K)
+        q: specific humidity (kg/kg)
+
+    Returns:
+        p_lcl: pressure at the LCL (Pa)
+        T_lcl: temperature at the LCL (K)
+
+    """
+
+    # Compute effective gas constant and specific heat
+    Rm = (1 - q) * Rd + q * Rv
+    cpm = (1 - q) * cpd + q * cpv
+
+    # Compute relative humidity with respect to liquid water
+    e = p * q / (eps * (1 - q) + q)
+    Lv = Lv0 + (cpv - cpl) * (T - T0)
+    es = es0 * (T0 / T) ** ((cpl - cpv) / Rv) * \
+        np.exp((Lv0 / (Rv * T0)) - (Lv / (Rv * T)))
+    RH = e / es
+
+    # Set constants (Romps 2017, Eq. 22d-f)
+    a = cpm / Rm + (cpl - cpv) / Rv
+    b = -(Lv0 + (cpl - cpv) * T0) / (Rv * T)
+    c = b / a
+
+    # Compute temperature at the LCL (Romps 2017, Eq. 22a)
+    fn = RH ** (1 / a) * c * np.exp(c)
+    W = lambertw_m1(fn)
+    T_lcl = c * (1 / W) * T
+
+    # Compute pressure at the LCL (Romps 2017, Eq. 22b)
+    p_lcl = p * (T_lcl / T) ** (cpm / Rm)
+
+    # Ensure that LCL temperature and pressure do not exceed initial values
+    return min(p_lcl, p), min(T_lcl, T)
+
+
+@vectorize(['float32(float32, float32, float32)',
+            'float64(float64, float64, float64)'], nopython=True, cache=True)
+def wet_bulb_potential_temperature(p, T, q):
+    """
+    Computes liquid-phase wet-bulb potential temperature in a single pass.
+
+    Args:
+        p: pressure (Pa)
+        T: temperature (K)
+        q: specific humidity (kg/kg)
+
+    Returns:
+        thetaw: wet-bulb potential temperature (K)
+
+    """
+
+    p_lcl, T_lcl = _lifting_condensation_level(p, T, q)
+    thw = pseudoadiabat.wbpt(p_lcl, T_lcl)
+
+    return pseudoadiabat.temp(p_ref, thw)
+
+
+@vectorize(['float32(float32, float32, float32)',
+            'float64(float64, float64, float64)'], nopython=True, cache=True)
+def adiabatic_wet_bulb_temperature(p, T, q):
+    """
+    Computes liquid-phase adiabatic wet-bulb temperature in a single pass.
+
+    Args:
+        p: pressure (Pa)
+        T: temperature (K)
+        q: specific humidity (kg/kg)
+
+    Returns:
+        Tw: adiabatic wet-bulb temperature (K)
+
+    """
+
+    p_lcl, T_lcl = _lifting_condensation_level(p, T, q)
+    thw = pseudoadiabat.wbpt(p_lcl, T_lcl)
+
+    return pseudoadiabat.temp(p, thw)
+
+
+# Integer codes for the condensed water phase used by the compiled kernels
+PHASES = {'liquid': 0, 'ice': 1, 'mixed': 2}
+
+
+@njit(cache=True)
+def _ice_fraction(Tstar, phase):
+    """
+    Computes ice fraction for a single element (cf. thermo.ice_fraction).
+
+    Args:
+        Tstar: temperature at saturation (K)
+        phase: condensed water phase code (0 = liquid, 1 = ice, 2 = mixed)
+
+    Returns:
+        omega: ice fraction
+
+    """
+
+    if phase == 0:
+        return 0.0
+    if phase == 1:
+        return 1.0
+    if Tstar >= T_liq:
+        return 0.0
+    if Tstar <= T_ice:
+        return 1.0
+
+    return 0.5 * (1 - np.cos(np.pi * ((T_liq - Tstar) / (T_liq - T_ice))))
+
+
+@njit(cache=True)
+def _ice_fraction_derivative(Tstar, phase):
+    """
+    Computes derivative of ice fraction with respect to temperature at
+    saturation for a single element (cf. thermo.ice_fraction_derivative).
+
+    Args:
+        Tstar: temperature at saturation (K)
+        phase: condensed water phase code (0 = liquid, 1 = ice, 2 = mixed)
+
+    Returns:
+        domega_dTstar: derivative of ice fraction (K^-1)
+
+    """
+
+    if phase != 2 or Tstar <= T_ice or Tstar >= T_liq:
+        return 0.0
+
+    return -0.5 * (np.pi / (T_liq - T_ice)) * \
+        np.sin(np.pi * ((T_liq - Tstar) / (T_liq - T_ice)))
+
+
+@njit(cache=True)
+def _saturation_vapour_pressure(T, omega):
+    """
+    Computes mixed-phase saturation vapour pressure for a single element
+    (cf. thermo.saturation_vapour_pressure). Setting omega to 0 or 1 gives
+    the SVP over liquid water or ice, respectively.
+
+    Args:
+        T: temperature (K)
+        omega: ice fraction
+
+    Returns:
+        es: saturation vapour pressure (Pa)
+
+    """
+
+    cpx = (1 - omega) * cpl + omega * cpi
+    Lx0 = (1 - omega) * Lv0 + omega * Ls0
+    Lx = Lx0 - (cpx - cpv) * (T - T0)
+
+    return es0 * (T0 / T) ** ((cpx - cpv) / Rv) * \
+        np.exp((Lx0 / (Rv * T0)) - (Lx / (Rv * T)))
+
+
+@njit(cache=True)
+def _pseudoadiabatic_lapse_rate(p, T, phase):
+    """
+    Computes pseudoadiabatic lapse rate in pressure coordinates for a single
+    element (cf. thermo.pseudoadiabatic_lapse_rate).
+
+    Args:
+        p: pressure (Pa)
+        T: temperature (K)
+        phase: condensed water phase code (0 = liquid, 1 = ice, 2 = mixed)
+
+    Returns:
+        dT_dp: pseudoadiabatic lapse rate (K/Pa)
+
+    """
+
+    # Compute saturation specific humidity and Q term
+    omega = _ice_fraction(T, phase)
+    es = _saturation_vapour_pressure(T, omega)
+    qs = eps * es / (p - (1 - eps) * es)
+    Q = qs * (1 - qs + qs / eps)
+
+    # Compute the effective gas constant and specific heat
+    Rm = (1 - qs) * Rd + qs * Rv
+    cpm = (1 - qs) * cpd + qs * cpv
+
+    # Compute the latent heat (Lv, Ls, or Lx depending on omega)
+    cpx = (1 - omega) * cpl + omega * cpi
+    Lx = (1 - omega) * Lv0 + omega * Ls0 + (cpv - cpx) * (T - T0)
+
+    denom = cpm + (Lx**2 * Q) / (Rv * T**2)
+    domega_dT = _ice_fraction_derivative(T, phase)
+    if domega_dT != 0.0:
+        esl = _saturation_vapour_pressure(T, 0.0)
+        esi = _saturation_vapour_pressure(T, 1.0)
+        denom += Lx * Q * np.log(esi / esl) * domega_dT
+
+    return (1 / p) * (Rm * T + Lx * Q) / denom
+
+
+@njit(cache=True)
+def _follow_pseudoadiabat(pi, pf, Ti, phase, pinc, converged):
+    """
+    Computes parcel temperature following a pseudoadiabat for a single
+    parcel (cf. thermo.follow_moist_adiabat with pseudo_method='iterative').
+
+    Args:
+        pi: initial pressure (Pa)
+        pf: final pressure (Pa)
+        Ti: initial temperature (K)
+        phase: condensed water phase code (0 = liquid, 1 = ice, 2 = mixed)
+        pinc: pressure increment (Pa)
+        converged: target precision for level 2 temperature (K)
+
+    Returns:
+        Tf: final temperature (K)
+        niter: total number of iterations
+
+    """
+
+    if not (np.isfinite(pi) and np.isfinite(pf) and np.isfinite(Ti)):
+        return np.nan, 0
+
+    # Set the pressure increment based on whether the parcel is ascending
+    # or descending
+    dp = -abs(pinc) if pf < pi else abs(pinc)
+
+    # Loop over pressure increments
+    p2 = pi
+    T2 = Ti
+    niter = 0
+    while p2 != pf:
+
+        # Set level 1 values
+        p1 = p2
+        T1 = T2
+
+        # Update the pressure at level 2, making sure we haven't overshot
+        # final pressure level
+        p2 = max(p1 + dp, pf) if dp < 0 else min(p1 + dp, pf)
+
+        # Compute the layer-mean pressure and log-pressure increment
+        pbar = np.sqrt(p1 * p2)
+        dlnp = np.log(p2 / p1)
+
+        # Get initial estimate for the temperature at level 2 by following
+        # a dry adiabat (ignoring the contribution of moisture)
+        T2 = T1 + pbar * (Rd * T1 / (cpd * p1)) * dlnp
+
+        # Iterate to get the new temperature at level 2
+        for _ in range(20):
+            Tbar = 0.5 * (T1 + T2)
+            T2_new = T1 + pbar * _pseudoadiabatic_lapse_rate(pbar, Tbar,
+                                                             phase) * dlnp
+            delta = abs(T2_new - T2)
+            T2 = T2_new
+            niter += 1
+            if delta <= converged:
+                break
+
+    return T2, niter
+
+
+@njit(parallel=True, cache=True)
+def _follow_pseudoadiabat_columns(pi, pf, Ti, phase, pinc, converged):
+    """
+    Applies _follow_pseudoadiabat to each element of 1D arrays in parallel.
+
+    """
+
+    Tf = np.empty_like(Ti)
+    niter = np.empty(Ti.size, dtype=np.int64)
+    for i in prange(Ti.size):
+        Tf[i], niter[i] = _follow_pseudoadiabat(pi[i], pf[i], Ti[i], phase,
+                                                pinc, converged)
+
+    return Tf, niter
+
+
+def follow_pseudoadiabat(pi, pf, Ti, phase='liquid', pinc=500.0,
+                         converged=0.001, return_iterations=False):
+    """
+    Computes parcel temperature following a pseudoadiabat using a compiled
+    integrator that processes each parcel independently and in parallel.
+    Dask arrays are integrated lazily, block by block, and xarray inputs give
+    xarray outputs (iteration counts are only available for NumPy inputs).
+
+    Args:
+        pi (float or ndarray): initial pressure (Pa)
+        pf (float or ndarray): final pressure (Pa)
+        Ti (float or ndarray): initial temperature (K)
+        phase (str, optional): condensed water phase (valid options are
+            'liquid', 'ice', or 'mixed'; default is 'liquid')
+        pinc (float, optional): pressure increment (default is 500 Pa = 5 hPa)
+        converged (float, optional): target precision for iterative solution
+            (default is 0.001 K)
+        return_iterations (bool, optional): flag indicating whether to also
+            return the total number of iterations for each element (default
+            is False)
+
+    Returns:
+        Tf (float or ndarray): final temperature (K)
+        niter (int or ndarray): number of iterations (only returned if
+            return_iterations is True)
+
+    """
+
+    from atmos import thermo  # imported here as thermo imports this module
+
+    if phase not in PHASES:
+        raise ValueError("phase must be one of 'liquid', 'ice', or 'mixed'")
+
+    if thermo._is_xarray(pi, pf, Ti) or thermo._is_lazy(pi, pf, Ti):
+        if return_iterations:
+            raise ValueError('return_iterations is only supported for NumPy '
+                             'inputs')
+        func = partial(follow_pseudoadiabat, phase=phase, pinc=pinc,
+                       converged=converged)
+        if thermo._is_xarray(pi, pf, Ti):
+            return thermo._apply_xarray(func, pi, pf, Ti)
+        return thermo._map_blocks(func, pi, pf, Ti)
+
+    # Broadcast the inputs to a common shape and floating-point type
+    shape = np.broadcast_shapes(np.shape(pi), np.shape(pf), np.shape(Ti))
+    dtype = np.result_type(pi, pf, Ti, 1.0)
+    pi = np.broadcast_to(np.asarray(pi, dtype=dtype), shape).ravel()
+    pf = np.broadcast_to(np.asarray(pf, dtype=dtype), shape).ravel()
+    Ti = np.broadcast_to(np.asarray(Ti, dtype=dtype), shape).ravel()
+
+    Tf, niter = _follow_pseudoadiabat_columns(pi, pf, Ti, PHASES[phase],
+                                              float(pinc), float(converged))
+
+    if return_iterations:
+        return Tf.reshape(shape)[()], niter.reshape(shape)[()]
+
+    return Tf.reshape(shape)[()]
@@ -0,0 +1,67 @@
+"""
+Lambert W function (k=-1 branch) for real arguments.
+
+The thermodynamic expressions of Romps (2017, 2021) for the dewpoint,
+frost-point, and saturation-point temperatures and for the lifting
+condensation, deposition, and saturation levels all require the lower real
+branch W_{-1}(x) on [-1/e, 0). This module provides a real-valued Numba ufunc
+for that branch, which avoids the complex128 output of
+scipy.special.lambertw and can be called from other Numba-compiled code.
+
+References:
+* Corless, R. M., G. H. Gonnet, D. E. G. Hare, D. J. Jeffrey, and D. E.
+    Knuth, 1996: On the Lambert W function. Adv. Comput. Math., 5, 329-359,
+    https://doi.org/10.1007/BF02124750.
+* Fritsch, F. N., R. E. Shafer, and W. P. Crowley, 1973: Solution of the
+    transcendental equation we^w = x. Commun. ACM, 16, 123-124,
+    https://doi.org/10.1145/361952.361970.
+
+"""
+
+import numpy as np
+from numba import vectorize
+
+
+@vectorize(['float32(float32)', 'float64(float64)'], nopython=True,
+           cache=True)
+def lambertw_m1(x):
+    """
+    Computes the k=-1 branch of the Lambert W function for real x in
+    [-1/e, 0). Values below -1/e (which arise from small round-off errors or
+    supersaturation) are mapped to the branch point, W = -1. W(0) is -inf and
+    positive values return NaN.
+
+    Args:
+        x: argument
+
+    Returns:
+        w: W_{-1}(x)
+
+    """
+
+    if x > 0.0:
+        return np.nan
+    if x == 0.0:
+        return -np.inf
+    if x <= -np.exp(-1.0):
+        return -1.0
+
+    # Initial guess: series about the branch point (Corless et al. 1996,
+    # Eq. 4.22) or asymptotic expansion about zero (Eq. 4.19)
+    if x < -0.25:
+        s = -np.sqrt(2.0 * (1.0 + np.e * x))
+        w = -1.0 + s - s * s / 3.0 + 11.0 / 72.0 * s * s * s
+    else:
+        L1 = np.log(-x)
+        L2 = np.log(-L1)
+        w = L1 - L2 + L2 / L1
+
+    # Refine using Fritsch iteration (two steps give double precision)
+    for _ in range(2):
+        if w == -1.0:
+            break
+        z = np.log(x / w) - w
+        s = 2.0 * (1.0 + w) * (1.0 + w + 2.0 / 3.0 * z)
+        w = w * (1.0 + z / (1.0 + w) * (s - z) / (s - 2.0 * z))
+
+    return w
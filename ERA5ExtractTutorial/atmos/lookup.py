@@ -0,0 +1,328 @@
+"""
+Lookup tables for the following thermodynamic variables:
+* adiabatic wet-bulb temperature, Tw
+* wet-bulb potential temperature, thetaw
+
+A table is built once from the functions in atmos.thermo on a regular grid of
+pressure, temperature, and dewpoint depression (T - Td), and can then be
+evaluated for any number of points by trilinear or tricubic (Catmull-Rom)
+interpolation. When the table is built, the interpolation error is measured
+at the centre of every grid cell and at random points within every cell
+(the error of cubic interpolation is largest away from the centres, near
+the edges of the grid), and stored alongside the table, so that the error
+bound is known whenever the table is used. The bound is empirical: it is
+the largest error at the sampled points, not a guaranteed maximum. Points
+at which the table returns NaN but atmos.thermo does not (or vice versa),
+for example cells next to a grid node where the polynomial fits are out of
+range, cannot contribute to the bound; they are counted separately and a
+warning is issued if there are any.
+
+Tables are stored as uncompressed .npz files, which can be memory-mapped
+when loaded so that several processes can share a single copy.
+
+Example:
+    table = lookup.build_table('Tw')
+    lookup.save_table(table, 'Tw_liquid.npz')
+    table = lookup.load_table('Tw_liquid.npz', mmap_mode='r')
+    Tw = lookup.evaluate(table, p, T, Td)
+
+"""
+
+import warnings
+import zipfile
+import numpy as np
+from numba import njit, prange
+from atmos import thermo
+from atmos.moisture import specific_humidity_from_dewpoint_temperature
+from atmos.pseudoadiabat_bicubic import _cubic_weights
+
+# Functions that can be tabulated
+VARIABLES = {'Tw': thermo.adiabatic_wet_bulb_temperature,
+             'thetaw': thermo.wet_bulb_potential_temperature}
+
+# Interpolation methods and their integer codes
+METHODS = {'linear': 1, 'cubic': 3}
+
+
+def _exact(variable, p, T, Td, phase, pseudo_method):
+    """
+    Computes the tabulated variable from pressure, temperature, and dewpoint
+    temperature using atmos.thermo.
+
+    """
+    q = specific_humidity_from_dewpoint_temperature(p, Td)
+    return VARIABLES[variable](p, T, q, phase=phase,
+                               pseudo_method=pseudo_method)
+
+
+def build_table(variable, p_range=(45000., 110000., 1000.),
+                T_range=(213.15, 333.15, 1.), D_range=(0., 70., 1.),
+                phase='liquid', pseudo_method='polynomial', method='linear',
+                dtype=np.float32, samples=4, seed=0, verbose=True):
+    """
+    Builds a lookup table for Tw or thetaw as a function of pressure,
+    temperature, and dewpoint depression.
+
+    Args:
+        variable (str): variable to tabulate (valid options are 'Tw' or
+            'thetaw')
+        p_range (tuple, optional): minimum, maximum, and spacing of pressure
+            (default is 450-1100 hPa every 10 hPa) (Pa)
+        T_range (tuple, optional): minimum, maximum, and spacing of
+            temperature (default is -60 to 60 degC every 1 K) (K)
+        D_range (tuple, optional): minimum, maximum, and spacing of dewpoint
+            depression (default is 0 to 70 K every 1 K) (K)
+        phase (str, optional): condensed water phase (valid options are
+            'liquid', 'ice', or 'mixed'; default is 'liquid')
+        pseudo_method (str, optional): method for performing pseudoadiabatic
+            ascent/descent (default is 'polynomial')
+        method (str, optional): interpolation method used to measure the
+            error (valid options are 'linear' or 'cubic'; default is
+            'linear')
+        dtype (dtype, optional): storage type for the table (default is
+            float32)
+        samples (int, optional): number of random points per grid cell at
+            which the error is measured, in addition to the cell centre
+            (default is 4)
+        seed (int, optional): seed for the random points (default is 0)
+        verbose (bool, optional): print the measured error (default is True)
+
+    Returns:
+        table (dict): table values, grid definition, and error statistics
+            (max_error and rms_error are measured at the sampled points
+            where both the table and atmos.thermo are finite; nan_mismatches
+            is the number of sampled points where only one of them is NaN)
+
+    """
+
+    if variable not in VARIABLES:
+        raise ValueError("variable must be one of 'Tw' or 'thetaw'")
+    if method not in METHODS:
+        raise ValueError("method must be one of 'linear' or 'cubic'")
+
+    # Set the grid nodes
+    axes = [np.arange(x0, x1 + dx / 2, dx)
+            for (x0, x1, dx) in (p_range, T_range, D_range)]
+    grid = np.array([[ax[0], ax[1] - ax[0], ax.size] for ax in axes])
+
+    # Compute the variable at the grid nodes
+    p, T, D = np.meshgrid(*axes, indexing='ij')
+    values = _exact(variable, p, T, T - D, phase, pseudo_method)
+    values = values.astype(dtype)
+
+    table = dict(values=values, grid=grid, variable=np.array(variable),
+                 phase=np.array(phase),
+                 pseudo_method=np.array(pseudo_method))
+
+    # Measure the interpolation error at the cell centres (where it is
+    # largest for trilinear interpolation) and at random points within each
+    # cell (tricubic interpolation is least accurate away from the centres)
+    rng = np.random.default_rng(seed)
+    nodes = np.meshgrid(*[ax[:-1] for ax in axes], indexing='ij')
+    max_error = 0.
+    sum_squares = 0.
+    count = 0
+    nan_mismatches = 0
+    for n in range(samples + 1):
+        p, T, D = [x + (0.5 if n == 0 else rng.random(x.shape)) * dx
+                   for x, dx in zip(nodes, grid[:, 1])]
+        ref = _exact(variable, p, T, T - D, phase, pseudo_method)
+        f = evaluate(table, p, T, T - D, method=method)
+        nan_mismatches += np.count_nonzero(np.isnan(f) != np.isnan(ref))
+        err = np.abs(f - ref)
+        if np.any(np.isfinite(err)):
+            max_error = max(max_error, np.nanmax(err))
+        sum_squares += np.nansum(err**2)
+        count += np.count_nonzero(np.isfinite(err))
+    table['method'] = np.array(method)
+    table['max_error'] = np.array(max_error)
+    table['rms_error'] = np.array(np.sqrt(sum_squares / count) if count > 0
+                                  else np.nan)
+    table['nan_mismatches'] = np.array(nan_mismatches)
+    if verbose:
+        print(f"{variable} ({method}): max error {table['max_error']:.4f} K, "
+              f"RMS error {table['rms_error']:.4f} K, {nan_mismatches} NaN "
+              f"mismatches in {count + nan_mismatches} points")
+    if nan_mismatches > 0:
+        warnings.warn(f'the {variable} table and atmos.thermo disagree on '
+                      f'NaN at {nan_mismatches} sampled points, which are '
+                      f'not included in the error bound', stacklevel=2)
+
+    return table
+
+
+def save_table(table, fn):
+    """
+    Saves a lookup table to an uncompressed .npz file.
+
+    Args:
+        table (dict): lookup table returned by build_table
+        fn (str): output file name
+
+    """
+    np.savez(fn, **table)
+
+
+def _memmap_npz_member(fn, key, mode):
+    """
+    Memory-maps an array stored in an uncompressed .npz file.
+
+    """
+    with zipfile.ZipFile(fn) as zf:
+        info = zf.getinfo(key + '.npy')
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f'{fn} is compressed and cannot be memory-mapped')
+        with open(fn, 'rb') as f:
+            # Skip the local file header to reach the .npy data
+            f.seek(info.header_offset + 26)
+            n_name, n_extra = np.frombuffer(f.read(4), dtype='<u2')
+            f.seek(n_name + n_extra, 1)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                header = np.lib.format.read_array_header_1_0(f)
+            else:
+                header = np.lib.format.read_array_header_2_0(f)
+            shape, fortran, dtype = header
+            offset = f.tell()
+
+    return np.memmap(fn, dtype=dtype, mode=mode, offset=offset, shape=shape,
+                     order='F' if fortran else 'C')
+
+
+def load_table(fn, mmap_mode=None):
+    """
+    Loads a lookup table saved by save_table.
+
+    Args:
+        fn (str): input file name
+        mmap_mode (str, optional): if not None, memory-map the table values
+            using the given mode (e.g., 'r'; default is None)
+
+    Returns:
+        table (dict): table values, grid definition, and error statistics
+
+    """
+    with np.load(fn) as f:
+        table = {key: f[key] for key in f.files if key != 'values'}
+        if mmap_mode is None:
+            table['values'] = f['values']
+    if mmap_mode is not None:
+        table['values'] = _memmap_npz_member(fn, 'values', mmap_mode)
+
+    return table
+
+
+@njit(cache=True)
+def _locate(x, x0, dx, n, order):
+    """
+    Returns the index of the first node used for interpolation and the
+    fractional position of x relative to the second (cubic) or first
+    (linear) node. Returns -1 if x is outside the grid.
+
+    """
+    u = (x - x0) / dx
+    if not (u >= 0.0 and u <= n - 1):
+        return -1, 0.0
+    if order == 1:
+        i = min(int(u), n - 2)
+        return i, u - i
+    # For cubic interpolation, shift the stencil inwards at the edges
+    i = min(max(int(u), 1), n - 3)
+    return i - 1, u - i
+
+
+@njit(cache=True)
+def _interpolate(values, grid, p, T, D, order):
+    """
+    Interpolates the table at a single point.
+
+    """
+
+    i, s = _locate(p, grid[0, 0], grid[0, 1], values.shape[0], order)
+    j, t = _locate(T, grid[1, 0], grid[1, 1], values.shape[1], order)
+    k, u = _locate(D, grid[2, 0], grid[2, 1], values.shape[2], order)
+    if i < 0 or j < 0 or k < 0:
+        return np.nan
+
+    if order == 1:
+        wi = (1.0 - s, s)
+        wj = (1.0 - t, t)
+        wk = (1.0 - u, u)
+        f = 0.0
+        for a in range(2):
+            for b in range(2):
+                for c in range(2):
+                    f += wi[a] * wj[b] * wk[c] * values[i + a, j + b, k + c]
+        return f
+
+    wi = _cubic_weights(s)
+    wj = _cubic_weights(t)
+    wk = _cubic_weights(u)
+    f = 0.0
+    for a in range(4):
+        g = 0.0
+        for b in range(4):
+            h = 0.0
+            for c in range(4):
+                h += wk[c] * values[i + a, j + b, k + c]
+            g += wj[b] * h
+        f += wi[a] * g
+
+    return f
+
+
+@njit(parallel=True, cache=True)
+def _interpolate_columns(values, grid, p, T, D, order, out):
+    """
+    Interpolates the table at each element of 1D arrays in parallel.
+
+    """
+    for n in prange(p.size):
+        out[n] = _interpolate(values, grid, p[n], T[n], D[n], order)
+
+
+def evaluate(table, p, T, Td=None, q=None, method=None):
+    """
+    Evaluates a lookup table at the given pressure, temperature, and
+    dewpoint temperature (or specific humidity). Dewpoint temperatures
+    above the temperature are treated as saturated, and values outside the
+    table are set to NaN.
+
+    Args:
+        table (dict): lookup table returned by build_table or load_table
+        p (float or ndarray): pressure (Pa)
+        T (float or ndarray): temperature (K)
+        Td (float or ndarray, optional): dewpoint temperature (K)
+        q (float or ndarray, optional): specific humidity (kg/kg) (only used
+            if Td is None)
+        method (str, optional): interpolation method (valid options are
+            'linear' or 'cubic'; default is the method used to measure the
+            error when the table was built)
+
+    Returns:
+        f (float or ndarray): tabulated variable (K)
+
+    """
+
+    if Td is None:
+        if q is None:
+            raise ValueError('one of Td or q is required')
+        Td = thermo.dewpoint_temperature(p, T, q)
+
+    if method is None:
+        method = str(table.get('method', 'linear'))
+    if method not in METHODS:
+        raise ValueError("method must be one of 'linear' or 'cubic'")
+
+    # Broadcast the inputs to a common shape and floating-point type
+    shape = np.broadcast_shapes(np.shape(p), np.shape(T), np.shape(Td))
+    dtype = np.result_type(p, T, Td, 1.0)
+    p = np.broadcast_to(np.asarray(p, dtype=dtype), shape).ravel()
+    T = np.broadcast_to(np.asarray(T, dtype=dtype), shape).ravel()
+    Td = np.broadcast_to(np.asarray(Td, dtype=dtype), shape).ravel()
+
+    out = np.empty(p.size, dtype=dtype)
+    _interpolate_columns(table['values'], np.asarray(table['grid'], float),
+                         p, T, np.maximum(T - Td, 0), METHODS[method], out)
+
+    return out.reshape(shape)[()]
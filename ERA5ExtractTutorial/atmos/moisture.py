@@ -8,6 +8,8 @@ Functions for converting between the following moisture variables:
 * frost-point temperature, Tf
 * saturation-point temperature, Ts
 
+Results have the floating-point type of the inputs (see atmos.thermo).
+
 """
 
 import numpy as np
@@ -0,0 +1,214 @@
+"""
+Piecewise bicubic approximations for pseudoadiabats.
+
+Alternative to the global polynomial fits in atmos.pseudoadiabat (and the ice
+and mixed-phase equivalents), providing the same two functions:
+* wbpt(p, T): wet-bulb potential temperature of the pseudoadiabat that passes
+    through pressure p and temperature T
+* temp(p, thw): temperature at pressure p on the pseudoadiabat with wet-bulb
+    potential temperature thw
+
+Each function is evaluated by cubic convolution (Catmull-Rom) interpolation
+in a table of reference values on a regular grid, so each evaluation costs 16
+table lookups and a few dozen multiply-adds, independent of the degree of the
+global fits. The tables are generated by
+pseudoadiabat_codegen/pseudoadiabat_codegen.py (with the --bicubic flag) and
+stored as atmos/pseudoadiabat_bicubic_<phase>.npz. The same domain checks are
+applied as for the polynomial fits, with NaN returned outside the tables.
+
+"""
+
+import os
+from functools import lru_cache, partial
+import numpy as np
+from numba import njit, prange
+
+
+@lru_cache(maxsize=None)
+def load_tables(phase):
+    """
+    Loads the interpolation tables for the specified phase.
+
+    Args:
+        phase (str): condensed water phase (valid options are 'liquid',
+            'ice', or 'mixed')
+
+    Returns:
+        tables (dict): table arrays and grid definitions
+
+    """
+
+    if phase not in ('liquid', 'ice', 'mixed'):
+        raise ValueError("phase must be one of 'liquid', 'ice', or 'mixed'")
+
+    fn = os.path.join(os.path.dirname(__file__),
+                      f'pseudoadiabat_bicubic_{phase}.npz')
+    with np.load(fn) as f:
+        tables = {key: f[key] for key in f.files}
+
+    return tables
+
+
+@njit(cache=True)
+def _cubic_weights(t):
+    """
+    Computes Catmull-Rom weights for fractional position t in [0, 1).
+
+    """
+    w0 = ((-0.5 * t + 1.0) * t - 0.5) * t
+    w1 = (1.5 * t - 2.5) * t * t + 1.0
+    w2 = ((-1.5 * t + 2.0) * t + 0.5) * t
+    w3 = (0.5 * t - 0.5) * t * t
+    return w0, w1, w2, w3
+
+
+@njit(cache=True)
+def _column(table, i, j):
+    """
+    Returns table[i, j] for a valid i, extrapolating quadratically for j
+    equal to -1 or to the size of the second table dimension.
+
+    """
+    ny = table.shape[1]
+    if j < 0:
+        return 3 * table[i, 0] - 3 * table[i, 1] + table[i, 2]
+    if j > ny - 1:
+        return 3 * table[i, ny - 1] - 3 * table[i, ny - 2] + table[i, ny - 3]
+    return table[i, j]
+
+
+@njit(cache=True)
+def _node(table, i, j):
+    """
+    Returns table[i, j], extrapolating quadratically for i or j equal to -1
+    or to the table size.
+
+    """
+    nx = table.shape[0]
+    if i < 0:
+        return 3 * _column(table, 0, j) - 3 * _column(table, 1, j) + \
+            _column(table, 2, j)
+    if i > nx - 1:
+        return 3 * _column(table, nx - 1, j) - \
+            3 * _column(table, nx - 2, j) + _column(table, nx - 3, j)
+    return _column(table, i, j)
+
+
+@njit(cache=True)
+def _interpolate(table, x0, dx, y0, dy, x, y):
+    """
+    Interpolates a 2D table at a single point by cubic convolution.
+
+    Args:
+        table: values on the grid x0 + i * dx, y0 + j * dy
+        x0, dx: origin and spacing of the first table dimension
+        y0, dy: origin and spacing of the second table dimension
+        x, y: coordinates of the point
+
+    Returns:
+        f: interpolated value (NaN outside the table)
+
+    """
+
+    nx, ny = table.shape
+    u = (x - x0) / dx
+    v = (y - y0) / dy
+    if not (u >= 0.0 and u <= nx - 1 and v >= 0.0 and v <= ny - 1):
+        return np.nan
+
+    # Locate the tile and compute the weights within it
+    i = min(int(u), nx - 2)
+    j = min(int(v), ny - 2)
+    wu = _cubic_weights(u - i)
+    wv = _cubic_weights(v - j)
+
+    # Sum over the 4 x 4 neighbourhood, using quadratic extrapolation to
+    # supply the missing nodes at the edges of the table
+    f = 0.0
+    for a in range(4):
+        g = 0.0
+        for b in range(4):
+            g += wv[b] * _node(table, i - 1 + a, j - 1 + b)
+        f += wu[a] * g
+
+    return f
+
+
+@njit(parallel=True, cache=True)
+def _interpolate_columns(table, x0, dx, y0, dy, x, y, offset, out):
+    """
+    Interpolates a 2D table at each element of 1D arrays in parallel.
+
+    """
+    for k in prange(x.size):
+        out[k] = _interpolate(table, x0, dx, y0, dy, x[k], y[k] - offset) + \
+            offset
+
+
+def _evaluate(name, p, X, phase):
+    """
+    Evaluates the named table at pressure p and temperature X (K). Dask
+    arrays are evaluated lazily, block by block, and xarray inputs give
+    xarray outputs.
+
+    """
+    from atmos import thermo  # imported here as thermo imports this module
+
+    if thermo._is_xarray(p, X):
+        return thermo._apply_xarray(partial(_evaluate, name), p, X,
+                                    phase=phase)
+    if thermo._is_lazy(p, X):
+        return thermo._map_blocks(partial(_evaluate, name), p, X,
+                                  phase=phase)
+
+    tables = load_tables(phase)
+    grid = tables[name + '_grid']  # p0, dp (hPa), X0, dX (degC)
+
+    shape = np.broadcast_shapes(np.shape(p), np.shape(X))
+    dtype = np.result_type(p, X, 1.0)
+    p_ = np.broadcast_to(np.asarray(p, dtype=dtype), shape).ravel() / 100.
+    X = np.broadcast_to(np.asarray(X, dtype=dtype), shape).ravel()
+    out = np.empty(X.size, dtype=dtype)
+
+    # Tables are stored in degC, so the 273.15 K offset is removed before
+    # and added back after interpolation
+    _interpolate_columns(tables[name], grid[0], grid[1], grid[2], grid[3],
+                         p_, X, 273.15, out)
+
+    return out.reshape(shape)[()]
+
+
+def wbpt(p, T, phase='liquid'):
+    """
+    Computes the wet-bulb potential temperature (WBPT) thw of the
+    pseudoadiabat that passes through pressure p and temperature T.
+
+    Args:
+        p (float or ndarray): pressure (Pa)
+        T (float or ndarray): temperature (K)
+        phase (str, optional): condensed water phase (valid options are
+            'liquid', 'ice', or 'mixed'; default is 'liquid')
+
+    Returns:
+        thw (float or ndarray): wet-bulb potential temperature (K)
+
+    """
+    return _evaluate('wbpt', p, T, phase)
+
+
+def temp(p, thw, phase='liquid'):
+    """
+    Computes the temperature T at pressure p on a pseudoadiabat with
+    wet-bulb potential temperature thw.
+
+    Args:
+        p (float or ndarray): pressure (Pa)
+        thw (float or ndarray): wet-bulb potential temperature (K)
+        phase (str, optional): condensed water phase (valid options are
+            'liquid', 'ice', or 'mixed'; default is 'liquid')
+
+    Returns:
+        T (float or ndarray): temperature (K)
+
+    """
+    return _evaluate('temp', p, thw, phase)
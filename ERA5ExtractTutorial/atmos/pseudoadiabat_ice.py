@@ -0,0 +1,96 @@
+# *** This file is generated by pseudoadiabat_codegen/pseudoadiabat_codegen.py ***
+# *** Please ensure any updates are made in pseudoadiabat_codegen.py           ***
+#
+# Phase: ice
+# wbpt: max error 0.0023 K, RMS error 0.0001 K
+# temp: max error 0.1572 K, RMS error 0.0090 K
+import numpy as np
+from numba import vectorize
+
+# Maximum errors on the validation grid (K)
+WBPT_MAX_ERROR = 0.0023
+TEMP_MAX_ERROR = 0.1572
+
+
+@vectorize(nopython=True, cache=True)
+def wbpt(p, T):
+    """
+    Computes the wet-bulb potential temperature (WBPT) thw of the
+    ice pseudoadiabat that passes through pressure p and temperature T.
+
+    Uses polynomial approximations of the form given by Moisseeva and
+    Stull (2017), fitted using pseudoadiabat_codegen.py.
+
+    Moisseeva, N. and Stull, R., 2017. A noniterative approach to
+        modelling moist thermodynamics. Atmospheric Chemistry and
+        Physics, 17, 15037-15043.
+
+    Args:
+        p: pressure (Pa)
+        T: temperature (K)
+
+    Returns:
+        thw: wet-bulb potential temperature (K)
+
+    """
+
+    # Convert p to hPa and T to degC
+    p_ = p / 100.
+    T_ = T - 273.15
+
+    # Check that values fall in the permitted range
+    if (T_ < -100.0) or (T_ > 50.0) or (p_ > 1100.0) or (p_ < 50.0):
+        # print('T or p outside limits of polynomial fit', T_, p_)
+        return np.nan
+
+    # Compute theta-w using Eq. 4-6 from Moisseeva & Stull 2017
+    x = (p_ - 575.0) / 525.0
+    Tref = -5.866756984581580525e+01 + x*(-5.575591598771670476e+01 + x*(3.211928139883891475e+01 + x*(-2.045095776643787744e+01 + x*(1.150703111128896516e+01 + x*(-1.304960954556963415e+01 + x*(1.237801801266721213e+01 + x*(1.522745391472334973e+02 + x*(-2.757231431424171433e+02 + x*(-9.853422919600682235e+02 + x*(1.782990378692543800e+03 + x*(4.647085852324759799e+03 + x*(-8.392415486791847798e+03 + x*(-1.236542043766849747e+04 + x*(2.384444890477462104e+04 + x*(1.950919623102310652e+04 + x*(-4.127027012600255694e+04 + x*(-1.891901230957937150e+04 + x*(4.449888663824115065e+04 + x*(1.111141211287673832e+04 + x*(-2.938463931277327356e+04 + x*(-3.625448879600274267e+03 + x*(1.092126112619508604e+04 + x*(5.022599120888668267e+02 + x*(-1.754541734618386954e+03))))))))))))))))))))))))  # noqa: E501
+    y = (Tref - -32.66599474810044) / 62.251754647234016
+    z = (T_ - -25.0) / 75.0
+    thw = 1.566853420664052265e+01 + z*(2.977757772458267027e+01 + z*(-2.233639340923417649e+00 + z*(3.520424792429140837e+01 + z*(6.390185884161802221e+00 + z*(4.088704323663442608e+00 + z*(-2.424016684405597744e+01 + z*(-1.765389080072827710e+01 + z*(6.483923574522009403e+00 + z*(-8.175040374241598329e+01 + z*(1.004156564824443194e+02 + z*(7.919581523133929295e+02 + z*(-7.891128645484714070e+02 + z*(-3.962390070009787451e+03 + z*(4.088493624499475118e+03 + z*(1.371740602916773059e+04 + z*(-1.308182496224761417e+04 + z*(-3.528085182593815261e+04 + z*(2.684460981553513557e+04 + z*(6.813726178599207196e+04 + z*(-3.528812806259607896e+04 + z*(-9.686369930863054469e+04 + z*(2.689440567556396127e+04 + z*(9.760878454130701721e+04 + z*(-6.355245936984196305e+03 + z*(-6.562709166395664215e+04 + z*(-7.462182710289955139e+03 + z*(2.631342038846015930e+04 + z*(6.870450310707092285e+03 + z*(-4.748370589733123779e+03 + z*(-1.813277938842773438e+03)))))))))))))))))))))))))))))) + y*(2.168068670557817157e+01 + z*(-2.417247399059361612e+01 + z*(2.943370285529054797e+01 + z*(-1.877729674750328570e+01 + z*(2.572430228874042513e+01 + z*(3.570067772143062257e+00 + z*(-2.882842136915139974e+01 + z*(-1.323058546407083895e+02 + z*(-1.651346069938620076e+02 + z*(1.932586347612712416e+03 + z*(1.937351537447640112e+03 + z*(-1.546541810838578385e+04 + z*(-1.448848211781923601e+04 + z*(8.436839857086821576e+04 + z*(6.974360307133330207e+04 + z*(-3.113067945446048398e+05 + z*(-2.413440835085380240e+05 + z*(7.967524201953576412e+05 + z*(6.173435811647163937e+05 + z*(-1.437916947408723645e+06 + z*(-1.150698692108695861e+06 + z*(1.824526314504859969e+06 + z*(1.524344755566635169e+06 + z*(-1.588916263541005552e+06 + z*(-1.386975594736844301e+06 + z*(9.004204511354267597e+05 + z*(8.192875756239444017e+05 + z*(-2.972867165312767029e+05 + z*(-2.813275344555377960e+05 + z*(4.303394140148162842e+04 + z*(4.232619266462326050e+04)))))))))))))))))))))))))))))) + y*(-1.013483225570744217e+01 + z*(2.170944298576295139e+01 + z*(-2.257981579687834994e+01 + z*(2.955612560804104305e+01 + z*(-1.138827603111218423e+01 + z*(-7.931507525017326543e+01 + z*(3.174852259106210113e+02 + z*(-8.521486140285196598e+02 + z*(-1.310117145126467221e+03 + z*(1.427975263206190175e+04 + z*(-2.068355528943910031e+03 + z*(-1.189829610263777722e+05 + z*(6.723122455667692702e+04 + z*(6.087890555577136111e+05 + z*(-3.711246954821445979e+05 + z*(-2.168169244375975337e+06 + z*(1.057985425945153460e+06 + z*(5.655304981842637062e+06 + z*(-1.706176368240930140e+06 + z*(-1.086281347698782384e+07 + z*(1.190127599359709769e+06 + z*(1.510749698657657579e+07 + z*(9.415584678818136454e+05 + z*(-1.472115817787370086e+07 + z*(-3.052610487154468894e+06 + z*(9.497104468712091446e+06 + z*(3.107606128114938736e+06 + z*(-3.634647570734500885e+06 + z*(-1.547892435634613037e+06 + z*(6.237015851964950562e+05 + z*(3.164324339752197266e+05)))))))))))))))))))))))))))))) + y*(1.176636184993945555e+01 + z*(-2.081185646872551942e+01 + z*(2.399160378214988398e+01 + z*(1.710727058529933231e+01 + z*(-1.261515515975194148e+02 + z*(-8.541942976794825881e+01 + z*(3.390268349223711084e+02 + z*(3.284543787955552034e+03 + z*(3.498657997580516167e+03 + z*(-4.248818062246809131e+04 + z*(-8.314633451960922685e+04 + z*(3.790853829153436236e+05 + z*(6.353952028971450636e+05 + z*(-2.045122369015477598e+06 + z*(-3.000877623905298300e+06 + z*(6.982338051378648728e+06 + z*(1.006701972887815908e+07 + z*(-1.575378951953236014e+07 + z*(-2.440611597463604808e+07 + z*(2.355185957269380987e+07 + z*(4.203629697567250580e+07 + z*(-2.214967441428434849e+07 + z*(-4.997266225077570975e+07 + z*(1.081767027316597104e+07 + z*(3.914879365090826154e+07 + z*(2.619813100486993790e+04 + z*(-1.854251167992752790e+07 + z*(-2.691920892800569534e+06 + z*(4.383053616528511047e+06 + z*(9.234152162475585938e+05 + z*(-2.682143617992401123e+05)))))))))))))))))))))))))))))) + y*(-2.242360720676950692e+00 + z*(1.301961786582434399e+01 + z*(3.818242907351361737e+00 + z*(-1.638255934496981467e+02 + z*(4.666494971670754239e+02 + z*(6.913028170835650599e+02 + z*(-6.636846304595161200e+03 + z*(1.523409209021191782e+04 + z*(4.692536203248810489e+04 + z*(-3.170988157407523831e+05 + z*(-5.155840444694715552e+04 + z*(2.563810379208593629e+06 + z*(-8.283360453558200970e+05 + z*(-1.264240805800134689e+07 + z*(4.422529082984691486e+06 + z*(4.347712096522685885e+07 + z*(-9.083203292983390391e+06 + z*(-1.084551442765340656e+08 + z*(1.991294874426320195e+06 + z*(1.959646092412475049e+08 + z*(3.258232384344074130e+07 + z*(-2.511225484314341545e+08 + z*(-8.178443706547215581e+07 + z*(2.197611188904966712e+08 + z*(1.006967428162533492e+08 + z*(-1.230444909566414356e+08 + z*(-6.997250862793731689e+07 + z*(3.887005805963230133e+07 + z*(2.581003233999633789e+07 + z*(-5.066078705097198486e+06 + z*(-3.818902476989746094e+06)))))))))))))))))))))))))))))) + y*(5.026112860811831951e+00 + z*(2.787959633303401574e+00 + z*(-5.754198455840361248e+01 + z*(-5.387126730090227511e+01 + z*(9.782762769913401826e+02 + z*(9.809401218130678899e+02 + z*(-8.788740309358161539e+03 + z*(-1.848310112495033536e+03 + z*(-5.256375356750521314e+04 + z*(1.708258488674295950e+05 + z*(1.084659400494639995e+06 + z*(-2.120736139555203728e+06 + z*(-7.486900415106400847e+06 + z*(1.118540017975811660e+07 + z*(3.276096991547724605e+07 + z*(-3.226536379809890687e+07 + z*(-1.014742677764140666e+08 + z*(5.106168810760629922e+07 + z*(2.242052637741895914e+08 + z*(-2.671661555401071906e+07 + z*(-3.460044350608339310e+08 + z*(-5.652830226117610931e+07 + z*(3.600066123879511952e+08 + z*(1.327902358811998367e+08 + z*(-2.377752895275201201e+08 + z*(-1.245628259342286587e+08 + z*(8.827802979861843586e+07 + z*(5.772334677431964874e+07 + z*(-1.313949665972518921e+07 + z*(-1.072292504660034180e+07 + z*(-3.809032871322631836e+05)))))))))))))))))))))))))))))) + y*(-4.708319297571961215e-02 + z*(-2.560670002031696413e+01 + z*(5.381179519235888620e+01 + z*(9.989425962492291546e+02 + z*(-3.360244742249909905e+03 + z*(-9.226089124274389178e+03 + z*(7.181260571877376060e+04 + z*(-1.286172005274145049e+05 + z*(-4.703062753842062666e+05 + z*(2.528242655975825619e+06 + z*(6.999474724811863853e+05 + z*(-1.909962660888822749e+07 + z*(4.910009395227224566e+06 + z*(8.950307345143269002e+07 + z*(-2.599930316842778027e+07 + z*(-2.940282987984905243e+08 + z*(4.224577610155119747e+07 + z*(6.990782038911892176e+08 + z*(3.912145472903425992e+07 + z*(-1.196557906359968662e+09 + z*(-2.989920665880200863e+08 + z*(1.439641265967283487e+09 + z*(6.028399852044939995e+08 + z*(-1.168775094626510143e+09 + z*(-6.575521789207172394e+08 + z*(5.971462914596710205e+08 + z*(4.119858473297767639e+08 + z*(-1.679160971612319946e+08 + z*(-1.370018293429870605e+08 + z*(1.863148622300720215e+07 + z*(1.815882811627197266e+07)))))))))))))))))))))))))))))) + y*(-1.427289875800298091e+00 + z*(-1.553014901558765359e+01 + z*(1.955180656604337628e+02 + z*(7.191355296436190656e+02 + z*(-7.762092232352673818e+03 + z*(7.688321701340471918e+03 + z*(3.969368210920423735e+04 + z*(-1.343821566647556610e+05 + z*(4.654675960769308731e+05 + z*(2.508388307576056104e+05 + z*(-6.729860737745542079e+06 + z*(2.458183818798177876e+06 + z*(4.253446347642859817e+07 + z*(-1.034837011847109720e+07 + z*(-1.749937505898841619e+08 + z*(-1.473170144559115171e+07 + z*(5.041918207836743593e+08 + z*(2.112298491481679976e+08 + z*(-1.015344369411770821e+09 + z*(-7.114123652594724894e+08 + z*(1.389583077929701567e+09 + z*(1.305668974954652309e+09 + z*(-1.226716441192405939e+09 + z*(-1.448265439353278160e+09 + z*(6.267162581872532368e+08 + z*(9.594658223099231720e+08 + z*(-1.326134069532141685e+08 + z*(-3.438632770150680542e+08 + z*(-1.371356286779785156e+07 + z*(4.964003630334472656e+07 + z*(6.554707637695312500e+06)))))))))))))))))))))))))))))) + y*(-2.253868372894373806e+00 + z*(8.749587407545931228e+01 + z*(-6.853183809520305658e+01 + z*(-5.166582338036584588e+03 + z*(1.972031527062047098e+04 + z*(3.501487468936606456e+04 + z*(-3.497848029810669832e+05 + z*(5.631562930068669375e+05 + z*(2.130928756532760803e+06 + z*(-9.403015695972513407e+06 + z*(-4.211343404697346501e+06 + z*(6.520808068743441999e+07 + z*(-9.894540088415555656e+06 + z*(-2.835324489141964316e+08 + z*(6.276172257738293707e+07 + z*(8.625889580010265112e+08 + z*(-7.790062285346633196e+07 + z*(-1.889068234810907602e+09 + z*(-2.052664722597712278e+08 + z*(2.958106570581700802e+09 + z*(9.210742758419256210e+08 + z*(-3.232159888217621326e+09 + z*(-1.597167567981186867e+09 + z*(2.371768775857263565e+09 + z*(1.552739088517868519e+09 + z*(-1.104954135011417389e+09 + z*(-8.823757433299255371e+08 + z*(2.994035533844146729e+08 + z*(2.777700503399658203e+08 + z*(-3.870637665960693359e+07 + z*(-3.948478640771484375e+07)))))))))))))))))))))))))))))) + y*(1.334758270449242445e+00 + z*(9.295534538384072221e+01 + z*(-9.388785938719554451e+02 + z*(-2.996642551208242367e+02 + z*(2.199026101248159830e+04 + z*(-5.106092778781807283e+04 + z*(-4.960287356413475936e+04 + z*(5.729591401333105750e+05 + z*(-1.803003640407790663e+06 + z*(-2.291170404357781168e+06 + z*(2.110475504594799876e+07 + z*(6.079008670420458540e+06 + z*(-1.271792193156232536e+08 + z*(-4.161956337654156238e+07 + z*(5.098776337710998058e+08 + z*(2.892137844522932768e+08 + z*(-1.429723400327137470e+09 + z*(-1.163667219295564175e+09 + z*(2.796514701113855362e+09 + z*(2.854032853757066727e+09 + z*(-3.735734625187970161e+09 + z*(-4.470064862963722229e+09 + z*(3.280901573350095749e+09 + z*(4.498517453227531433e+09 + z*(-1.762149576671676636e+09 + z*(-2.814485833341598511e+09 + z*(4.867574209979591370e+08 + z*(9.981613943080444336e+08 + z*(-2.678859655944824219e+07 + z*(-1.546678408713378906e+08 + z*(-1.201941932250976562e+07)))))))))))))))))))))))))))))) + y*(7.239267847456630989e+00 + z*(-2.682457370967954375e+02 + z*(6.877160645364128868e+02 + z*(1.142619467495301433e+04 + z*(-5.608402549691843160e+04 + z*(-5.138579560066811973e+04 + z*(8.465569184579713037e+05 + z*(-1.329625059319849592e+06 + z*(-5.109803581771147437e+06 + z*(1.868588342764298618e+07 + z*(1.365773743201405555e+07 + z*(-1.178524085706630945e+08 + z*(-1.030394487287807465e+07 + z*(4.641843854865528941e+08 + z*(-3.240639420313954353e+06 + z*(-1.252530819154087543e+09 + z*(-1.605424320642852783e+08 + z*(2.357450112643887520e+09 + z*(8.819694364267735481e+08 + z*(-3.019078869917649269e+09 + z*(-2.093301007151751518e+09 + z*(2.455883941074329376e+09 + z*(2.810177267164909363e+09 + z*(-1.063614463094650269e+09 + z*(-2.256263281381137848e+09 + z*(7.275443402778625488e+07 + z*(1.063995020552978516e+09 + z*(1.158302317177124023e+08 + z*(-2.724943858535156250e+08 + z*(-3.056614946948242188e+07 + z*(3.044143570312500000e+07)))))))))))))))))))))))))))))) + y*(-8.462355333530013013e+00 + z*(-8.598951135178776894e+01 + z*(1.569619575869314758e+03 + z*(-2.247434745305461547e+03 + z*(-2.706067703168358275e+04 + z*(9.933462820825543895e+04 + z*(-1.943364129416632932e+04 + z*(-9.421031507309717126e+05 + z*(3.250025814924694598e+06 + z*(4.116742105735305697e+06 + z*(-3.382411289323092252e+07 + z*(-1.537841696544890106e+07 + z*(1.989829609271198511e+08 + z*(9.177146495141297579e+07 + z*(-7.927437541734730005e+08 + z*(-4.972681998155817986e+08 + z*(2.224984021668985367e+09 + z*(1.742797017009223461e+09 + z*(-4.415605836667605400e+09 + z*(-3.912624920886950493e+09 + z*(6.161114825417991638e+09 + z*(5.741161730864628792e+09 + z*(-5.976327115395569801e+09 + z*(-5.507832532282638550e+09 + z*(3.939704154405662537e+09 + z*(3.356358418822677612e+09 + z*(-1.675161765464340210e+09 + z*(-1.196217236656799316e+09 + z*(4.020167916811523438e+08 + z*(1.939715019277343750e+08 + z*(-3.633472352441406250e+07)))))))))))))))))))))))))))))) + y*(-3.534157032334860560e+00 + z*(3.444320515194876862e+02 + z*(-1.499914357199173537e+03 + z*(-1.198991628524183761e+04 + z*(7.746530591777025256e+04 + z*(2.611836655765131582e+04 + z*(-1.076681688627340365e+06 + z*(1.714657971866404638e+06 + z*(6.697175366730261594e+06 + z*(-2.075856012552221864e+07 + z*(-2.293360477980718017e+07 + z*(1.193781336122319996e+08 + z*(5.841122004627120495e+07 + z*(-4.205922342292677164e+08 + z*(-1.925163471930384636e+08 + z*(9.633833149907951355e+08 + z*(7.296097201318159103e+08 + z*(-1.375136268818088293e+09 + z*(-2.023991247479342461e+09 + z*(9.199794854337100983e+08 + z*(3.659369265781949043e+09 + z*(5.088133282247276306e+08 + z*(-4.266798721220710754e+09 + z*(-1.723527659928161621e+09 + z*(3.153617245728099823e+09 + z*(1.637832543377868652e+09 + z*(-1.394574339682617188e+09 + z*(-7.567077135817871094e+08 + z*(3.149656875039062500e+08 + z*(1.458433257744140625e+08 + z*(-2.061862825000000000e+07)))))))))))))))))))))))))))))) + y*(8.193197087136468326e+00 + z*(1.830231746998106246e+01 + z*(-1.080147303511925202e+03 + z*(2.981442356163533987e+03 + z*(1.496509427987471281e+04 + z*(-8.061236119655083166e+04 + z*(7.193235039349310682e+04 + z*(6.883001288433950394e+05 + z*(-2.725783647976494860e+06 + z*(-2.895659861914118752e+06 + z*(2.644937963879673555e+07 + z*(1.033958821993906051e+07 + z*(-1.536682090132175088e+08 + z*(-5.650113164339059591e+07 + z*(6.135580547835390568e+08 + z*(2.854211987413965464e+08 + z*(-1.744076320380401850e+09 + z*(-9.391462117357842922e+08 + z*(3.566130599482985020e+09 + z*(1.968662302360772133e+09 + z*(-5.268698130474854469e+09 + z*(-2.672927385530529022e+09 + z*(5.615319870771734238e+09 + z*(2.347986635161804199e+09 + z*(-4.246078558787551880e+09 + z*(-1.291692420544494629e+09 + z*(2.173121452790557861e+09 + z*(4.044133594245605469e+08 + z*(-6.765194842832031250e+08 + z*(-5.399944608203125000e+07 + z*(9.737274737109375000e+07)))))))))))))))))))))))))))))) + y*(-9.881595207843929529e-01 + z*(-1.990168441222322144e+02 + z*(1.211883964372798800e+03 + z*(6.049154661910986761e+03 + z*(-5.151177104411646724e+04 + z*(4.409674707166152075e+03 + z*(6.922530887370705605e+05 + z*(-1.141463671264652163e+06 + z*(-4.521883197002604604e+06 + z*(1.232224457874041423e+07 + z*(1.867980814752370119e+07 + z*(-6.589239897811001539e+07 + z*(-6.717498595572686195e+07 + z*(2.118304700825614929e+08 + z*(2.538392391268987656e+08 + z*(-4.164296493649506569e+08 + z*(-8.457567878512916565e+08 + z*(4.137159288888244629e+08 + z*(2.070344203649627686e+09 + z*(1.335941369293212891e+08 + z*(-3.512033535226013184e+09 + z*(-1.049357999330810547e+09 + z*(4.062750293606689453e+09 + z*(1.546826138389648438e+09 + z*(-3.138019948831054688e+09 + z*(-1.194271049738281250e+09 + z*(1.538825312890625000e+09 + z*(4.973209948750000000e+08 + z*(-4.274713288593750000e+08 + z*(-8.836973378125000000e+07 + z*(5.005558600000000000e+07)))))))))))))))))))))))))))))) + y*(-2.320366749398090178e+00 + z*(4.473186306990101002e+00 + z*(2.707364863297043485e+02 + z*(-1.077907110824191477e+03 + z*(-3.001200502396968659e+03 + z*(2.372867002236167900e+04 + z*(-3.413584033043717500e+04 + z*(-1.857812989486381412e+05 + z*(8.625063895078469068e+05 + z*(6.840676856064274907e+05 + z*(-8.002212967424768955e+06 + z*(-1.689423596127837896e+06 + z*(4.618300742179852724e+07 + z*(7.102442680845975876e+06 + z*(-1.854825504329646826e+08 + z*(-3.517516641194915771e+07 + z*(5.363702135448806286e+08 + z*(1.059367950829572678e+08 + z*(-1.133897902344987392e+09 + z*(-1.766614773391075134e+08 + z*(1.767859678249691010e+09 + z*(1.426186188095245361e+08 + z*(-2.029821388571998596e+09 + z*(-1.073108230224609375e+06 + z*(1.681867566599304199e+09 + z*(-9.741526540649414062e+07 + z*(-9.556508952625732422e+08 + z*(7.475739910449218750e+07 + z*(3.336520274843750000e+08 + z*(-1.887251020312500000e+07 + z*(-5.385391265625000000e+07)))))))))))))))))))))))))))))) + y*(8.396475161425769329e-01 + z*(4.429218123794998974e+01 + z*(-3.429733469141647220e+02 + z*(-1.187165878900792450e+03 + z*(1.331851543300412595e+04 + z*(-5.600458269290626049e+03 + z*(-1.778866212775856256e+05 + z*(3.078214458444714546e+05 + z*(1.228261166137903929e+06 + z*(-3.076753008092701435e+06 + z*(-5.836682262494921684e+06 + z*(1.586552605880880356e+07 + z*(2.479611505744695663e+07 + z*(-4.973472557110595703e+07 + z*(-9.883906069675445557e+07 + z*(9.759220700197601318e+07 + z*(3.204451630045928955e+08 + z*(-1.100316041188430786e+08 + z*(-7.642131887232360840e+08 + z*(3.632268214938354492e+07 + z*(1.299062695975341797e+09 + z*(8.272045180883789062e+07 + z*(-1.555970327921386719e+09 + z*(-1.363151490156250000e+08 + z*(1.287804079865234375e+09 + z*(9.361650045898437500e+07 + z*(-7.039282905156250000e+08 + z*(-3.117937380468750000e+07 + z*(2.295556805000000000e+08 + z*(3.925734593750000000e+06 + z*(-3.393296800000000000e+07))))))))))))))))))))))))))))))))))))))))))))))  # noqa: E501
+
+    # Return theta-w converted to K
+    return thw + 273.15
+
+
+@vectorize(nopython=True, cache=True)
+def temp(p, thw):
+    """
+    Computes the temperature T at pressure p on a ice pseudoadiabat
+    with wet-bulb potential temperature thw.
+
+    Uses polynomial approximations of the form given by Moisseeva and
+    Stull (2017), fitted using pseudoadiabat_codegen.py.
+
+    Moisseeva, N. and Stull, R., 2017. A noniterative approach to
+        modelling moist thermodynamics. Atmospheric Chemistry and
+        Physics, 17, 15037-15043.
+
+    Args:
+        p: pressure (Pa)
+        thw: wet-bulb potential temperature (K)
+
+    Returns:
+        T: temperature (K)
+
+    """
+
+    # Convert p to hPa and theta-w to degC
+    p_ = p / 100.
+    thw_ = thw - 273.15
+
+    # Check that values fall in the permitted range
+    if (thw_ < -70.0) or (thw_ > 50.0) or (p_ > 1100.0) or (p_ < 50.0):
+        # print('thw or p outside limits of polynomial fit', thw_, p_)
+        return np.nan
+
+    # Compute T using Eq. 1-3 from Moisseeva & Stull 2017
+    x = (p_ - 575.0) / 525.0
+    thref = 2.370286536830732871e+00 + x*(3.258099579185703476e+01 + x*(-2.283326824041996161e+01 + x*(2.101970552483179944e+01 + x*(-2.027127125763180970e+01 + x*(1.508044309976420294e+01 + x*(-1.604025463069356761e+01 + x*(7.930189222332188592e+01 + x*(-4.071869495544927275e+01 + x*(-5.498926105238844002e+02 + x*(3.730443148298770097e+02 + x*(2.704704276288429355e+03 + x*(-2.089634006705305637e+03 + x*(-8.511020520764323010e+03 + x*(7.559783111525950517e+03 + x*(1.638089152995246332e+04 + x*(-1.615677763536860584e+04 + x*(-1.946725740394343302e+04 + x*(2.067851602820623157e+04 + x*(1.408216397384152697e+04 + x*(-1.576270639751123235e+04 + x*(-5.723719703748443862e+03 + x*(6.644753494150527331e+03 + x*(1.009245711814167407e+03 + x*(-1.199833303691038054e+03))))))))))))))))))))))))  # noqa: E501
+    y = (thref - -50.34759711095842) / 73.09828955627862
+    z = (thw_ - -10.0) / 60.0
+    T = -1.033391580388108792e+02 + z*(5.448187559746720865e+01 + z*(3.831539918049733728e+01 + z*(7.822439562064673169e+01 + z*(3.226666302418661303e+02 + z*(-4.498843108832597864e+02 + z*(-7.931706150783023986e+03 + z*(7.622638384780619162e+03 + z*(1.289025172313633957e+05 + z*(-4.904356844211808493e+04 + z*(-1.221921801255235681e+06 + z*(4.861188461481573177e+04 + z*(7.361413114411014132e+06 + z*(1.283502384057324845e+06 + z*(-2.959080575968856364e+07 + z*(-9.102062243437584490e+06 + z*(8.193219725733472407e+07 + z*(3.144877250749973208e+07 + z*(-1.594632988766839206e+08 + z*(-6.663030177228997648e+07 + z*(2.199879822465199530e+08 + z*(9.205677486640085280e+07 + z*(-2.140102704693284631e+08 + z*(-8.357742242701250315e+07 + z*(1.435432453878879547e+08 + z*(4.823257742882662266e+07 + z*(-6.314692474334234744e+07 + z*(-1.608083821683211997e+07 + z*(1.638577086808626913e+07 + z*(2.362205891873740591e+06 + z*(-1.898677917637810111e+06)))))))))))))))))))))))))))))) + y*(5.767578411737854083e+01 + z*(1.717867127863072696e+01 + z*(1.590817881710287018e+01 + z*(2.594785997683226242e+02 + z*(7.513241533817223683e+01 + z*(-1.171671303913940937e+04 + z*(-8.546776161455587498e+03 + z*(2.625853575651107240e+05 + z*(2.568224300174540840e+05 + z*(-3.244272624101522844e+06 + z*(-3.660017735565239564e+06 + z*(2.454880554098672792e+07 + z*(3.019055901834417507e+07 + z*(-1.210593893569316119e+08 + z*(-1.578537029704931974e+08 + z*(4.046192952892699242e+08 + z*(5.504287903964234591e+08 + z*(-9.395158589204012156e+08 + z*(-1.319806808030351400e+09 + z*(1.533088174311322927e+09 + z*(2.208750801322078228e+09 + z*(-1.753462653056035280e+09 + z*(-2.578484933818019390e+09 + z*(1.377347274828075171e+09 + z*(2.060085374058381319e+09 + z*(-7.082100512303547859e+08 + z*(-1.074586286718338728e+09 + z*(2.147750999871432483e+08 + z*(3.299322461333383322e+08 + z*(-2.913758151401419193e+07 + z*(-4.524441375990164280e+07)))))))))))))))))))))))))))))) + y*(7.223449331317141286e+00 + z*(9.486223682296799353e+00 + z*(1.174122527646100593e+02 + z*(-9.331260017582160344e+02 + z*(-1.000079731847221592e+04 + z*(3.668766796102268563e+04 + z*(3.201980111140753143e+05 + z*(-6.679026199354410637e+05 + z*(-5.254465984948157333e+06 + z*(6.674410675216792151e+06 + z*(5.098560450691621006e+07 + z*(-4.003230462650485337e+07 + z*(-3.170108154779663086e+08 + z*(1.513807588127117157e+08 + z*(1.327839262446879148e+09 + z*(-3.692488790951045156e+08 + z*(-3.871347533940315247e+09 + z*(5.742597740414131880e+08 + z*(8.009348779201876640e+09 + z*(-5.213933557346059084e+08 + z*(-1.184041981963887596e+10 + z*(1.643696714449945092e+08 + z*(1.242996208706846428e+10 + z*(1.819623446440296769e+08 + z*(-9.054528064968814850e+09 + z*(-2.413109056400582194e+08 + z*(4.353247830427706718e+09 + z*(1.148257096915699691e+08 + z*(-1.242708433089737892e+09 + z*(-2.085508852907194570e+07 + z*(1.595752504225414991e+08)))))))))))))))))))))))))))))) + y*(1.576731361468238291e+01 + z*(1.468075793067568746e+01 + z*(-1.305045599777671157e+02 + z*(-2.165698138763923907e+03 + z*(7.662919929616650734e+03 + z*(1.121755796224341466e+05 + z*(-1.479965528163114504e+05 + z*(-2.555066880101046525e+06 + z*(9.936914803504716838e+05 + z*(3.191865656670090556e+07 + z*(3.506817277910876554e+06 + z*(-2.440479941890804470e+08 + z*(-1.006592065251792371e+08 + z*(1.217353816919337273e+09 + z*(7.408717872885811329e+08 + z*(-4.126751613840800285e+09 + z*(-3.061587460554588795e+09 + z*(9.744675195848247528e+09 + z*(8.146961863008989334e+09 + z*(-1.620144660507834625e+10 + z*(-1.465800259979092216e+10 + z*(1.889991799933234024e+10 + z*(1.807260701287641907e+10 + z*(-1.514743393423616791e+10 + z*(-1.508251384276867104e+10 + z*(7.945715326291791916e+09 + z*(8.156907064349649429e+09 + z*(-2.457155740964951515e+09 + z*(-2.582709246741699219e+09 + z*(3.396999329484215975e+08 + z*(3.637645775707192421e+08)))))))))))))))))))))))))))))) + y*(2.000233423799042143e+01 + z*(-5.477411098244716214e+01 + z*(-7.120726427100305500e+02 + z*(6.381251784526737538e+03 + z*(6.587666078334703343e+04 + z*(-2.160853955238949275e+05 + z*(-2.026111694141776301e+06 + z*(3.700374293922663666e+06 + z*(3.194696137788732722e+07 + z*(-3.691326744595984370e+07 + z*(-3.020087906343640685e+08 + z*(2.303055188688300550e+08 + z*(1.852811124276061773e+09 + z*(-9.440512587823358774e+08 + z*(-7.740053730651564598e+09 + z*(2.628154003233141899e+09 + z*(2.269160097099570847e+10 + z*(-5.061363851401674271e+09 + z*(-4.748238531818331146e+10 + z*(6.769349730926280022e+09 + z*(7.127419467607977295e+10 + z*(-6.210085054218351364e+09 + z*(-7.616395505103523254e+10 + z*(3.774234981136979103e+09 + z*(5.656013462921285248e+10 + z*(-1.412659587671637535e+09 + z*(-2.774422695831784821e+10 + z*(2.779100843114991188e+08 + z*(8.083270245820402145e+09 + z*(-1.837191847389210016e+07 + z*(-1.059367821149310589e+09)))))))))))))))))))))))))))))) + y*(1.649074969950181568e+01 + z*(-4.362698206770140530e+00 + z*(6.567240793473063150e+02 + z*(7.513945952748821583e+03 + z*(-3.155492746115423506e+04 + z*(-3.944264533096645027e+05 + z*(5.003669674617316341e+05 + z*(8.425245515100546181e+06 + z*(-2.786484917551764287e+06 + z*(-9.892106841441002488e+07 + z*(-1.212770692946242541e+07 + z*(7.207202899261852503e+08 + z*(2.776219450892478228e+08 + z*(-3.477291047502958775e+09 + z*(-1.923487260077617407e+09 + z*(1.154387679265051460e+10 + z*(7.705163753855116844e+09 + z*(-2.694216038423245621e+10 + z*(-2.017201324060419464e+10 + z*(4.456130593840173340e+10 + z*(3.602229108314887238e+10 + z*(-5.194301627448606110e+10 + z*(-4.432419282186019897e+10 + z*(4.172105520066322327e+10 + z*(3.704405124531861877e+10 + z*(-2.197549761734344864e+10 + z*(-2.010660499633118820e+10 + z*(6.832205462995156288e+09 + z*(6.397932269362736702e+09 + z*(-9.503156269143886566e+08 + z*(-9.063172639849853516e+08)))))))))))))))))))))))))))))) + y*(2.083028946681644911e+01 + z*(2.481506340258873990e+02 + z*(1.896380924967314513e+03 + z*(-1.170457627390710513e+04 + z*(-1.983777936093167227e+05 + z*(9.291549878339943689e+02 + z*(5.169960764834171161e+06 + z*(3.969747601244975813e+06 + z*(-6.762910889980137348e+07 + z*(-6.101761385510279238e+07 + z*(5.431914576342878342e+08 + z*(4.629092978531920910e+08 + z*(-2.934546289849745274e+09 + z*(-2.177474888075356483e+09 + z*(1.116958633851419067e+10 + z*(6.918683543548388481e+09 + z*(-3.067329349242959595e+10 + z*(-1.544231010864525795e+10 + z*(6.138456451382048798e+10 + z*(2.456962787297751617e+10 + z*(-8.945481645006250000e+10 + z*(-2.776881328951064682e+10 + z*(9.379159082926324463e+10 + z*(2.179677362720773315e+10 + z*(-6.884568928500192261e+10 + z*(-1.129863868712760925e+10 + z*(3.355174125466283035e+10 + z*(3.477409146833925724e+09 + z*(-9.746284868108070374e+09 + z*(-4.811081247890628576e+08 + z*(1.276611603184371948e+09)))))))))))))))))))))))))))))) + y*(-1.125153541547834557e+01 + z*(-8.770375031777095387e+01 + z*(-9.086813219148939424e+02 + z*(-1.922736052477426347e+04 + z*(-2.602900213720924512e+04 + z*(9.400014041920987656e+05 + z*(2.414290531417846680e+06 + z*(-1.640646004206056893e+07 + z*(-4.827061028983222693e+07 + z*(1.541604602383056879e+08 + z*(4.833602021184172034e+08 + z*(-9.133271225522176027e+08 + z*(-2.962377012715743065e+09 + z*(3.693052995977610111e+09 + z*(1.215591754652104568e+10 + z*(-1.062452926127625275e+10 + z*(-3.498269022531131744e+10 + z*(2.217029997327622604e+10 + z*(7.223866576829721069e+10 + z*(-3.367275422797605133e+10 + z*(-1.077505969719363403e+11 + z*(3.683263707183763885e+10 + z*(1.151814990557532654e+11 + z*(-2.823663044074104309e+10 + z*(-8.605512199002299500e+10 + z*(1.438118375607417297e+10 + z*(4.266528937188059998e+10 + z*(-4.365991664075469971e+09 + z*(-1.260858191494303894e+10 + z*(5.973842352261736393e+08 + z*(1.680519436402587891e+09)))))))))))))))))))))))))))))) + y*(-9.430164921107912335e+01 + z*(-7.574202918130963553e+02 + z*(-3.228090360838551987e+03 + z*(-3.710577514972068911e+03 + z*(3.969742482313957880e+05 + z*(2.253238263513721060e+06 + z*(-7.008139061660924926e+06 + z*(-5.904373762526563555e+07 + z*(3.727999715215609223e+07 + z*(6.943693467521715164e+08 + z*(1.311143380078407377e+08 + z*(-4.753780635060498238e+09 + z*(-2.754892457994347572e+09 + z*(2.110605511175046921e+10 + z*(1.686360865280218315e+10 + z*(-6.423718938687567139e+10 + z*(-6.002508728779817200e+10 + z*(1.379257546111333618e+11 + z*(1.411092650028901672e+11 + z*(-2.112007578196710815e+11 + z*(-2.288143182014845581e+11 + z*(2.295628053075556030e+11 + z*(2.583692240110487671e+11 + z*(-1.731589134807613525e+11 + z*(-2.000518503632232056e+11 + z*(8.622132016495051575e+10 + z*(1.014478664267849731e+11 + z*(-2.549314453575868607e+10 + z*(-3.038254600455204773e+10 + z*(3.390276290084767818e+09 + z*(4.076950365907562256e+09)))))))))))))))))))))))))))))) + y*(-1.017416424873708536e+00 + z*(3.681915457948284143e+02 + z*(2.583882054866942326e+02 + z*(3.577451913856651663e+04 + z*(2.612167485415911942e+05 + z*(-1.580000299596430501e+06 + z*(-1.158118937760045752e+07 + z*(2.029205387227422744e+07 + z*(1.920576596063584387e+08 + z*(-1.096752045219020098e+08 + z*(-1.722041627406159639e+09 + z*(1.424900594452504814e+08 + z*(9.665968980728174210e+09 + z*(1.437653222060840368e+09 + z*(-3.661249622788362122e+10 + z*(-9.469940757826946259e+09 + z*(9.753871360889703369e+10 + z*(2.945543120712510300e+10 + z*(-1.867069578451095581e+11 + z*(-5.698663097691747284e+10 + z*(2.584608663493061523e+11 + z*(7.307885025744081116e+10 + z*(-2.568113915983604431e+11 + z*(-6.244044438607443237e+10 + z*(1.787093628956455688e+11 + z*(3.428882375862796783e+10 + z*(-8.272940769453091431e+10 + z*(-1.097317197742098999e+10 + z*(2.289231982647231293e+10 + z*(1.557866607576170921e+09 + z*(-2.865674619705749512e+09)))))))))))))))))))))))))))))) + y*(1.931533749632149011e+02 + z*(1.659433831475564830e+03 + z*(4.348395982461877793e+03 + z*(3.866170314160815178e+04 + z*(-5.798305507988592144e+05 + z*(-6.330516262176089920e+06 + z*(4.934412962023923174e+06 + z*(1.528893047591173649e+08 + z*(9.018068024035444856e+07 + z*(-1.736605966048818111e+09 + z*(-1.905265937207202196e+09 + z*(1.165646668566576004e+10 + z*(1.577588801455574608e+10 + z*(-5.109577220814837646e+10 + z*(-7.685679493894323730e+10 + z*(1.541162248709226990e+11 + z*(2.468075239988529053e+11 + z*(-3.286482407295128784e+11 + z*(-5.482511695060393066e+11 + z*(5.004539674320291748e+11 + z*(8.588309676613483887e+11 + z*(-5.413647601235257568e+11 + z*(-9.482708521772312012e+11 + z*(4.065913139486945801e+11 + z*(7.231853185124238281e+11 + z*(-2.016407137892402649e+11 + z*(-3.628772146456162720e+11 + z*(5.939026038778123474e+10 + z*(1.078617045332907715e+11 + z*(-7.868739625081409454e+09 + z*(-1.439464532102001953e+10)))))))))))))))))))))))))))))) + y*(8.455128093739745054e+00 + z*(-6.857745106144029705e+02 + z*(-3.627660863306991814e+02 + z*(-4.165415800616663182e+04 + z*(-4.457519935783991823e+05 + z*(1.591562657294165576e+06 + z*(1.813151288214289024e+07 + z*(-1.301666971053599194e+07 + z*(-2.854230590811683536e+08 + z*(-3.067750073677449301e+07 + z*(2.462102974124167919e+09 + z*(1.101173261470016479e+09 + z*(-1.337978159847466278e+10 + z*(-7.997548871037996292e+09 + z*(4.920966315720095825e+10 + z*(3.218170328980084610e+10 + z*(-1.274395867060495758e+11 + z*(-8.349179457214611816e+10 + z*(2.371538938971313171e+11 + z*(1.470628820001152344e+11 + z*(-3.189899484046774902e+11 + z*(-1.782947387890315857e+11 + z*(3.076976503078896484e+11 + z*(1.468881881783595581e+11 + z*(-2.076417134346903687e+11 + z*(-7.868032992698262024e+10 + z*(9.310494223958239746e+10 + z*(2.474073277639939499e+10 + z*(-2.492428457744546509e+10 + z*(-3.468122409313493729e+09 + z*(3.014799808369140625e+09)))))))))))))))))))))))))))))) + y*(-2.328880535679346053e+02 + z*(-2.278037914392914445e+03 + z*(-5.113275999780795246e+03 + z*(-5.567308644435600581e+04 + z*(5.662064713027891703e+05 + z*(8.024875848759211600e+06 + z*(-7.611383726437548175e+05 + z*(-1.875157535071697235e+08 + z*(-1.888086616631390452e+08 + z*(2.088591041603658199e+09 + z*(2.985026321484292030e+09 + z*(-1.383389950022918320e+10 + z*(-2.279870311807306290e+10 + z*(6.005913286846627045e+10 + z*(1.068972544733867950e+11 + z*(-1.798357262039345398e+11 + z*(-3.357594705493382568e+11 + z*(3.813111908342663574e+11 + z*(7.353429307914495850e+11 + z*(-5.779828720873696289e+11 + z*(-1.140824096772222168e+12 + z*(6.228612005916241455e+11 + z*(1.251005915898346924e+12 + z*(-4.663016114550037842e+11 + z*(-9.492765385732176514e+11 + z*(2.306154827013835449e+11 + z*(4.745359436335582886e+11 + z*(-6.776038832179407501e+10 + z*(-1.406479838694958496e+11 + z*(8.958448364609954834e+09 + z*(1.872873071366015625e+10)))))))))))))))))))))))))))))) + y*(-1.856515936388650800e+01 + z*(5.266659708475601747e+02 + z*(8.747522435362006945e+02 + z*(2.662540759287006222e+04 + z*(3.235192774801885244e+05 + z*(-8.337562277180292876e+05 + z*(-1.274734585392404720e+07 + z*(2.384120804221463390e+06 + z*(1.942042099906106889e+08 + z*(9.662084542621240020e+07 + z*(-1.629318701316777706e+09 + z*(-1.264366095049366236e+09 + z*(8.638545848115951538e+09 + z*(7.715981099803150177e+09 + z*(-3.104916404310537720e+10 + z*(-2.879714687028623962e+10 + z*(7.862990633268360901e+10 + z*(7.161702568547711182e+10 + z*(-1.430755431870247498e+11 + z*(-1.227811480982447968e+11 + z*(1.880628725045423279e+11 + z*(1.461026591201045532e+11 + z*(-1.770919285937004089e+11 + z*(-1.187449533065767670e+11 + z*(1.165038987348682404e+11 + z*(6.295888490684458160e+10 + z*(-5.084062682291378784e+10 + z*(-1.964127231728955460e+10 + z*(1.321891400410290527e+10 + z*(2.736137519861974716e+09 + z*(-1.549337321436523438e+09)))))))))))))))))))))))))))))) + y*(1.394193334148792474e+02 + z*(1.600502177066754257e+03 + z*(3.875910603893318694e+03 + z*(3.626775745238335367e+04 + z*(-3.166928336657639593e+05 + z*(-5.022663559895767830e+06 + z*(-1.118818525451059453e+06 + z*(1.148773754795466661e+08 + z*(1.401442712980023324e+08 + z*(-1.261570166097548962e+09 + z*(-2.028825581512768507e+09 + z*(8.271770067301921844e+09 + z*(1.499335004215797234e+10 + z*(-3.563698716103797150e+10 + z*(-6.906069361045500183e+10 + z*(1.060669363749704742e+11 + z*(2.144994635650231628e+11 + z*(-2.238033381755221558e+11 + z*(-4.661783752490982056e+11 + z*(3.378703270735184326e+11 + z*(7.192335466393990479e+11 + z*(-3.628681036091365356e+11 + z*(-7.854222512012165527e+11 + z*(2.708682931985195618e+11 + z*(5.940796244311669922e+11 + z*(-1.336225039230205231e+11 + z*(-2.962282782799494629e+11 + z*(3.917418055054891968e+10 + z*(8.762252387577441406e+10 + z*(-5.168896812429891586e+09 + z*(-1.164879741412890625e+10)))))))))))))))))))))))))))))) + y*(9.687617090318326518e+00 + z*(-1.399590454640810719e+02 + z*(-4.219842024593353926e+02 + z*(-7.094164182707666441e+03 + z*(-8.897365470873043523e+04 + z*(1.737939719381032046e+05 + z*(3.432333366040748078e+06 + z*(6.652384447783462238e+05 + z*(-5.091140572892375290e+07 + z*(-4.080498637932675332e+07 + z*(4.168572383368636966e+08 + z*(4.375287873553153872e+08 + z*(-2.160237043735276699e+09 + z*(-2.491759783742720127e+09 + z*(7.592603823506421089e+09 + z*(8.969215620012094498e+09 + z*(-1.879537503340657806e+10 + z*(-2.180872592919504547e+10 + z*(3.339629035038798141e+10 + z*(3.681495577760709381e+10 + z*(-4.279414038059356689e+10 + z*(-4.331570647314564514e+10 + z*(3.919561219173041534e+10 + z*(3.490343940810203552e+10 + z*(-2.500632838068499756e+10 + z*(-1.838137717191049576e+10 + z*(1.054284065913854980e+10 + z*(5.703390629375314713e+09 + z*(-2.635829270739257812e+09 + z*(-7.909876780786210299e+08 + z*(2.952743055039062500e+08)))))))))))))))))))))))))))))) + y*(-3.209519953403287218e+01 + z*(-4.356541098634813807e+02 + z*(-1.209329324176462251e+03 + z*(-9.392795831585384803e+03 + z*(7.536008434791830950e+04 + z*(1.256369461060364731e+06 + z*(5.043655102232545614e+05 + z*(-2.826836966109342128e+07 + z*(-3.811305373113336414e+07 + z*(3.071454089175072908e+08 + z*(5.283570048871934414e+08 + z*(-1.998504735248791456e+09 + z*(-3.833704827339311123e+09 + z*(8.560004493403097153e+09 + z*(1.747344488309447479e+10 + z*(-2.535955650532588959e+10 + z*(-5.389804024087927246e+10 + z*(5.330674404793769836e+10 + z*(1.165671463432935181e+11 + z*(-8.022073525454483032e+10 + z*(-1.791918078883345337e+11 + z*(8.592277790415487671e+10 + z*(1.951376798159049072e+11 + z*(-6.398785997542987823e+10 + z*(-1.472750140967299805e+11 + z*(3.150095583314334106e+10 + z*(7.330684426537231445e+10 + z*(-9.218280213837942123e+09 + z*(-2.165248128232763672e+10 + z*(1.214330825956269503e+09 + z*(2.875110594570312500e+09))))))))))))))))))))))))))))))))))))))))))))))  # noqa: E501
+
+    # Return T converted to K
+    return T + 273.15
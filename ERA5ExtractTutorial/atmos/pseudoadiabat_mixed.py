@@ -0,0 +1,96 @@
+# *** This file is generated by pseudoadiabat_codegen/pseudoadiabat_codegen.py ***
+# *** Please ensure any updates are made in pseudoadiabat_codegen.py           ***
+#
+# Phase: mixed
+# wbpt: max error 0.0670 K, RMS error 0.0083 K
+# temp: max error 0.1506 K, RMS error 0.0263 K
+import numpy as np
+from numba import vectorize
+
+# Maximum errors on the validation grid (K)
+WBPT_MAX_ERROR = 0.0670
+TEMP_MAX_ERROR = 0.1506
+
+
+@vectorize(nopython=True, cache=True)
+def wbpt(p, T):
+    """
+    Computes the wet-bulb potential temperature (WBPT) thw of the
+    mixed pseudoadiabat that passes through pressure p and temperature T.
+
+    Uses polynomial approximations of the form given by Moisseeva and
+    Stull (2017), fitted using pseudoadiabat_codegen.py.
+
+    Moisseeva, N. and Stull, R., 2017. A noniterative approach to
+        modelling moist thermodynamics. Atmospheric Chemistry and
+        Physics, 17, 15037-15043.
+
+    Args:
+        p: pressure (Pa)
+        T: temperature (K)
+
+    Returns:
+        thw: wet-bulb potential temperature (K)
+
+    """
+
+    # Convert p to hPa and T to degC
+    p_ = p / 100.
+    T_ = T - 273.15
+
+    # Check that values fall in the permitted range
+    if (T_ < -100.0) or (T_ > 50.0) or (p_ > 1100.0) or (p_ < 50.0):
+        # print('T or p outside limits of polynomial fit', T_, p_)
+        return np.nan
+
+    # Compute theta-w using Eq. 4-6 from Moisseeva & Stull 2017
+    x = (p_ - 575.0) / 525.0
+    Tref = -5.867289064660013054e+01 + x*(-5.575379537571686939e+01 + x*(3.326422939105140131e+01 + x*(-2.211571430794219140e+01 + x*(-2.649464936518063141e+01 + x*(5.348628953398287678e+01 + x*(4.596155521880829724e+02 + x*(-7.455402411524078161e+02 + x*(-2.618203885168335546e+03 + x*(4.659630265103825877e+03 + x*(7.292442509501133827e+03 + x*(-1.438002847612672304e+04 + x*(-1.108166040529408565e+04 + x*(2.483187300987070557e+04 + x*(8.763509187750049023e+03 + x*(-2.448339103924029769e+04 + x*(-2.453003869586859764e+03 + x*(1.289389986184455120e+04 + x*(-8.558224504834552135e+02 + x*(-2.817306465731894150e+03 + x*(5.153515644187142470e+02))))))))))))))))))))  # noqa: E501
+    y = (Tref - -29.675107295486026) / 65.24630558191576
+    z = (T_ - -25.0) / 75.0
+    thw = 1.962083329963252254e+01 + z*(3.455845202258541349e+01 + z*(-6.974848435620515374e-01 + z*(6.900982629493228160e+01 + z*(2.113835027379100211e+02 + z*(-5.598797600142934243e+02 + z*(-4.479745736656710505e+03 + z*(2.957478906419826671e+03 + z*(4.346593651355151087e+04 + z*(3.558178600564715452e+03 + z*(-2.472511287818560377e+05 + z*(-1.270173692505587824e+05 + z*(8.886240055968239903e+05 + z*(7.300889470611903816e+05 + z*(-2.051965017078101635e+06 + z*(-2.237781901203852147e+06 + z*(2.954313006040692329e+06 + z*(4.146882885783404112e+06 + z*(-2.355411040505409241e+06 + z*(-4.660834292702555656e+06 + z*(5.628178889360427856e+05 + z*(2.933348903357982635e+06 + z*(5.040349020538330078e+05 + z*(-7.949025821304321289e+05 + z*(-2.985776628417968750e+05)))))))))))))))))))))))) + y*(2.633818207216245355e+01 + z*(-2.610112742263572727e+01 + z*(2.220255280971468892e+01 + z*(8.324437360547017306e+01 + z*(1.853122103952337056e+02 + z*(-1.955146387326356489e+03 + z*(-2.795637722439016216e+03 + z*(1.827971743615623564e+04 + z*(3.706253241484193131e+04 + z*(-8.977240007192175835e+04 + z*(-3.151186752689275891e+05 + z*(2.035298158652000129e+05 + z*(1.592972221006363630e+06 + z*(1.887932562972754240e+05 + z*(-4.900916857755094767e+06 + z*(-2.658938296448275447e+06 + z*(9.173017584741711617e+06 + z*(7.899711583159208298e+06 + z*(-9.793504183619976044e+06 + z*(-1.191720323244380951e+07 + z*(4.587070354309082031e+06 + z*(9.353723072147369385e+06 + z*(6.237030268173217773e+05 + z*(-3.033905599975585938e+06 + z*(-1.039339557708740234e+06)))))))))))))))))))))))) + y*(-1.048890515500806941e+01 + z*(1.565550327945305753e+01 + z*(1.837335734297448653e+02 + z*(-1.239502177692593250e+02 + z*(-7.124281113014003495e+03 + z*(7.825274943031938164e+03 + z*(1.036625355309888255e+05 + z*(-9.763470875764871016e+04 + z*(-8.278398450920945033e+05 + z*(4.777138225071541965e+05 + z*(4.186834961307797581e+06 + z*(-6.669949559762179852e+05 + z*(-1.401577213462789357e+07 + z*(-3.242368415955603123e+06 + z*(3.088469039721751213e+07 + z*(1.787665452542600036e+07 + z*(-4.282634242808830738e+07 + z*(-3.945958902084559202e+07 + z*(3.312065654513263702e+07 + z*(4.646240885069251060e+07 + z*(-8.638080353174209595e+06 + z*(-2.838463394319820404e+07 + z*(-4.597307517898559570e+06 + z*(6.974860598770141602e+06 + z*(2.564594272705078125e+06)))))))))))))))))))))))) + y*(1.710331543447682634e+01 + z*(2.388342422962159617e+01 + z*(1.166461928418721072e+02 + z*(-3.243608550330769503e+03 + z*(1.318842188795795664e+03 + z*(6.940480267285171431e+04 + z*(-4.416210741142462939e+04 + z*(-7.194342727672141045e+05 + z*(1.565375056723244488e+05 + z*(4.514565424833253026e+06 + z*(1.813805512439742684e+06 + z*(-1.797301070897480845e+07 + z*(-1.887251739782834053e+07 + z*(4.325234487727630138e+07 + z*(7.818329454389190674e+07 + z*(-5.101751819194746017e+07 + z*(-1.766518162442069054e+08 + z*(-1.011169547932386398e+07 + z*(2.231254689100456238e+08 + z*(1.102910214311351776e+08 + z*(-1.380358037696075439e+08 + z*(-1.261977532942428589e+08 + z*(1.726621337371826172e+07 + z*(4.863387051123046875e+07 + z*(1.379613444262695312e+07)))))))))))))))))))))))) + y*(1.763579628377920017e+01 + z*(3.797824579131702194e+01 + z*(-3.278523315963335335e+03 + z*(4.425997190023801522e+03 + z*(1.125943561818266753e+05 + z*(-1.692387427904041251e+05 + z*(-1.538513692942447960e+06 + z*(1.880974083779890090e+06 + z*(1.152072994737491012e+07 + z*(-9.081975357322834432e+06 + z*(-5.318726357615625858e+07 + z*(1.697471449522626400e+07 + z*(1.545862016735560894e+08 + z*(1.879544549399101734e+07 + z*(-2.677785099345703125e+08 + z*(-1.447137682789616585e+08 + z*(2.212291335224852562e+08 + z*(2.468543687920804024e+08 + z*(2.846869852706909180e+07 + z*(-1.267232861528835297e+08 + z*(-1.775411851536712646e+08 + z*(-7.844838643680572510e+07 + z*(6.708723220263671875e+07 + z*(7.946033117004394531e+07 + z*(2.187779834960937500e+07)))))))))))))))))))))))) + y*(-1.758637116596219130e+01 + z*(-4.088007939046656247e+02 + z*(-4.195033247350947931e+02 + z*(2.904336775504879188e+04 + z*(-3.071088189099356532e+04 + z*(-5.559153241306790151e+05 + z*(6.126559640236962587e+05 + z*(5.260496086970061064e+06 + z*(-3.370638909311331809e+06 + z*(-2.939031052162257582e+07 + z*(4.033254351297020912e+04 + z*(9.872870439480075240e+07 + z*(6.737821774782633781e+07 + z*(-1.761992634234824181e+08 + z*(-2.802513310738983154e+08 + z*(6.496207186524772644e+07 + z*(4.940925426451845169e+08 + z*(3.246161832746334076e+08 + z*(-3.291241579238967896e+08 + z*(-5.432439856477432251e+08 + z*(-8.993518174035644531e+07 + z*(2.571595578966369629e+08 + z*(1.640428991160888672e+08 + z*(1.328265559423828125e+07 + z*(-8.805525280761718750e+06)))))))))))))))))))))))) + y*(-1.442517762038623914e+02 + z*(2.474073201724968385e+01 + z*(2.029346890837652609e+04 + z*(-4.118786610637808917e+04 + z*(-6.569224168844860978e+05 + z*(1.270141679238762939e+06 + z*(8.671620954029627144e+06 + z*(-1.381042019678398222e+07 + z*(-6.261613372209097445e+07 + z*(7.333382434229654074e+07 + z*(2.769641013174036741e+08 + z*(-2.116210567722734213e+08 + z*(-7.727151048694081306e+08 + z*(3.435131942536971569e+08 + z*(1.335783133420043945e+09 + z*(-3.628791414538187981e+08 + z*(-1.369946063546499252e+09 + z*(4.733017281288557053e+08 + z*(8.499325741607360840e+08 + z*(-7.285574127053794861e+08 + z*(-5.012779234101867676e+08 + z*(5.746665629330902100e+08 + z*(3.410523171391601562e+08 + z*(-1.231807034909667969e+08 + z*(-7.921637681250000000e+07)))))))))))))))))))))))) + y*(5.250113330828025937e+01 + z*(1.705919327512092423e+03 + z*(-9.652764759440906346e+02 + z*(-1.054358519763383083e+05 + z*(1.757332399914674461e+05 + z*(1.908782310936285183e+06 + z*(-2.999553025705941021e+06 + z*(-1.715316966442143917e+07 + z*(1.892800453777661920e+07 + z*(8.967933634138771892e+07 + z*(-4.761182776958477497e+07 + z*(-2.756763734449836016e+08 + z*(3.775425659814834595e+06 + z*(4.411398392792358398e+08 + z*(1.754069608199119568e+08 + z*(-1.707429149555387497e+08 + z*(-1.190218832900543213e+08 + z*(-4.312280184013290405e+08 + z*(-4.787065013941345215e+08 + z*(4.303020485690612793e+08 + z*(7.667791385266113281e+08 + z*(6.765274523449707031e+07 + z*(-2.910123676420898438e+08 + z*(-1.097774342167968750e+08 + z*(2.893763730468750000e+05)))))))))))))))))))))))) + y*(4.409793694644467905e+02 + z*(-7.650754614775069058e+02 + z*(-5.738883972417097539e+04 + z*(1.523032279863678850e+05 + z*(1.810907919257078320e+06 + z*(-4.219120941233402118e+06 + z*(-2.349264147957096994e+07 + z*(4.528813552170720696e+07 + z*(1.666746078290910721e+08 + z*(-2.515846393524557054e+08 + z*(-7.262260541346371174e+08 + z*(8.287937270832234621e+08 + z*(2.034206558237185478e+09 + z*(-1.789166108546941757e+09 + z*(-3.749827582779333115e+09 + z*(2.809232268439214706e+09 + z*(4.740205433984649658e+09 + z*(-3.376164398290229797e+09 + z*(-4.443392203340759277e+09 + z*(2.744788641361114502e+09 + z*(3.123624095548095703e+09 + z*(-1.094722073823852539e+09 + z*(-1.291500772567382812e+09 + z*(9.436270599609375000e+07 + z*(1.747359321562500000e+08)))))))))))))))))))))))) + y*(-8.952798371482640505e+01 + z*(-3.096105686717201024e+03 + z*(5.522074886454269290e+03 + z*(1.804210676130447537e+05 + z*(-4.047900715895593166e+05 + z*(-3.163890527593709528e+06 + z*(6.437832980308383703e+06 + z*(2.761797700324910879e+07 + z*(-4.329423860300123692e+07 + z*(-1.395086688413850069e+08 + z*(1.507590550253853798e+08 + z*(4.177980106888976097e+08 + z*(-3.191350036347007751e+08 + z*(-7.143399182452392578e+08 + z*(5.762333575561676025e+08 + z*(6.748048961965789795e+08 + z*(-1.092579311443023682e+09 + z*(-5.058765422122497559e+08 + z*(1.448628801577514648e+09 + z*(5.929619493458251953e+08 + z*(-8.862348246093750000e+08 + z*(-4.016130066850585938e+08 + z*(1.764752376582031250e+08 + z*(3.149931746484375000e+07 + z*(-3.653484636718750000e+07)))))))))))))))))))))))) + y*(-6.512249530234839767e+02 + z*(1.924354426578269340e+03 + z*(8.178928668713755906e+04 + z*(-2.628964296745499596e+05 + z*(-2.547415850314788520e+06 + z*(6.863227348832782358e+06 + z*(3.275606217684334517e+07 + z*(-7.310307299662357569e+07 + z*(-2.305104636938884258e+08 + z*(4.154427004139174819e+08 + z*(1.002742800929064751e+09 + z*(-1.440018806082019091e+09 + z*(-2.862508071197336197e+09 + z*(3.307538911300256729e+09 + z*(5.582799969164581299e+09 + z*(-5.257575565704233170e+09 + z*(-7.698167254928375244e+09 + z*(5.664973946590408325e+09 + z*(7.507756483111572266e+09 + z*(-3.740977050897766113e+09 + z*(-4.763665724261230469e+09 + z*(1.303220759629150391e+09 + z*(1.662400673378906250e+09 + z*(-2.179928946250000000e+08 + z*(-2.630281220937500000e+08)))))))))))))))))))))))) + y*(7.740492136776447296e+01 + z*(2.583387546353042126e+03 + z*(-7.246555362291634083e+03 + z*(-1.451663060732930899e+05 + z*(4.045836197984814644e+05 + z*(2.497318134602487087e+06 + z*(-6.194043165085792542e+06 + z*(-2.144224030170178413e+07 + z*(4.298586927509403229e+07 + z*(1.064834848366260529e+08 + z*(-1.679668331627216339e+08 + z*(-3.196519416220664978e+08 + z*(4.380103634720764160e+08 + z*(5.983191812608489990e+08 + z*(-8.759667362523498535e+08 + z*(-7.725235350955810547e+08 + z*(1.317114993592407227e+09 + z*(7.971940304152832031e+08 + z*(-1.268135962754882812e+09 + z*(-5.766446415566406250e+08 + z*(7.135765162460937500e+08 + z*(1.886933743710937500e+08 + z*(-2.626499160156250000e+08 + z*(-2.748910232812500000e+07 + z*(4.412224737500000000e+07)))))))))))))))))))))))) + y*(4.667310897968709469e+02 + z*(-1.840412768719164887e+03 + z*(-5.725237435613200068e+04 + z*(2.127888141753044911e+05 + z*(1.771111719256058335e+06 + z*(-5.364732333345434628e+06 + z*(-2.265408093534302711e+07 + z*(5.688729458753837645e+07 + z*(1.586295403086276054e+08 + z*(-3.273731890203694701e+08 + z*(-6.909267514552478790e+08 + z*(1.160010626891226292e+09 + z*(2.002654311174228668e+09 + z*(-2.705849005994603634e+09 + z*(-4.017594537124237061e+09 + z*(4.245089348026490688e+09 + z*(5.650593599088012695e+09 + z*(-4.384408865493896484e+09 + z*(-5.424251322861328125e+09 + z*(2.836950292296875000e+09 + z*(3.336779881632812500e+09 + z*(-1.063158238796875000e+09 + z*(-1.196449912250000000e+09 + z*(1.758653100000000000e+08 + z*(1.903656257500000000e+08)))))))))))))))))))))))) + y*(-2.606606101989746094e+01 + z*(-8.077399127632379532e+02 + z*(2.986528138339519501e+03 + z*(4.432682936555147171e+04 + z*(-1.461549090287685394e+05 + z*(-7.530498880550861359e+05 + z*(2.186765041051387787e+06 + z*(6.396836607687950134e+06 + z*(-1.542194713742065430e+07 + z*(-3.142022430760955811e+07 + z*(6.340177151074218750e+07 + z*(9.477522103077697754e+07 + z*(-1.754273741820678711e+08 + z*(-1.863908818098754883e+08 + z*(3.491205673602294922e+08 + z*(2.561975771723632812e+08 + z*(-4.854043158837890625e+08 + z*(-2.390558759814453125e+08 + z*(4.568745957734375000e+08 + z*(1.299961034531250000e+08 + z*(-2.915278544375000000e+08 + z*(-3.671746289062500000e+07 + z*(1.134054295000000000e+08 + z*(4.126827437500000000e+06 + z*(-1.986602100000000000e+07)))))))))))))))))))))))) + y*(-1.300955787710845470e+02 + z*(6.185755320402677171e+02 + z*(1.568086657163500786e+04 + z*(-6.531938247300591320e+04 + z*(-4.832023260966241360e+05 + z*(1.612425285270126536e+06 + z*(6.153710799402236938e+06 + z*(-1.706154836648754030e+07 + z*(-4.287548958785343170e+07 + z*(9.900187040714357793e+07 + z*(1.867047467677688599e+08 + z*(-3.549571055208131075e+08 + z*(-5.453711305291366577e+08 + z*(8.331954833247478008e+08 + z*(1.104661598954589844e+09 + z*(-1.305024176508702278e+09 + z*(-1.555850268398437500e+09 + z*(1.353385210292968750e+09 + z*(1.492094249835937500e+09 + z*(-8.949816654062500000e+08 + z*(-9.296730955625000000e+08 + z*(3.420040911562500000e+08 + z*(3.393002412500000000e+08 + z*(-5.741440950000000000e+07 + z*(-5.498171400000000000e+07))))))))))))))))))))))))))))))))))))))  # noqa: E501
+
+    # Return theta-w converted to K
+    return thw + 273.15
+
+
+@vectorize(nopython=True, cache=True)
+def temp(p, thw):
+    """
+    Computes the temperature T at pressure p on a mixed pseudoadiabat
+    with wet-bulb potential temperature thw.
+
+    Uses polynomial approximations of the form given by Moisseeva and
+    Stull (2017), fitted using pseudoadiabat_codegen.py.
+
+    Moisseeva, N. and Stull, R., 2017. A noniterative approach to
+        modelling moist thermodynamics. Atmospheric Chemistry and
+        Physics, 17, 15037-15043.
+
+    Args:
+        p: pressure (Pa)
+        thw: wet-bulb potential temperature (K)
+
+    Returns:
+        T: temperature (K)
+
+    """
+
+    # Convert p to hPa and theta-w to degC
+    p_ = p / 100.
+    thw_ = thw - 273.15
+
+    # Check that values fall in the permitted range
+    if (thw_ < -70.0) or (thw_ > 50.0) or (p_ > 1100.0) or (p_ < 50.0):
+        # print('thw or p outside limits of polynomial fit', thw_, p_)
+        return np.nan
+
+    # Compute T using Eq. 1-3 from Moisseeva & Stull 2017
+    x = (p_ - 575.0) / 525.0
+    thref = -2.287690562946664841e+00 + x*(4.064924309290682913e+01 + x*(-2.254176371561938197e+01 + x*(-8.277371618053869895e+00 + x*(6.560549395381212179e+00 + x*(3.359177217065634977e+02 + x*(-6.094549564393546461e+02 + x*(-1.617382452080706571e+03 + x*(3.812535213082810060e+03 + x*(4.939542160061702816e+03 + x*(-1.300705014120614396e+04 + x*(-9.759067614767427585e+03 + x*(2.723741089763969285e+04 + x*(1.234537087684895050e+04 + x*(-3.576702010967116803e+04 + x*(-9.587786358118377393e+03 + x*(2.866160718299026848e+04 + x*(4.149394385694025914e+03 + x*(-1.280296741309573554e+04 + x*(-7.615830801996804666e+02 + x*(2.439928794364328041e+03))))))))))))))))))))  # noqa: E501
+    y = (thref - -53.27943721848803) / 76.7775106199015
+    z = (thw_ - -10.0) / 60.0
+    T = -9.784388336450903978e+01 + z*(5.675029368243900763e+01 + z*(3.375202927106064266e+01 + z*(1.244890406718325160e+01 + z*(2.357235718619081410e+01 + z*(4.168472611344119372e+01 + z*(-1.060573331641762991e+02 + z*(3.995307359770479252e+03 + z*(5.798564384935936687e+03 + z*(-4.425588400264873781e+04 + z*(-6.106884293802180036e+04 + z*(2.327079371787123964e+05 + z*(3.225987106869657291e+05 + z*(-7.110572517801542999e+05 + z*(-1.000600557782326709e+06 + z*(1.340844934280355228e+06 + z*(1.920456070447677979e+06 + z*(-1.584233864549583988e+06 + z*(-2.309984238192773424e+06 + z*(1.144273056586339138e+06 + z*(1.697513334400113672e+06 + z*(-4.626319379463236546e+05 + z*(-6.976524838820623700e+05 + z*(8.032336277123630862e+04 + z*(1.230222234939362388e+05)))))))))))))))))))))))) + y*(6.288068382602367734e+01 + z*(2.181154891717047661e+01 + z*(2.860408518879199136e+01 + z*(-1.494009087320708034e+02 + z*(-1.061145333109224794e+03 + z*(4.020564266511468759e+03 + z*(2.373605383832972439e+04 + z*(-4.315158816591878713e+04 + z*(-2.532200050676352985e+05 + z*(2.393673420546726556e+05 + z*(1.520644419642817462e+06 + z*(-7.280221039307423634e+05 + z*(-5.584976951314716600e+06 + z*(1.149906936896512052e+06 + z*(1.307614078003774025e+07 + z*(-5.974084741256926209e+05 + z*(-1.988406107216059044e+07 + z*(-8.518328355720469262e+05 + z*(1.955172773808510229e+07 + z*(1.604549454341216478e+06 + z*(-1.199017478529632650e+07 + z*(-1.010800135480978526e+06 + z*(4.168194198234793264e+06 + z*(2.334896771270080935e+05 + z*(-6.270018772670945618e+05)))))))))))))))))))))))) + y*(9.030532145634479591e+00 + z*(4.985564066973208419e+00 + z*(-1.291988447505088686e+02 + z*(-1.056821741885343044e+03 + z*(3.967039342290925106e+03 + z*(4.119489896542051429e+04 + z*(-2.821662024389951330e+04 + z*(-6.111422577491264092e+05 + z*(-1.505132958284992492e+05 + z*(4.638359727481221780e+06 + z*(3.028543292078493629e+06 + z*(-2.058592177405845001e+07 + z*(-1.790891111141181737e+07 + z*(5.696507487594346702e+07 + z*(5.699645407327073812e+07 + z*(-1.011344778641311377e+08 + z*(-1.098470846891337335e+08 + z*(1.152445539054430276e+08 + z*(1.320836440761902183e+08 + z*(-8.152496270914727449e+07 + z*(-9.705072926272957027e+07 + z*(3.260481961256195232e+07 + z*(3.993024045060925186e+07 + z*(-5.636450617432769388e+06 + z*(-7.057271502509558573e+06)))))))))))))))))))))))) + y*(2.941096803541646487e+00 + z*(-2.752678910689553504e+01 + z*(-2.901348893192551941e+02 + z*(2.999555186295652675e+03 + z*(2.087920026426365075e+04 + z*(-7.329192657859151950e+04 + z*(-4.733710689602597267e+05 + z*(7.260799404961097753e+05 + z*(4.990395940770795569e+06 + z*(-3.533908171249499079e+06 + z*(-2.926112908456556499e+07 + z*(8.520272430202215910e+06 + z*(1.045037548462848514e+08 + z*(-6.609430043856638484e+06 + z*(-2.386126573842636347e+08 + z*(-1.472317543661544658e+07 + z*(3.554893668770879507e+08 + z*(4.374279695305391401e+07 + z*(-3.438114466961137056e+08 + z*(-4.824216154430409521e+07 + z*(2.079265667070212364e+08 + z*(2.563368164835204557e+07 + z*(-7.137564294666650891e+07 + z*(-5.443838225410964340e+06 + z*(1.060357180309380405e+07)))))))))))))))))))))))) + y*(-4.950849443920988335e+01 + z*(-1.565286963851262136e+01 + z*(2.166524714388191114e+03 + z*(1.389586959583997850e+04 + z*(-6.542993345669833070e+04 + z*(-5.634328529795029899e+05 + z*(4.759240737364907982e+05 + z*(8.259564572851442732e+06 + z*(1.795790866794629721e+06 + z*(-6.125433188260118663e+07 + z*(-4.075147791021275520e+07 + z*(2.648437207162547112e+08 + z*(2.377648530880570710e+08 + z*(-7.157742298527172804e+08 + z*(-7.406389506376814842e+08 + z*(1.246702700656910658e+09 + z*(1.399934006524906635e+09 + z*(-1.400038661927073002e+09 + z*(-1.657064468288629293e+09 + z*(9.797997280549165010e+08 + z*(1.202824068883209229e+09 + z*(-3.888513960356042385e+08 + z*(-4.903468064286844730e+08 + z*(6.686246901190461963e+07 + z*(8.607035376436197758e+07)))))))))))))))))))))))) + y*(1.050257850461809426e+02 + z*(2.079012554543236604e+02 + z*(1.499982591567820918e+03 + z*(-1.965541381664532310e+04 + z*(-1.311292265964850376e+05 + z*(4.418460822408058448e+05 + z*(3.050347750685090199e+06 + z*(-3.751611464731859509e+06 + z*(-3.167508328310244158e+07 + z*(1.337018898732612096e+07 + z*(1.800812569755443633e+08 + z*(-7.937622067335135303e+06 + z*(-6.208238816577585936e+08 + z*(-9.221076322421406209e+07 + z*(1.367612679750129223e+09 + z*(3.331984834013928771e+08 + z*(-1.965813236557734013e+09 + z*(-5.469021449710315466e+08 + z*(1.832776370273340464e+09 + z*(4.921296321391189694e+08 + z*(-1.065915172138106465e+09 + z*(-2.350340525407431722e+08 + z*(3.503039980256016850e+08 + z*(4.671549480094359815e+07 + z*(-4.946768011800428480e+07)))))))))))))))))))))))) + y*(4.937820721702505580e+02 + z*(5.883798246258008646e+01 + z*(-1.366493023414058734e+04 + z*(-7.912590635459929763e+04 + z*(3.991192190407770686e+05 + z*(3.227344189600832295e+06 + z*(-2.763886839544879738e+06 + z*(-4.660060448592625558e+07 + z*(-1.157706562784797885e+07 + z*(3.388599089037594795e+08 + z*(2.392109318118292391e+08 + z*(-1.437820894403694153e+09 + z*(-1.353489241596730232e+09 + z*(3.823522555478221416e+09 + z*(4.127064388542381763e+09 + z*(-6.571968646845679283e+09 + z*(-7.675299313970352173e+09 + z*(7.302724014033878326e+09 + z*(8.971496924426128387e+09 + z*(-5.068555955399542809e+09 + z*(-6.448649516168077469e+09 + z*(1.998665995454362392e+09 + z*(2.608806740009688854e+09 + z*(-3.419747524487121701e+08 + z*(-4.551856844758121371e+08)))))))))))))))))))))))) + y*(-2.728287660954472926e+02 + z*(-6.277303016161095002e+02 + z*(-3.448655468543635834e+03 + z*(6.158323250022484717e+04 + z*(3.896835302456336212e+05 + z*(-1.270970609283534344e+06 + z*(-9.292896476723177359e+06 + z*(8.844334518869543448e+06 + z*(9.474591160712525249e+07 + z*(-1.521755997005400807e+07 + z*(-5.227026630038547516e+08 + z*(-1.007084752426799834e+08 + z*(1.741297510971349478e+09 + z*(6.371619308541390896e+08 + z*(-3.696437888873962879e+09 + z*(-1.647422203566278696e+09 + z*(5.101911939829701424e+09 + z*(2.376585586548035622e+09 + z*(-4.541856907463313103e+09 + z*(-1.991937553433038950e+09 + z*(2.499693546044823170e+09 + z*(9.088654887998188734e+08 + z*(-7.663186805847496986e+08 + z*(-1.749615683559790850e+08 + z*(9.857395668394218385e+07)))))))))))))))))))))))) + y*(-1.517281470885296358e+03 + z*(-9.152560245838486708e+01 + z*(4.139097502084865846e+04 + z*(2.271633922066787782e+05 + z*(-1.175558844343211735e+06 + z*(-9.205936844927279279e+06 + z*(7.781911506291470490e+06 + z*(1.308007495887982696e+08 + z*(3.540380502134406567e+07 + z*(-9.370118207669389248e+08 + z*(-6.842071359557167292e+08 + z*(3.926715747211123466e+09 + z*(3.794422486807079792e+09 + z*(-1.033840387475217819e+10 + z*(-1.142047504915552139e+10 + z*(1.763065452181689072e+10 + z*(2.103818734320499039e+10 + z*(-1.947146868196193695e+10 + z*(-2.441449959638659668e+10 + z*(1.345091758004379845e+10 + z*(1.745211050511024857e+10 + z*(-5.285086104251585007e+09 + z*(-7.030183958811644554e+09 + z*(9.018610672626636028e+08 + z*(1.222594688506643772e+09)))))))))))))))))))))))) + y*(3.408478290566491751e+02 + z*(9.900950557924277291e+02 + z*(3.640202009901340716e+03 + z*(-1.031426899251240684e+05 + z*(-6.066965035342182964e+05 + z*(1.947388856399187353e+06 + z*(1.466720679454659857e+07 + z*(-1.107839231898345426e+07 + z*(-1.468731284198541045e+08 + z*(-4.333769850498973392e+06 + z*(7.903495920381195545e+08 + z*(2.950780165766441226e+08 + z*(-2.560137174295577526e+09 + z*(-1.387401895672941923e+09 + z*(5.266652722541958809e+09 + z*(3.268906527935914993e+09 + z*(-7.007603728032612801e+09 + z*(-4.494847426505089760e+09 + z*(5.961915270758785248e+09 + z*(3.655739210487987518e+09 + z*(-3.089695775503126144e+09 + z*(-1.633594170645374537e+09 + z*(8.681583737146795988e+08 + z*(3.096867424735845923e+08 + z*(-9.683036875992013514e+07)))))))))))))))))))))))) + y*(2.252268186882685768e+03 + z*(3.243133550094376005e+01 + z*(-6.495110449777176837e+04 + z*(-3.444782258179711062e+05 + z*(1.788257573943195865e+06 + z*(1.370609920366872475e+07 + z*(-1.153728968626333587e+07 + z*(-1.917392443027083874e+08 + z*(-5.273376309290602803e+07 + z*(1.357886138746996880e+09 + z*(9.986388705331211090e+08 + z*(-5.642484500273832321e+09 + z*(-5.485938370470292091e+09 + z*(1.476303376476755333e+10 + z*(1.640261239197759819e+10 + z*(-2.506051769534099197e+10 + z*(-3.006934776285120392e+10 + z*(2.758458732729300308e+10 + z*(3.476910858703864288e+10 + z*(-1.901017266886256409e+10 + z*(-2.478731151016448212e+10 + z*(7.457226583111355782e+09 + z*(9.965372064760780334e+09 + z*(-1.271181838309214592e+09 + z*(-1.730587778119848013e+09)))))))))))))))))))))))) + y*(-2.172207638132884711e+02 + z*(-8.696918736424898952e+02 + z*(-1.802106187442866940e+03 + z*(8.731302227564665372e+04 + z*(4.762211778792960686e+05 + z*(-1.525571473769431468e+06 + z*(-1.153513602675684541e+07 + z*(7.358978859036830254e+06 + z*(1.136653678973466903e+08 + z*(1.694231465278982744e+07 + z*(-6.001063336111956835e+08 + z*(-2.954840672953883410e+08 + z*(1.904036096462073565e+09 + z*(1.263630431954425335e+09 + z*(-3.826448354301529884e+09 + z*(-2.863728962813964844e+09 + z*(4.949640138336762428e+09 + z*(3.850884349893603325e+09 + z*(-4.057890653534729004e+09 + z*(-3.086006777769191265e+09 + z*(1.992711142582301855e+09 + z*(1.364451679219254732e+09 + z*(-5.117724498562152386e+08 + z*(-2.566088910041853189e+08 + z*(4.722580581366425753e+07)))))))))))))))))))))))) + y*(-1.641509648021469957e+03 + z*(-4.183342788379647459e+01 + z*(5.036086669539375725e+04 + z*(2.624391233933081385e+05 + z*(-1.347030679073156789e+06 + z*(-1.017743295900129899e+07 + z*(8.593682492565819994e+06 + z*(1.403361205107216239e+08 + z*(3.761621169753444940e+07 + z*(-9.847702102667410374e+08 + z*(-7.177883003212174177e+08 + z*(4.066921022117974758e+09 + z*(3.930622086628239155e+09 + z*(-1.059601432065019798e+10 + z*(-1.171733569467222404e+10 + z*(1.793557950009281540e+10 + z*(2.143103123494425964e+10 + z*(-1.970486351216841888e+10 + z*(-2.473939608146897125e+10 + z*(1.356397949417164230e+10 + z*(1.761668416873649979e+10 + z*(-5.317490689722764969e+09 + z*(-7.077233532040304184e+09 + z*(9.062379812558547258e+08 + z*(1.228503825706342697e+09)))))))))))))))))))))))) + y*(5.561748363917260463e+01 + z*(3.158069579092036179e+02 + z*(3.631001163934757869e+02 + z*(-2.898604248035891578e+04 + z*(-1.480009778376319155e+05 + z*(4.770135441785729490e+05 + z*(3.561470325744590722e+06 + z*(-2.059508746202900773e+06 + z*(-3.461097110810897499e+07 + z*(-7.455294544204601087e+06 + z*(1.801671640601356924e+08 + z*(1.012476286812072843e+08 + z*(-5.634227349914150238e+08 + z*(-4.157623579024872184e+08 + z*(1.114367395000024319e+09 + z*(9.245493481170419455e+08 + z*(-1.413913928781310320e+09 + z*(-1.228924494806074858e+09 + z*(1.129333581220372915e+09 + z*(9.770011385570333004e+08 + z*(-5.326362264028414488e+08 + z*(-4.294513291665779948e+08 + z*(1.267615508638068438e+08 + z*(8.040655077224311233e+07 + z*(-9.459674987755060196e+06)))))))))))))))))))))))) + y*(4.691766429943609182e+02 + z*(4.374088788873460487e+01 + z*(-1.519438537174356679e+04 + z*(-7.890424519346721354e+04 + z*(3.965558545621752855e+05 + z*(2.973430988519595470e+06 + z*(-2.519964955603604205e+06 + z*(-4.046233954237323999e+07 + z*(-1.038079249834633619e+07 + z*(2.817727712643904686e+08 + z*(2.020512539180299640e+08 + z*(-1.158112096961148262e+09 + z*(-1.106251978471839428e+09 + z*(3.008110087607766151e+09 + z*(3.293905701693086624e+09 + z*(-5.081878580654203415e+09 + z*(-6.018442519277949333e+09 + z*(5.576754828598608971e+09 + z*(6.942615107763648033e+09 + z*(-3.836540261712131977e+09 + z*(-4.941712373864656448e+09 + z*(1.503776994787800550e+09 + z*(1.984912021404342651e+09 + z*(-2.563160732487373948e+08 + z*(-3.445580890259437561e+08))))))))))))))))))))))))))))))))))))))  # noqa: E501
+
+    # Return T converted to K
+    return T + 273.15
@@ -32,6 +32,30 @@ Functions for calculating the following thermodynamic variables:
 * wet-bulb potential temperature, thetaw
 * saturated wet-bulb potential temperature, thetaws
 
+Floating-point precision:
+All functions return results with the floating-point type of their inputs
+(numpy.result_type of the array arguments, with Python floats and integers
+treated as weak scalars), so float32 inputs (e.g., ERA5 fields, which can be
+cast with .astype('float32') if xarray has unpacked them to float64) keep the
+full chain from specific humidity to wet-bulb temperature in single
+precision, halving memory use and bandwidth. Two steps are always evaluated
+in double precision internally and the result rounded: the pseudoadiabat
+polynomial fits, and the Lambert W function in the dewpoint, frost-point,
+and saturation-point temperatures and lifting levels (whose argument
+underflows single precision for ice). For ERA5-like inputs (500-1050 hPa,
+-40 to 50 degC, dewpoint depression up to 40 K), the maximum difference
+between float32 and float64 inputs (benchmarks/check_float32.py, which
+covers every function in this module and in atmos.moisture) is:
+* about 1e-4 K for temperatures (Td, Tf, Ts, the lifting level
+    temperatures, isobaric Tw, and adiabatic Tw and thetaw with the
+    polynomial, bicubic, or compiled pseudoadiabat methods), except for the
+    approximate ice polynomial fits, whose thetaws differs by up to 3.5e-4 K
+* about 4e-4 K with pseudo_method='iterative', whose errors accumulate over
+    the 5 hPa steps
+* a few parts in 1e6 for saturation vapour pressure, saturation specific
+    humidity and mixing ratio, and relative humidity, where the exponential
+    in the Ambaum (2020) equation amplifies single-precision round-off
+
 References:
 * Ambaum, M. H., 2020: Accurate, simple equation for saturated vapour
     pressure over water and ice. Quart. J. Roy. Met. Soc., 146, 4252-4258,
@@ -48,14 +72,188 @@ References:
 """
 
 
+from functools import partial
+import warnings
 import numpy as np
-from scipy.special import lambertw
 from atmos.constant import (Rd, Rv, eps, cpd, cpv, cpl, cpi, p_ref,
                             T0, es0, Lv0, Lf0, Ls0, T_liq, T_ice)
+from atmos.lambertw import lambertw_m1
 import atmos.pseudoadiabat as pseudoadiabat
+import atmos.pseudoadiabat_ice as pseudoadiabat_ice
+import atmos.pseudoadiabat_mixed as pseudoadiabat_mixed
+import atmos.pseudoadiabat_bicubic as pseudoadiabat_bicubic
+import atmos.kernels as kernels
+
+# Polynomial fits to pseudoadiabats for each condensed water phase. The ice
+# and mixed-phase fits (generated by pseudoadiabat_codegen.py) are less
+# accurate than the liquid fits, so they are only used if requested with
+# pseudo_method='polynomial_approx'
+POLYNOMIAL_FITS = {'liquid': pseudoadiabat,
+                   'ice': pseudoadiabat_ice,
+                   'mixed': pseudoadiabat_mixed}
+
+
+def _is_xarray(*args):
+    """
+    Returns True if any argument is an xarray object.
+
+    """
+    return any(type(x).__module__.startswith('xarray.') for x in args)
+
+
+def _is_lazy(*args):
+    """
+    Returns True if any argument is a dask array (or an object wrapping
+    one, such as a dask-backed DataArray).
+
+    """
+    try:
+        import dask
+        import dask.array as da
+    except ImportError:
+        return False
+
+    return any(dask.is_dask_collection(x) or
+               isinstance(getattr(x, 'data', None), da.Array) for x in args)
+
+
+def _apply_xarray(func, *args, **kwargs):
+    """
+    Applies func to the data of xarray arguments and returns an xarray
+    object, so that xarray inputs give xarray outputs. Array keyword
+    arguments are aligned and passed along with args; dask-backed data is
+    passed as dask arrays.
+
+    """
+    import xarray as xr
+
+    names = [k for k, v in kwargs.items() if _is_xarray(v)]
+    static = {k: v for k, v in kwargs.items() if k not in names}
+
+    def inner(*data):
+        return func(*data[:len(args)], **static,
+                    **dict(zip(names, data[len(args):])))
+
+    return xr.apply_ufunc(inner, *args, *[kwargs[k] for k in names],
+                          dask='allowed')
+
+
+def _map_blocks(func, *args, **kwargs):
+    """
+    Applies func block by block to dask array arguments, for functions whose
+    in-place (out/work) computations only support NumPy arrays. Array
+    keyword arguments are passed block by block along with args.
+
+    """
+    import dask.array as da
+
+    names = [k for k, v in kwargs.items() if np.ndim(v) > 0]
+    static = {k: v for k, v in kwargs.items() if k not in names}
+    arrays = da.broadcast_arrays(*[da.asarray(x) for x in
+                                   list(args) + [kwargs[k] for k in names]])
+    dtype = np.result_type(*[x.dtype for x in arrays], 1.0)
+
+    def block(*blocks):
+        return func(*blocks[:len(args)], **static,
+                    **dict(zip(names, blocks[len(args):])))
+
+    return da.map_blocks(block, *arrays, dtype=dtype)
+
+
+def _evaluate_fit(fit, x, y):
+    """
+    Evaluates a pseudoadiabat polynomial fit, storing the result with the
+    floating-point type of the inputs (the polynomials themselves are always
+    evaluated in double precision).
+
+    """
+    if _is_xarray(x, y):
+        return _apply_xarray(partial(_evaluate_fit, fit), x, y)
+    if _is_lazy(x, y):
+        return _map_blocks(partial(_evaluate_fit, fit), x, y)
+
+    shape = np.broadcast_shapes(np.shape(x), np.shape(y))
+    out = np.empty(shape, dtype=np.result_type(x, y, 1.0))
+    with np.errstate(invalid='ignore'):  # NaN is returned outside the fit
+        fit(x, y, out=out)
+
+    return out[()]
+
+
+def _check_overlap(out, work, *args):
+    """
+    Raises a ValueError if the out or work arrays share memory with any of
+    the array arguments, which the in-place calculations would overwrite
+    while they are still needed.
+
+    """
+    buffers = ([] if out is None else [out]) + \
+        ([] if work is None else list(work))
+    for x in args:
+        if isinstance(x, np.ndarray) and \
+                any(np.shares_memory(b, x) for b in buffers):
+            raise ValueError('out and work must not share memory with the '
+                             'inputs')
+
+
+def _prepare_output(out, work, nwork, *args):
+    """
+    Returns the output array and scratch arrays for functions that support
+    the out and work arguments, allocating any that are not supplied (and
+    checking that any supplied do not overlap the array arguments). The
+    scratch arrays are the first nwork elements of work along its leading
+    dimension.
+
+    """
+    args = [x for x in args if x is not None]
+    _check_overlap(out, work, *args)
+    if out is None:
+        shape = np.broadcast_shapes(*[np.shape(x) for x in args])
+        out = np.empty(shape, dtype=np.result_type(*args, 1.0))
+    if work is None:
+        work = [np.empty_like(out) for _ in range(nwork)]
+    elif len(work) < nwork:
+        raise ValueError(f'work must contain at least {nwork} arrays')
+
+    return out, work
+
+
+def _as_float64(x):
+    """
+    Returns x with double-precision floating-point type (x itself if it
+    already has that type).
+
+    """
+    if getattr(x, 'dtype', None) == np.float64:
+        return x
+    if hasattr(x, 'astype'):
+        return x.astype(np.float64)
+
+    return np.float64(x)
+
+
+def _lambertw_temperature(RH, a, c, T):
+    """
+    Computes the temperature c * T / W, where W is the k=-1 branch of the
+    Lambert W function of RH^a * c * exp(c), as in the dewpoint, frost-point,
+    and saturation-point temperature equations of Romps (2021) and the
+    lifting level equations of Romps (2017).
+
+    The Lambert W argument is computed in double precision and the result is
+    returned with the floating-point type of the inputs. For ice, c is about
+    -170 and c * exp(c) underflows to zero in single precision.
+
+    """
+    dtype = np.result_type(RH, a, c, T, 1.0)
+    RH, a, c, T = [_as_float64(x) for x in (RH, a, c, T)]
+    fn = np.power(RH, a) * c * np.exp(c)
+    W = lambertw_m1(fn)
+    Tx = c * (1 / W) * T
+
+    return Tx.astype(dtype)
 
 
-def effective_gas_constant(q, qt=None):
+def effective_gas_constant(q, qt=None, out=None):
     """
     Computes effective gas constant for moist air.
 
@@ -63,20 +261,29 @@ def effective_gas_constant(q, qt=None):
         q (float or ndarray): specific humidity (kg/kg)
         qt (float or ndarray, optional): total water mass fraction (kg/kg)
             (default is None, which implies qt = q)
+        out (ndarray, optional): array in which to store the result, which
+            must not share memory with the inputs (default is None)
 
     Returns:
         Rm (float or ndarray): effective gas constant (J/kg/K)
 
     """
-    if qt is None:
-        Rm = (1 - q) * Rd + q * Rv
-    else:
-        Rm = (1 - qt) * Rd + q * Rv
+    if out is None and qt is None:
+        return (1 - q) * Rd + q * Rv
+    if out is None:
+        return (1 - qt) * Rd + q * Rv
+
+    # Rm = Rd * (1 - qt + q * Rv / Rd), computed in place
+    _check_overlap(out, None, q, qt)
+    np.multiply(q, Rv / Rd, out=out)
+    np.subtract(out, q if qt is None else qt, out=out)
+    np.add(out, 1, out=out)
+    np.multiply(out, Rd, out=out)
 
-    return Rm
+    return out
 
 
-def effective_specific_heat(q, qt=None, omega=0.0):
+def effective_specific_heat(q, qt=None, omega=0.0, out=None, work=None):
     """
     Computes effective isobaric specific heat for moist air.
 
@@ -85,11 +292,38 @@ def effective_specific_heat(q, qt=None, omega=0.0):
         qt (float or ndarray, optional): total water mass fraction (kg/kg)
             (default is None, which implies qt = q)
         omega (float or ndarray, optional): ice fraction
+        out (ndarray, optional): array in which to store the result, which
+            must not share memory with the inputs (default is None)
+        work (ndarray, optional): scratch arrays with the shape of out
+            stacked along the leading dimension (at least 1 is needed if qt
+            is given; default is None)
 
     Returns:
         cpm (float or ndarray): effective isobaric specific heat (J/kg/K)
 
     """
+    if out is not None:
+
+        # cpm = cpd + q * (cpv - cpd), computed in place
+        out, work = _prepare_output(out, work, 0 if qt is None else 1, q,
+                                    qt, omega)
+        np.multiply(q, cpv - cpd, out=out)
+        np.add(out, cpd, out=out)
+        if qt is None:
+            return out
+
+        # Add the condensate contribution, (qt - q) * (cpx - cpd), where
+        # cpx = cpl + omega * (cpi - cpl)
+        np.subtract(qt, q, out=work[0])
+        np.multiply(work[0], cpl - cpd, out=work[0])
+        np.add(out, work[0], out=out)
+        np.subtract(qt, q, out=work[0])
+        np.multiply(work[0], omega, out=work[0])
+        np.multiply(work[0], cpi - cpl, out=work[0])
+        np.add(out, work[0], out=out)
+
+        return out
+
     if qt is None:
         cpm = (1 - q) * cpd + q * cpv
     else:
@@ -278,7 +512,8 @@ def vapour_pressure(p, q, qt=None):
     return e
 
 
-def saturation_vapour_pressure(T, phase='liquid', omega=0.0):
+def saturation_vapour_pressure(T, phase='liquid', omega=0.0, out=None,
+                               work=None):
     """
     Computes saturation vapour pressure (SVP) for a given temperature using
     equations from Ambaum (2020).
@@ -289,50 +524,95 @@ def saturation_vapour_pressure(T, phase='liquid', omega=0.0):
             'liquid', 'ice', or 'mixed'; default is 'liquid')
         omega (float or ndarray, optional): ice fraction at saturation
             (default is 0.0)
+        out (ndarray, optional): array in which to store the result, which
+            must not share memory with the inputs (default is None)
+        work (ndarray, optional): scratch arrays with the shape of out
+            stacked along the leading dimension (at least 2 are needed;
+            default is None)
 
     Returns:
         es (float or ndarray): saturation vapour pressure (Pa)
 
     """
-   
-    if phase == 'liquid':
-        
-        # Compute latent heat of vaporisation
-        Lv = latent_heat_of_vaporisation(T)
 
-        # Compute SVP over liquid water (Ambaum 2020, Eq. 13)
-        es = es0 * np.power((T0 / T), ((cpl - cpv) / Rv)) * \
-            np.exp((Lv0 / (Rv * T0)) - (Lv / (Rv * T)))
-        
+    if phase not in ('liquid', 'ice', 'mixed'):
+        raise ValueError("phase must be one of 'liquid', 'ice', or 'mixed'")
+
+    if out is None and work is None:
+
+        if phase == 'liquid':
+
+            # Compute latent heat of vaporisation
+            Lv = latent_heat_of_vaporisation(T)
+
+            # Compute SVP over liquid water (Ambaum 2020, Eq. 13)
+            es = es0 * np.power((T0 / T), ((cpl - cpv) / Rv)) * \
+                np.exp((Lv0 / (Rv * T0)) - (Lv / (Rv * T)))
+
+        elif phase == 'ice':
+
+            # Compute latent heat of sublimation
+            Ls = latent_heat_of_sublimation(T)
+
+            # Compute SVP over ice (Ambaum 2020, Eq. 17)
+            es = es0 * np.power((T0 / T), ((cpi - cpv) / Rv)) * \
+                np.exp((Ls0 / (Rv * T0)) - (Ls / (Rv * T)))
+
+        else:
+
+            # Compute mixed-phase specific heat
+            cpx = (1 - omega) * cpl + omega * cpi
+
+            # Compute mixed-phase latent heat at the triple point
+            Lx0 = (1 - omega) * Lv0 + omega * Ls0
+
+            # Compute mixed-phase latent heat
+            Lx = Lx0 - (cpx - cpv) * (T - T0)
+
+            # Compute mixed-phase SVP
+            es = es0 * np.power((T0 / T), ((cpx - cpv) / Rv)) * \
+                np.exp((Lx0 / (Rv * T0)) - (Lx / (Rv * T)))
+
+        return es
+
+    # In-place calculation: the liquid and ice SVPs are the mixed-phase SVP
+    # with omega = 0 and 1, respectively
+    if phase == 'liquid':
+        omega = 0.0
     elif phase == 'ice':
-        
-        # Compute latent heat of sublimation
-        Ls = latent_heat_of_sublimation(T)
+        omega = 1.0
 
-        # Compute SVP over ice (Ambaum 2020, Eq. 17)
-        es = es0 * np.power((T0 / T), ((cpi - cpv) / Rv)) * \
-            np.exp((Ls0 / (Rv * T0)) - (Ls / (Rv * T)))
-        
-    elif phase == 'mixed':
-        
-        # Compute mixed-phase specific heat
-        cpx = (1 - omega) * cpl + omega * cpi
-        
-        # Compute mixed-phase latent heat at the triple point
-        Lx0 = (1 - omega) * Lv0 + omega * Ls0
+    user_out = out is not None
+    out, work = _prepare_output(out, work, 2, T, omega)
+    A, B = work[0], work[1]
 
-        # Compute mixed-phase latent heat
-        Lx = Lx0 - (cpx - cpv) * (T - T0)
-        
-        # Compute mixed-phase SVP
-        es = es0 * np.power((T0 / T), ((cpx - cpv) / Rv)) * \
-            np.exp((Lx0 / (Rv * T0)) - (Lx / (Rv * T)))
-        
-    else:
+    # Compute mixed-phase specific heat minus cpv (A) and mixed-phase latent
+    # heat at the triple point (B)
+    np.multiply(omega, cpi - cpl, out=A)
+    np.add(A, cpl - cpv, out=A)
+    np.multiply(omega, Ls0 - Lv0, out=B)
+    np.add(B, Lv0, out=B)
 
-        raise ValueError("phase must be one of 'liquid', 'ice', or 'mixed'")
+    # Compute mixed-phase latent heat, Lx = Lx0 - (cpx - cpv) * (T - T0)
+    np.subtract(T, T0, out=out)
+    np.multiply(out, A, out=out)
+    np.subtract(B, out, out=out)
+
+    # Compute the exponential term (Ambaum 2020, Eq. 13 and 17)
+    np.divide(out, T, out=out)
+    np.divide(B, T0, out=B)
+    np.subtract(B, out, out=out)
+    np.divide(out, Rv, out=out)
+    np.exp(out, out=out)
 
-    return es
+    # Multiply by the power-law term and es0
+    np.divide(T0, T, out=B)
+    np.divide(A, Rv, out=A)
+    np.power(B, A, out=B)
+    np.multiply(out, B, out=out)
+    np.multiply(out, es0, out=out)
+
+    return out if user_out else out[()]
 
 
 def saturation_specific_humidity(p, T, qt=None, phase='liquid', omega=0.0):
@@ -384,7 +664,8 @@ def saturation_mixing_ratio(p, T, phase='liquid', omega=0.0):
     return rs
 
 
-def relative_humidity(p, T, q, qt=None, phase='liquid', omega=0.0):
+def relative_humidity(p, T, q, qt=None, phase='liquid', omega=0.0, out=None,
+                      work=None):
     """
     Computes relative humidity with respect to specified phase from pressure, 
     temperature, and specific humidity.
@@ -399,16 +680,41 @@ def relative_humidity(p, T, q, qt=None, phase='liquid', omega=0.0):
             'liquid', 'ice', or 'mixed'; default is 'liquid')
         omega (float or ndarray, optional): ice fraction at saturation 
             (default is 0.0)
+        out (ndarray, optional): array in which to store the result, which
+            must not share memory with the inputs (default is None)
+        work (ndarray, optional): scratch arrays with the shape of out
+            stacked along the leading dimension (at least 2 are needed;
+            default is None)
         
     Returns:
         RH (float or ndarray): relative humidity (fraction)
 
     """
-    e = vapour_pressure(p, q, qt=qt)
-    es = saturation_vapour_pressure(T, phase=phase, omega=omega)
-    RH = e / es
+    if out is None and work is None:
+        e = vapour_pressure(p, q, qt=qt)
+        es = saturation_vapour_pressure(T, phase=phase, omega=omega)
+        RH = e / es
+
+        return RH
+
+    user_out = out is not None
+    out, work = _prepare_output(out, work, 2, p, T, q, qt, omega)
 
-    return RH
+    # Compute the SVP
+    saturation_vapour_pressure(T, phase=phase, omega=omega, out=out,
+                               work=work)
+
+    # Compute the vapour pressure, e = p * q / (eps * (1 - qt) + q)
+    np.subtract(1, q if qt is None else qt, out=work[0])
+    np.multiply(work[0], eps, out=work[0])
+    np.add(work[0], q, out=work[0])
+    np.multiply(p, q, out=work[1])
+    np.divide(work[1], work[0], out=work[1])
+
+    # Compute the relative humidity
+    np.divide(work[1], out, out=out)
+
+    return out if user_out else out[()]
 
 
 def dewpoint_temperature(p, T, q):
@@ -434,9 +740,7 @@ def dewpoint_temperature(p, T, q):
     c = (Lv0 - (cpv - cpl) * T0) / ((cpv - cpl) * T)
 
     # Compute dewpoint temperature (Romps 2021, Eq. 5)
-    fn = np.power(RH, (Rv / (cpl - cpv))) * c * np.exp(c)
-    W = lambertw(fn, k=-1).real
-    Td = c * (1 / W) * T
+    Td = _lambertw_temperature(RH, Rv / (cpl - cpv), c, T)
     
     # Ensure that Td does not exceed T
     Td = np.minimum(Td, T)
@@ -466,9 +770,7 @@ def frost_point_temperature(p, T, q):
     c = (Ls0 - (cpv - cpi) * T0) / ((cpv - cpi) * T)
 
     # Compute frost-point temperature (Romps 2021, Eq. 7)
-    fn = np.power(RH, (Rv / (cpi - cpv))) * c * np.exp(c)
-    W = lambertw(fn, k=-1).real  # -1 branch because cpi > cpv
-    Tf = c * (1 / W) * T
+    Tf = _lambertw_temperature(RH, Rv / (cpi - cpv), c, T)
     
     # Ensure that Tf does not exceed T
     Tf = np.minimum(Tf, T)
@@ -476,7 +778,97 @@ def frost_point_temperature(p, T, q):
     return Tf
 
 
-def saturation_point_temperature(p, T, q, converged=0.001):
+def _iterate_active_set(update, x, args, converged, name, max_iter=20):
+    """
+    Iterates x = update(*args, x) to convergence, recomputing only those
+    elements that have not yet converged. The active elements (and the
+    corresponding arguments) are compacted after each iteration, so that the
+    cost of each iteration is proportional to the number of unconverged
+    elements.
+
+    Args:
+        update (function): function returning the updated solution
+        x (float or ndarray): initial guess
+        args (tuple): other arguments of update (broadcast against x)
+        converged (float): target precision
+        name (str): name of the solution variable (for warning messages)
+        max_iter (int, optional): maximum number of iterations (default is 20)
+
+    Returns:
+        x (float or ndarray): solution
+        niter (int or ndarray): number of iterations for each element
+
+    """
+
+    # Broadcast and flatten the initial guess and other arguments
+    shape = np.broadcast_shapes(np.shape(x), *[np.shape(arg) for arg in args])
+    x = np.broadcast_to(x, shape).flatten()
+    args = [np.broadcast_to(arg, shape).ravel() for arg in args]
+    niter = np.zeros(x.size, dtype=int)
+
+    # Iterate over the active (unconverged) elements
+    active = np.arange(x.size)
+    for count in range(1, max_iter + 1):
+
+        # Update the active elements
+        x_new = update(*args, x[active])
+        delta = np.abs(x_new - x[active])
+        x[active] = x_new
+        niter[active] = count
+
+        # Compact the active set
+        unconverged = delta > converged
+        if not np.any(unconverged):
+            break
+        active = active[unconverged]
+        args = [arg[unconverged] for arg in args]
+
+    else:
+        print(f"{name} not converged after {max_iter} iterations in "
+              f"{active.size} elements")
+
+    return x.reshape(shape)[()], niter.reshape(shape)[()]
+
+
+def _saturation_point_temperature_update(p, T, q, Ts):
+    """
+    Performs one iteration of the saturation-point temperature calculation.
+
+    Args:
+        p (float or ndarray): pressure (Pa)
+        T (float or ndarray): temperature (K)
+        q (float or ndarray): specific humidity (kg/kg)
+        Ts (float or ndarray): previous saturation-point temperature (K)
+
+    Returns:
+        Ts (float or ndarray): updated saturation-point temperature (K)
+
+    """
+
+    # Compute the ice fraction
+    omega = ice_fraction(Ts)
+
+    # Compute the mixed-phase relative humidity
+    RH = relative_humidity(p, T, q, phase='mixed', omega=omega)
+    #RH = np.minimum(RH, 1.0)  # limit RH to 100 %
+
+    # Compute mixed-phase specific heat
+    cpx = (1 - omega) * cpl + omega * cpi
+
+    # Compute mixed-phase latent heat at the triple point
+    Lx0 = (1 - omega) * Lv0 + omega * Ls0
+
+    # Set constant (cf. Romps 2021, Eq. 6 and 8)
+    c = (Lx0 - (cpv - cpx) * T0) / ((cpv - cpx) * T)
+
+    # Compute saturation-point temperature (cf. Romps 2021, Eq. 5 and 7)
+    Ts = _lambertw_temperature(RH, Rv / (cpx - cpv), c, T)
+
+    return Ts
+
+
+def saturation_point_temperature(p, T, q, converged=0.001, active_set=False,
+                                 return_iterations=False):
     """
     Computes saturation-point temperature from pressure, temperature, and 
     specific humidity using equations similar to Romps (2021).
@@ -487,54 +879,56 @@ def saturation_point_temperature(p, T, q, converged=0.001):
         q (float or ndarray): specific humidity (kg/kg)
         converged (float, optional): target precision for saturation-point
             temperature (default is 0.001 K)
+        active_set (bool, optional): flag indicating whether to iterate only
+            over elements that have not yet converged (default is False)
+        return_iterations (bool, optional): flag indicating whether to also
+            return the number of iterations for each element (default is
+            False)
 
     Returns:
         Ts (float or ndarray): saturation-point temperature (K)
+        niter (int or ndarray): number of iterations (only returned if
+            return_iterations is True)
 
     """
 
-    # Intialise the saturation point temperature as the temperature
-    Ts = T.copy()
+    if active_set:
 
-    # Iterate to convergence
-    count = 0
-    delta = np.full_like(T, 10)
-    while np.max(delta) > converged:
+        # Iterate to convergence, updating only unconverged elements
+        Ts, niter = _iterate_active_set(_saturation_point_temperature_update,
+                                        T, (p, T, q), converged, 'Ts')
 
-        # Update the previous Ts value
-        Ts_prev = Ts
+    else:
 
-        # Compute the ice fraction
-        omega = ice_fraction(Ts)
+        # Intialise the saturation point temperature as the temperature
+        Ts = T.copy()
 
-        # Compute the mixed-phase relative humidity
-        RH = relative_humidity(p, T, q, phase='mixed', omega=omega)
-        #RH = np.minimum(RH, 1.0)  # limit RH to 100 %
+        # Iterate to convergence
+        count = 0
+        delta = np.full_like(T, 10)
+        while np.max(delta) > converged:
 
-        # Compute mixed-phase specific heat
-        cpx = (1 - omega) * cpl + omega * cpi
+            # Update the previous Ts value
+            Ts_prev = Ts
 
-        # Compute mixed-phase latent heat at the triple point
-        Lx0 = (1 - omega) * Lv0 + omega * Ls0
+            # Update the saturation-point temperature
+            Ts = _saturation_point_temperature_update(p, T, q, Ts)
 
-        # Set constant (cf. Romps 2021, Eq. 6 and 8)
-        c = (Lx0 - (cpv - cpx) * T0) / ((cpv - cpx) * T)
+            # Check if solution has converged
+            delta = np.abs(Ts - Ts_prev)
+            count += 1
+            if count > 20:
+                print("Ts not converged after 20 iterations")
+                break
 
-        # Compute saturation-point temperature (cf. Romps 2021, Eq. 5 and 7)
-        fn = np.power(RH, (Rv / (cpx - cpv))) * c * np.exp(c)
-        W = lambertw(fn, k=-1).real
-        Ts = c * (1 / W) * T
-   
-        # Check if solution has converged
-        delta = np.abs(Ts - Ts_prev)
-        count += 1
-        if count > 20:
-            print("Ts not converged after 20 iterations")
-            break
+        niter = np.full(np.shape(Ts), count)[()]
 
     # Ensure that Ts does not exceed T
     Ts = np.minimum(Ts, T)
 
+    if return_iterations:
+        return Ts, niter
+
     return Ts
 
 
@@ -568,9 +962,7 @@ def lifting_condensation_level(p, T, q):
     c = b / a
 
     # Compute temperature at the LCL (Romps 2017, Eq. 22a)
-    fn = np.power(RH, (1 / a)) * c * np.exp(c)
-    W = lambertw(fn, k=-1).real
-    T_lcl = c * (1 / W) * T
+    T_lcl = _lambertw_temperature(RH, 1 / a, c, T)
     
     # Compute pressure at the LCL (Romps 2017, Eq. 22b)
     p_lcl = p * np.power((T_lcl / T), (cpm / Rm))
@@ -612,9 +1004,7 @@ def lifting_deposition_level(p, T, q):
     c = b / a
 
     # Compute temperature at the LDL (Romps 2017, Eq. 23a)
-    fn = np.power(RH, (1 / a)) * c * np.exp(c)
-    W = lambertw(fn, k=-1).real
-    T_ldl = c * (1 / W) * T
+    T_ldl = _lambertw_temperature(RH, 1 / a, c, T)
     
     # Compute pressure at the LDL (Romps 2017, Eq. 23b)
     p_ldl = p * np.power((T_ldl / T), (cpm / Rm))
@@ -626,7 +1016,51 @@ def lifting_deposition_level(p, T, q):
     return p_ldl, T_ldl
 
 
-def lifting_saturation_level(p, T, q, converged=0.001):
+def _lifting_saturation_level_update(p, T, q, T_lsl):
+    """
+    Performs one iteration of the LSL temperature calculation.
+
+    Args:
+        p (float or ndarray): pressure (Pa)
+        T (float or ndarray): temperature (K)
+        q (float or ndarray): specific humidity (kg/kg)
+        T_lsl (float or ndarray): previous LSL temperature (K)
+
+    Returns:
+        T_lsl (float or ndarray): updated LSL temperature (K)
+
+    """
+
+    # Compute the ice fraction
+    omega = ice_fraction(T_lsl)
+
+    # Compute effective gas constant and specific heat
+    Rm = effective_gas_constant(q)
+    cpm = effective_specific_heat(q)
+
+    # Compute mixed-phase relative humidity
+    RH = relative_humidity(p, T, q, phase='mixed', omega=omega)
+    #RH = np.minimum(RH, 1.0)  # limit RH to 100 %
+
+    # Compute mixed-phase specific heat
+    cpx = (1 - omega) * cpl + omega * cpi
+
+    # Compute mixed-phase latent heat at the triple point
+    Lx0 = (1 - omega) * Lv0 + omega * Ls0
+
+    # Set constants (cf. Romps 2017, Eq. 22d-f and 23d-f)
+    a = cpm / Rm + (cpx - cpv) / Rv
+    b = -(Lx0 + (cpx - cpv) * T0) / (Rv * T)
+    c = b / a
+
+    # Compute temperature at the LSL (cf. Romps 2017, Eq. 22a and 23a)
+    T_lsl = _lambertw_temperature(RH, 1 / a, c, T)
+
+    return T_lsl
+
+
+def lifting_saturation_level(p, T, q, converged=0.001, active_set=False,
+                             return_iterations=False):
     """
     Computes pressure and temperature at the lifting saturation level (LSL)
     using equations similar to Romps (2017).
@@ -637,57 +1071,54 @@ def lifting_saturation_level(p, T, q, converged=0.001):
         q (float or ndarray): specific humidity (kg/kg)
         converged (float, optional): target precision for LSL temperature
             (default is 0.001 K)
+        active_set (bool, optional): flag indicating whether to iterate only
+            over elements that have not yet converged (default is False)
+        return_iterations (bool, optional): flag indicating whether to also
+            return the number of iterations for each element (default is
+            False)
 
     Returns:
         p_lsl (float or ndarray): pressure at the LSL (Pa)
         T_lsl (float or ndarray): temperature at the LSL (K)
+        niter (int or ndarray): number of iterations (only returned if
+            return_iterations is True)
 
     """
 
-    # Set the initial temperature at the LSL
-    T_lsl = T.copy()
+    if active_set:
 
-    # Iterate to convergence
-    count = 0
-    delta = np.full_like(T, 10)
-    while np.max(delta) > converged:
+        # Iterate to convergence, updating only unconverged elements
+        T_lsl, niter = _iterate_active_set(_lifting_saturation_level_update,
+                                           T, (p, T, q), converged, 'T_lsl')
 
-        # Update the previous Tstar value
-        T_lsl_prev = T_lsl
+    else:
 
-        # Compute the ice fraction
-        omega = ice_fraction(T_lsl)
+        # Set the initial temperature at the LSL
+        T_lsl = T.copy()
 
-        # Compute effective gas constant and specific heat
-        Rm = effective_gas_constant(q)
-        cpm = effective_specific_heat(q)
+        # Iterate to convergence
+        count = 0
+        delta = np.full_like(T, 10)
+        while np.max(delta) > converged:
 
-        # Compute mixed-phase relative humidity
-        RH = relative_humidity(p, T, q, phase='mixed', omega=omega)
-        #RH = np.minimum(RH, 1.0)  # limit RH to 100 %
+            # Update the previous Tstar value
+            T_lsl_prev = T_lsl
 
-        # Compute mixed-phase specific heat
-        cpx = (1 - omega) * cpl + omega * cpi
+            # Update the temperature at the LSL
+            T_lsl = _lifting_saturation_level_update(p, T, q, T_lsl)
 
-        # Compute mixed-phase latent heat at the triple point
-        Lx0 = (1 - omega) * Lv0 + omega * Ls0
-        
-        # Set constants (cf. Romps 2017, Eq. 22d-f and 23d-f)
-        a = cpm / Rm + (cpx - cpv) / Rv
-        b = -(Lx0 + (cpx - cpv) * T0) / (Rv * T)
-        c = b / a
-
-        # Compute temperature at the LSL (cf. Romps 2017, Eq. 22a and 23a)
-        fn = np.power(RH, (1 / a)) * c * np.exp(c)
-        W = lambertw(fn, k=-1).real  # -1 branch because cpx > cpv
-        T_lsl = c * (1 / W) * T
-    
-        # Check if solution has converged
-        delta = np.abs(T_lsl - T_lsl_prev)
-        count += 1
-        if count > 20:
-            print("T_lsl not converged after 20 iterations")
-            break
+            # Check if solution has converged
+            delta = np.abs(T_lsl - T_lsl_prev)
+            count += 1
+            if count > 20:
+                print("T_lsl not converged after 20 iterations")
+                break
+
+        niter = np.full(np.shape(T_lsl), count)[()]
+
+    # Compute effective gas constant and specific heat
+    Rm = effective_gas_constant(q)
+    cpm = effective_specific_heat(q)
 
     # Compute pressure at the LSL (cf. Romps 2017, Eq. 22b and 23b)
     p_lsl = p * np.power((T_lsl / T), (cpm / Rm))
@@ -695,7 +1126,10 @@ def lifting_saturation_level(p, T, q, converged=0.001):
     # Ensure that LSL temperature and pressure do not exceed initial values
     T_lsl = np.minimum(T_lsl, T)
     p_lsl = np.minimum(p_lsl, p)
-    
+
+    if return_iterations:
+        return p_lsl, T_lsl, niter
+
     return p_lsl, T_lsl
 
 
@@ -828,7 +1262,7 @@ def dry_adiabatic_lapse_rate(p, T, q):
     return dT_dp
 
 
-def pseudoadiabatic_lapse_rate(p, T, phase='liquid'):
+def pseudoadiabatic_lapse_rate(p, T, phase='liquid', out=None, work=None):
     """
     Computes pseudoadiabatic lapse rate in pressure coordinates.
 
@@ -837,63 +1271,170 @@ def pseudoadiabatic_lapse_rate(p, T, phase='liquid'):
         T (float or ndarray): temperature (K)
         phase (str, optional): condensed water phase (valid options are
             'liquid', 'ice', or 'mixed'; default is 'liquid')
+        out (ndarray, optional): array in which to store the result, which
+            must not share memory with the inputs (default is None)
+        work (ndarray, optional): scratch arrays with the shape of out
+            stacked along the leading dimension (at least 5 are needed;
+            default is None)
 
     Returns:
         dT_dp (float or ndarray): pseudoadiabatic lapse rate (K/Pa)
 
     """
 
-    # Set the ice fraction
-    omega = ice_fraction(T, phase=phase)
+    if phase not in ('liquid', 'ice', 'mixed'):
+        raise ValueError("phase must be one of 'liquid', 'ice', or 'mixed'")
 
-    # Compute saturation specific humidity
-    qs = saturation_specific_humidity(p, T, phase=phase, omega=omega)
+    if out is None and work is None:
 
-    # Compute Q term
-    Q = qs * (1 - qs + qs / eps)
+        # The ice fraction calculation needs NumPy arrays
+        if _is_xarray(p, T):
+            return _apply_xarray(pseudoadiabatic_lapse_rate, p, T,
+                                 phase=phase)
+        if _is_lazy(p, T):
+            return _map_blocks(pseudoadiabatic_lapse_rate, p, T, phase=phase)
 
-    # Compute the effective gas constant
-    Rm = effective_gas_constant(qs)
+        # Set the ice fraction
+        omega = ice_fraction(T, phase=phase)
 
-    # Compute the effective specific heat
-    cpm = effective_specific_heat(qs)
+        # Compute saturation specific humidity
+        qs = saturation_specific_humidity(p, T, phase=phase, omega=omega)
 
-    if phase == 'liquid':
+        # Compute Q term
+        Q = qs * (1 - qs + qs / eps)
 
-        # Compute latent heat of vaporisation
-        Lv = latent_heat_of_vaporisation(T)
+        # Compute the effective gas constant
+        Rm = effective_gas_constant(qs)
 
-        # Compute liquid pseudoadiabatic lapse rate
-        dT_dp = (1 / p) * (Rm * T + Lv * Q) / \
-            (cpm + (Lv**2 * Q) / (Rv * T**2))
+        # Compute the effective specific heat
+        cpm = effective_specific_heat(qs)
 
-    elif phase == 'ice':
+        if phase == 'liquid':
 
-        # Compute latent heat of sublimation
-        Ls = latent_heat_of_sublimation(T)
+            # Compute latent heat of vaporisation
+            Lv = latent_heat_of_vaporisation(T)
 
-        # Compute ice pseudoadiabatic lapse rate
-        dT_dp = (1 / p) * (Rm * T + Ls * Q) / \
-            (cpm + (Ls**2 * Q) / (Rv * T**2))
+            # Compute liquid pseudoadiabatic lapse rate
+            dT_dp = (1 / p) * (Rm * T + Lv * Q) / \
+                (cpm + (Lv**2 * Q) / (Rv * T**2))
 
-    elif phase == 'mixed':
+        elif phase == 'ice':
 
-        # Compute the derivative of omega with respect to temperature
-        domega_dT = ice_fraction_derivative(T)
+            # Compute latent heat of sublimation
+            Ls = latent_heat_of_sublimation(T)
 
-        # Compute mixed-phase latent heat
-        Lx = mixed_phase_latent_heat(T, omega)
+            # Compute ice pseudoadiabatic lapse rate
+            dT_dp = (1 / p) * (Rm * T + Ls * Q) / \
+                (cpm + (Ls**2 * Q) / (Rv * T**2))
 
-        # Compute saturation vapour pressues over liquid and ice
-        esl = saturation_vapour_pressure(T, phase='liquid')
-        esi = saturation_vapour_pressure(T, phase='ice')
+        else:
 
-        # Compute mixed-phase pseudoadiabatic lapse rate
-        dT_dp = (1 / p) * (Rm * T + Lx * Q) / \
-            (cpm + (Lx**2 * Q) / (Rv * T**2) +
-             Lx * Q * np.log(esi / esl) * domega_dT)
+            # Compute the derivative of omega with respect to temperature
+            domega_dT = ice_fraction_derivative(T)
 
-    return dT_dp
+            # Compute mixed-phase latent heat
+            Lx = mixed_phase_latent_heat(T, omega)
+
+            # Compute saturation vapour pressues over liquid and ice
+            esl = saturation_vapour_pressure(T, phase='liquid')
+            esi = saturation_vapour_pressure(T, phase='ice')
+
+            # Compute mixed-phase pseudoadiabatic lapse rate
+            dT_dp = (1 / p) * (Rm * T + Lx * Q) / \
+                (cpm + (Lx**2 * Q) / (Rv * T**2) +
+                 Lx * Q * np.log(esi / esl) * domega_dT)
+
+        return dT_dp
+
+    # In-place calculation
+    user_out = out is not None
+    out, work = _prepare_output(out, work, 5, p, T)
+    qs, Q, C, omega, Lx = work[:5]
+
+    # Set the ice fraction
+    if phase == 'mixed':
+        np.subtract(T_liq, T, out=omega)
+        np.divide(omega, T_liq - T_ice, out=omega)
+        np.clip(omega, 0.0, 1.0, out=omega)
+        np.multiply(omega, np.pi, out=omega)
+        np.cos(omega, out=omega)
+        np.subtract(1, omega, out=omega)
+        np.multiply(omega, 0.5, out=omega)
+    else:
+        omega = 0.0 if phase == 'liquid' else 1.0
+
+    # Compute saturation specific humidity
+    saturation_vapour_pressure(T, phase=phase, omega=omega, out=qs,
+                               work=(Q, C))
+    np.multiply(qs, 1 - eps, out=Q)
+    np.subtract(p, Q, out=Q)
+    np.multiply(qs, eps, out=qs)
+    np.divide(qs, Q, out=qs)
+
+    # Compute Q term, Q = qs * (1 - qs + qs / eps)
+    np.multiply(qs, 1 / eps - 1, out=Q)
+    np.add(Q, 1, out=Q)
+    np.multiply(Q, qs, out=Q)
+
+    # Compute the latent heat (Lv, Ls, or Lx depending on omega),
+    # Lx = Lv0 + omega * Lf0 + (cpv - cpl + omega * (cpl - cpi)) * (T - T0)
+    np.multiply(omega, cpl - cpi, out=Lx)
+    np.add(Lx, cpv - cpl, out=Lx)
+    np.subtract(T, T0, out=out)
+    np.multiply(Lx, out, out=Lx)
+    np.multiply(omega, Lf0, out=out)
+    np.add(out, Lv0, out=out)
+    np.add(Lx, out, out=Lx)
+
+    # Compute the numerator, Rm * T + Lx * Q
+    effective_gas_constant(qs, out=C)
+    np.multiply(C, T, out=C)
+    np.multiply(Lx, Q, out=out)
+    np.add(out, C, out=out)
+
+    # Compute the denominator, cpm + (Lx**2 * Q) / (Rv * T**2) (+ the
+    # contribution from the derivative of omega for mixed-phase ascent)
+    effective_specific_heat(qs, out=C)
+    np.multiply(Lx, Lx, out=qs)
+    np.multiply(qs, Q, out=qs)
+    np.divide(qs, Rv, out=qs)
+    np.divide(qs, T, out=qs)
+    np.divide(qs, T, out=qs)
+    np.add(C, qs, out=C)
+    if phase == 'mixed':
+
+        # Compute log(esi / esl) = ((cpi - cpl) / Rv) * log(T0 / T) +
+        # Lf0 / (Rv * T0) - Lf / (Rv * T)
+        np.divide(T0, T, out=qs)
+        np.log(qs, out=qs)
+        np.multiply(qs, (cpi - cpl) / Rv, out=qs)
+        np.add(qs, Lf0 / (Rv * T0), out=qs)
+        np.subtract(T, T0, out=omega)
+        np.multiply(omega, cpl - cpi, out=omega)
+        np.add(omega, Lf0, out=omega)
+        np.divide(omega, Rv, out=omega)
+        np.divide(omega, T, out=omega)
+        np.subtract(qs, omega, out=qs)
+
+        # Compute the derivative of omega with respect to temperature
+        np.subtract(T_liq, T, out=omega)
+        np.divide(omega, T_liq - T_ice, out=omega)
+        np.clip(omega, 0.0, 1.0, out=omega)
+        np.multiply(omega, np.pi, out=omega)
+        np.sin(omega, out=omega)
+        np.multiply(omega, -0.5 * np.pi / (T_liq - T_ice), out=omega)
+
+        # Add Lx * Q * log(esi / esl) * domega_dT
+        np.multiply(qs, omega, out=qs)
+        np.multiply(qs, Lx, out=qs)
+        np.multiply(qs, Q, out=qs)
+        np.add(C, qs, out=C)
+
+    # Compute the pseudoadiabatic lapse rate
+    np.divide(out, C, out=out)
+    np.divide(out, p, out=out)
+
+    return out if user_out else out[()]
 
 
 def saturated_adiabatic_lapse_rate(p, T, qt, phase='liquid'):
@@ -993,16 +1534,156 @@ def follow_dry_adiabat(pi, pf, Ti, q):
     return Tf
 
 
+def _follow_moist_adiabat_active_set(pi, pf, Ti, qt=None, pseudo=True,
+                                     phase='liquid', pinc=500.0,
+                                     converged=0.001):
+    """
+    Computes parcel temperature following a saturated adiabat or pseudoadiabat
+    iteratively, operating only on the active elements. Parcels that have
+    reached their final pressure are dropped from the pressure loop and
+    elements whose level 2 temperature has converged are dropped from the
+    inner loop.
+
+    Args:
+        pi (float or ndarray): initial pressure (Pa)
+        pf (float or ndarray): final pressure (Pa)
+        Ti (float or ndarray): initial temperature (K)
+        qt (float or ndarray, optional): total water mass fraction (kg/kg)
+            (default is None; required for saturated adiabatic ascent)
+        pseudo (bool): flag indicating whether to perform pseudoadiabatic
+            parcel ascent (default is True)
+        phase (str, optional): condensed water phase (valid options are
+            'liquid', 'ice', or 'mixed'; default is 'liquid')
+        pinc (float, optional): pressure increment (default is 500 Pa = 5 hPa)
+        converged (float, optional): target precision for iterative solution
+            (default is 0.001 K)
+
+    Returns:
+        Tf (float or ndarray): final temperature (K)
+        niter (int or ndarray): total number of iterations for each element
+
+    """
+
+    # Broadcast and flatten the inputs
+    shape = np.broadcast_shapes(np.shape(pi), np.shape(pf), np.shape(Ti),
+                                np.shape(qt) if qt is not None else ())
+    pi = np.broadcast_to(pi, shape).ravel()
+    pf = np.broadcast_to(pf, shape).ravel()
+    T2 = np.broadcast_to(Ti, shape).flatten()
+    p2 = pi.astype(T2.dtype)
+    if qt is not None:
+        qt = np.broadcast_to(qt, shape).ravel()
+    niter = np.zeros(T2.size, dtype=int)
+
+    # Set the pressure increment based on whether the parcel is ascending
+    # or descending (with the floating-point type of the parcel temperature)
+    pinc = np.abs(pinc)  # make sure pinc is positive
+    ascending = (pf < pi)
+    dp = np.where(ascending, -pinc, pinc).astype(T2.dtype)
+
+    # Create workspace arrays for the pseudoadiabatic lapse rate, which are
+    # reused (in part) at every iteration
+    lapse = np.empty_like(T2)
+    work = np.empty((5, T2.size), dtype=T2.dtype)
+
+    # Set the final temperature of parcels with missing initial or final
+    # values to NaN (their pressure would never reach pf)
+    finite = np.isfinite(pi) & np.isfinite(pf) & np.isfinite(T2)
+    T2[~finite] = np.nan
+
+    # Loop over pressure increments for parcels yet to reach pf
+    active = np.flatnonzero(finite & (p2 != pf))
+    while active.size > 0:
+
+        # Set level 1 values
+        p1 = p2[active]
+        T1 = T2[active]
+        pf_a = pf[active]
+        asc_a = ascending[active]
+
+        # Update the pressure at level 2, making sure we haven't overshot
+        # final pressure level
+        p2_a = np.where(asc_a, np.maximum(p1 + dp[active], pf_a),
+                        np.minimum(p1 + dp[active], pf_a))
+
+        # Compute the layer-mean pressure and log-pressure increment
+        pbar = np.sqrt(p1 * p2_a)
+        dlnp = np.log(p2_a / p1)
+
+        # Get initial estimate for the temperature at level 2 by following
+        # a dry adiabat (ignoring the contribution of moisture)
+        T2_a = T1 + pbar * dry_adiabatic_lapse_rate(p1, T1, 0.0) * dlnp
+
+        # Iterate to get the new temperature at level 2, updating only
+        # unconverged elements
+        sub = np.arange(active.size)
+        for count in range(1, 21):
+
+            # Compute the layer-mean temperature
+            Tbar = 0.5 * (T1[sub] + T2_a[sub])
+
+            # Compute the lapse rate (descending parcels always follow a
+            # pseudoadiabat)
+            if pseudo:
+                dT_dp = pseudoadiabatic_lapse_rate(pbar[sub], Tbar,
+                                                   phase=phase,
+                                                   out=lapse[:sub.size],
+                                                   work=work[:, :sub.size])
+            else:
+                asc = asc_a[sub]
+                desc = np.logical_not(asc)
+                pbar_s = pbar[sub]
+                dT_dp = np.empty_like(Tbar)
+                if np.any(asc):
+                    dT_dp[asc] = \
+                        saturated_adiabatic_lapse_rate(pbar_s[asc], Tbar[asc],
+                                                       qt[active[sub[asc]]],
+                                                       phase=phase)
+                if np.any(desc):
+                    dT_dp[desc] = \
+                        pseudoadiabatic_lapse_rate(pbar_s[desc], Tbar[desc],
+                                                   phase=phase)
+
+            # Update the level 2 temperature
+            T2_new = T1[sub] + pbar[sub] * dT_dp * dlnp[sub]
+            delta = np.abs(T2_new - T2_a[sub])
+            T2_a[sub] = T2_new
+            niter[active[sub]] += 1
+
+            # Compact the unconverged elements
+            sub = sub[delta > converged]
+            if sub.size == 0:
+                break
+
+        else:
+            # should converge in just a couple of iterations, provided
+            # pinc is not too large
+            print('Not converged after 20 iterations')
+
+        # Store the level 2 values and drop parcels that have reached pf
+        p2[active] = p2_a
+        T2[active] = T2_a
+        active = active[p2_a != pf_a]
+
+    return T2.reshape(shape)[()], niter.reshape(shape)[()]
+
+
 def follow_moist_adiabat(pi, pf, Ti, qt=None, pseudo=True, phase='liquid',
                          pseudo_method='polynomial', pinc=500.0,
-                         converged=0.001):
+                         converged=0.001, active_set=False,
+                         return_iterations=False):
     """
     Computes parcel temperature following a saturated adiabat or pseudoadiabat.
     For descending parcels, a pseudoadiabat is always used. By default,
     pseudoadiabatic calculations use polynomial fits for fast calculations, but
-    can optionally use slower iterative method. Saturated adiabatic ascent must
-    be performed iteratively (for now). At present, polynomial fits are only
-    available for liquid-only pseudoadiabats.
+    can optionally use piecewise bicubic interpolation in tables of reference
+    values (see atmos.pseudoadiabat_bicubic), the slower iterative method, or
+    a compiled version of the iterative method that integrates each parcel
+    independently and in parallel (see atmos.kernels). Saturated adiabatic
+    ascent must be performed iteratively (for now). Accurate polynomial fits
+    are only available for liquid-only pseudoadiabats; approximate fits for
+    ice and mixed-phase pseudoadiabats (with errors of up to ~0.15 K) are
+    used if pseudo_method is 'polynomial_approx'.
 
     Args:
         pi (float or ndarray): initial pressure (Pa)
@@ -1015,37 +1696,85 @@ def follow_moist_adiabat(pi, pf, Ti, qt=None, pseudo=True, phase='liquid',
         phase (str, optional): condensed water phase (valid options are
             'liquid', 'ice', or 'mixed'; default is 'liquid')
         pseudo_method (str, optional): method for performing pseudoadiabatic
-            ascent/descent (valid options are 'polynomial' or 'iterative';
+            ascent/descent (valid options are 'polynomial',
+            'polynomial_approx', 'bicubic', 'iterative', or 'compiled';
             default is 'polynomial')
         pinc (float, optional): pressure increment for iterative calculation
             (default is 500 Pa = 5 hPa)
         converged (float, optional): target precision for iterative solution
             (default is 0.001 K)
+        active_set (bool, optional): flag indicating whether iterative
+            calculations should operate only on parcels that have not yet
+            reached pf and on elements that have not yet converged (default
+            is False)
+        return_iterations (bool, optional): flag indicating whether to also
+            return the total number of iterations for each element (default
+            is False)
 
     Returns:
         Tf (float or ndarray): final temperature (K)
+        niter (int or ndarray): number of iterations (only returned if
+            return_iterations is True)
 
     """
 
-    if pseudo and pseudo_method == 'polynomial':
+    if not pseudo and qt is None:
+        raise ValueError('qt is required for saturated adiabatic ascent')
+
+    if pseudo and pseudo_method in ('polynomial', 'polynomial_approx'):
 
+        if phase not in POLYNOMIAL_FITS:
+            raise ValueError(
+                "phase must be one of 'liquid', 'ice', or 'mixed'")
+        fits = POLYNOMIAL_FITS[phase]
+        if phase != 'liquid' and pseudo_method == 'polynomial':
+            raise ValueError(f"""Accurate polynomial fits have yet to be
+                             created for {phase} pseudoadiabats. Calculations
+                             can be performed by interpolation in tables
+                             (pseudo_method='bicubic') or iteratively
+                             (pseudo_method='iterative' or, for faster
+                             calculations, pseudo_method='compiled'), or
+                             with the approximate polynomial fits
+                             (pseudo_method='polynomial_approx').""")
         if phase != 'liquid':
-            raise ValueError("""Polynomial fits have yet to be created for ice 
-                             and mixed-phase pseudoadiabats. Calculations can 
-                             be performed iteratively (by setting pseudo_method
-                             ='iterative'); however, this may be slow.""")
+            warnings.warn(f'the {phase} pseudoadiabat polynomial fits have '
+                          f'errors of up to {fits.TEMP_MAX_ERROR:.2f} K',
+                          stacklevel=2)
 
         # Compute the wet-bulb potential temperature of the pseudoadiabat
         # that passes through (pi, Ti)
-        thw = pseudoadiabat.wbpt(pi, Ti)
+        thw = _evaluate_fit(fits.wbpt, pi, Ti)
 
         # Compute the temperature on this pseudoadiabat at pf
-        Tf = pseudoadiabat.temp(pf, thw)
+        Tf = _evaluate_fit(fits.temp, pf, thw)
+        niter = np.zeros(np.shape(Tf), dtype=int)[()]
 
-    else:
+    elif pseudo and pseudo_method == 'bicubic':
+
+        # As for the polynomial fits, but interpolating in tables
+        thw = pseudoadiabat_bicubic.wbpt(pi, Ti, phase=phase)
+        Tf = pseudoadiabat_bicubic.temp(pf, thw, phase=phase)
+        niter = np.zeros(np.shape(Tf), dtype=int)[()]
 
-        if not pseudo and qt is None:
-            raise ValueError('qt is required for saturated adiabatic ascent')
+    elif pseudo and pseudo_method == 'compiled':
+
+        # Integrate each parcel along its pseudoadiabat with compiled code
+        # (iteration counts are only computed if requested, as they are not
+        # available for xarray or dask inputs)
+        Tf = kernels.follow_pseudoadiabat(pi, pf, Ti, phase=phase, pinc=pinc,
+                                          converged=converged,
+                                          return_iterations=return_iterations)
+        if return_iterations:
+            Tf, niter = Tf
+
+    elif active_set:
+
+        Tf, niter = _follow_moist_adiabat_active_set(pi, pf, Ti, qt=qt,
+                                                     pseudo=pseudo,
+                                                     phase=phase, pinc=pinc,
+                                                     converged=converged)
+
+    else:
 
         pi = np.atleast_1d(pi)
         pf = np.atleast_1d(pf)
@@ -1060,18 +1789,24 @@ def follow_moist_adiabat(pi, pf, Ti, qt=None, pseudo=True, phase='liquid',
             pf = np.full_like(Ti, pf)
 
         # Set the pressure increment based on whether the parcel is ascending
-        # or descending
+        # or descending (with the floating-point type of the inputs)
         pinc = np.abs(pinc)  # make sure pinc is positive
         ascending = (pf < pi)
         descending = np.logical_not(ascending)
-        dp = np.where(ascending, -pinc, pinc)
+        dtype = np.result_type(pi, pf, Ti, 1.0)
+        dp = np.where(ascending, -pinc, pinc).astype(dtype)
 
         # Initialise the pressure and temperature at level 2
         p2 = np.copy(pi)
         T2 = np.copy(Ti)
 
-        # Create an array to store the lapse rate
+        # Create an array to store the lapse rate, and workspace arrays for
+        # the pseudoadiabatic lapse rate
         dT_dp = np.zeros_like(p2)
+        work = np.empty((5,) + p2.shape, dtype=dT_dp.dtype)
+
+        # Initialise the total iteration count
+        niter = 0
 
         #print(np.min(p2), np.max(p2))
         #print(np.count_nonzero(ascending), np.count_nonzero(descending))
@@ -1112,22 +1847,22 @@ def follow_moist_adiabat(pi, pf, Ti, qt=None, pseudo=True, phase='liquid',
                 # Compute the layer-mean temperature
                 Tbar = 0.5 * (T1 + T2)
 
+                # Compute the lapse rate for all parcels at once if they all
+                # follow a pseudoadiabat
+                if pseudo:
+                    pseudoadiabatic_lapse_rate(pbar, Tbar, phase=phase,
+                                               out=dT_dp, work=work)
+
                 # Compute the lapse rate for ascending parcels
-                if np.any(ascending):
-                    if pseudo:
-                        dT_dp[ascending] = \
-                            pseudoadiabatic_lapse_rate(pbar[ascending],
+                if not pseudo and np.any(ascending):
+                    dT_dp[ascending] = \
+                        saturated_adiabatic_lapse_rate(pbar[ascending],
                                                        Tbar[ascending],
+                                                       qt[ascending],
                                                        phase=phase)
-                    else:
-                        dT_dp[ascending] = \
-                            saturated_adiabatic_lapse_rate(pbar[ascending],
-                                                           Tbar[ascending],
-                                                           qt[ascending],
-                                                           phase=phase)
 
                 # Compute the lapse rate for descending parcels
-                if np.any(descending):
+                if not pseudo and np.any(descending):
                     dT_dp[descending] = \
                         pseudoadiabatic_lapse_rate(pbar[descending],
                                                    Tbar[descending],
@@ -1149,19 +1884,27 @@ def follow_moist_adiabat(pi, pf, Ti, qt=None, pseudo=True, phase='liquid',
                 # Update the level 2 temperature
                 T2 = T2_new.copy()
 
+            niter += count
+
             #print(np.min(p1), np.min(p2), count)
 
         # Set the final temperature
         Tf = T2
+        niter = np.full_like(Tf, niter, dtype=int)
 
         if len(Ti) == 1:
             Tf = Tf[0]
+            niter = niter[0]
+
+    if return_iterations:
+        return Tf, niter
 
     return Tf
 
 
 def adiabatic_wet_bulb_temperature(p, T, q, phase='liquid',
-                                   pseudo_method='polynomial'):
+                                   pseudo_method='polynomial',
+                                   active_set=False, return_iterations=False):
     """
     Computes (pseudo)adiabatic wet-bulb temperature.
 
@@ -1170,6 +1913,10 @@ def adiabatic_wet_bulb_temperature(p, T, q, phase='liquid',
     pseudoadiabatically at saturation back to its original pressure. It is
     always less than the isobaric wet-bulb temperature.
 
+    For liquid-phase calculations with polynomial fits, the LCL and the
+    pseudoadiabatic descent are evaluated together by a fused kernel (see
+    atmos.kernels), avoiding the creation of intermediate arrays.
+
     See https://glossary.ametsoc.org/wiki/Wet-bulb_temperature.
 
     Args:
@@ -1179,22 +1926,42 @@ def adiabatic_wet_bulb_temperature(p, T, q, phase='liquid',
         phase (str, optional): condensed water phase (valid options are
             'liquid', 'ice', or 'mixed'; default is 'liquid')
         pseudo_method (str, optional): method for performing pseudoadiabatic
-            descent (valid options are 'polynomial' or 'iterative'; default
-            is 'polynomial')
+            descent (valid options are 'polynomial', 'polynomial_approx',
+            'bicubic', 'iterative', or 'compiled'; default is 'polynomial')
+        active_set (bool, optional): flag indicating whether iterative
+            calculations of the LSL and the pseudoadiabatic descent should
+            operate only on elements that have not yet converged (default is
+            False)
+        return_iterations (bool, optional): flag indicating whether to also
+            return the total number of iterations for each element (default
+            is False)
 
     Returns:
         Tw (float or ndarray): adiabatic wet-bulb temperature (K)
+        niter (int or ndarray): number of iterations (only returned if
+            return_iterations is True)
 
     """
 
-    if phase == 'liquid':
+    if phase == 'liquid' and pseudo_method == 'polynomial':
+
+        # Compute the LCL and follow the pseudoadiabat in a single pass
+        Tw = kernels.adiabatic_wet_bulb_temperature(p, T, q)
+        if return_iterations:
+            return Tw, np.zeros(np.shape(Tw), dtype=int)[()]
+
+        return Tw
+
+    elif phase == 'liquid':
 
         # Get pressure and temperature at the LCL
         p_lcl, T_lcl = lifting_condensation_level(p, T, q)
 
         # Follow a pseudoadiabat from the LCL to the original pressure
-        Tw = follow_moist_adiabat(p_lcl, p, T_lcl, phase='liquid', pseudo=True,
-                                  pseudo_method=pseudo_method)
+        return follow_moist_adiabat(p_lcl, p, T_lcl, phase='liquid',
+                                    pseudo=True, pseudo_method=pseudo_method,
+                                    active_set=active_set,
+                                    return_iterations=return_iterations)
 
     elif phase == 'ice':
 
@@ -1202,26 +1969,111 @@ def adiabatic_wet_bulb_temperature(p, T, q, phase='liquid',
         p_ldl, T_ldl = lifting_deposition_level(p, T, q)
 
         # Follow a pseudoadiabat from the LDL to the original pressure
-        Tw = follow_moist_adiabat(p_ldl, p, T_ldl, phase='ice', pseudo=True,
-                                  pseudo_method=pseudo_method)
+        return follow_moist_adiabat(p_ldl, p, T_ldl, phase='ice',
+                                    pseudo=True, pseudo_method=pseudo_method,
+                                    active_set=active_set,
+                                    return_iterations=return_iterations)
 
     elif phase == 'mixed':
 
         # Get pressure and temperature at the LSL
-        p_lsl, T_lsl = lifting_saturation_level(p, T, q)
+        p_lsl, T_lsl, niter_lsl = lifting_saturation_level(
+            p, T, q, active_set=active_set, return_iterations=True)
 
         # Follow a pseudoadiabat from the LSL to the original pressure
         Tw = follow_moist_adiabat(p_lsl, p, T_lsl, phase='mixed', pseudo=True,
-                                  pseudo_method=pseudo_method)
+                                  pseudo_method=pseudo_method,
+                                  active_set=active_set,
+                                  return_iterations=return_iterations)
+        if return_iterations:
+            Tw, niter = Tw
+            return Tw, niter + niter_lsl
+
+        return Tw
 
     else:
 
         raise ValueError("phase must be one of 'liquid', 'ice', or 'mixed'")
 
+
+def _isobaric_wet_bulb_temperature_update(p, T, q, L_T, Tw, phase='liquid'):
+    """
+    Performs one Newton iteration of the isobaric wet-bulb temperature
+    calculation.
+
+    Args:
+        p (float or ndarray): pressure (Pa)
+        T (float or ndarray): temperature (K)
+        q (float or ndarray): specific humidity (kg/kg)
+        L_T (float or ndarray): latent heat for specified phase at
+            temperature T (J/kg)
+        Tw (float or ndarray): previous isobaric wet-bulb temperature (K)
+        phase (str, optional): condensed water phase (valid options are
+            'liquid', 'ice', or 'mixed'; default is 'liquid')
+
+    Returns:
+        Tw (float or ndarray): updated isobaric wet-bulb temperature (K)
+
+    """
+
+    # Compute the ice fraction at Tw
+    if phase == 'liquid':
+        omega_Tw = 0.0
+    elif phase == 'ice':
+        omega_Tw = 1.0
+    elif phase == 'mixed':
+        omega_Tw = ice_fraction(Tw)
+
+    # Compute saturation specific humidity at Tw
+    qs_Tw = saturation_specific_humidity(p, Tw, phase=phase, omega=omega_Tw)
+
+    # Compute the effective specific heat at qs(Tw)
+    cpm_qs_Tw = effective_specific_heat(qs_Tw)
+
+    if phase == 'liquid':
+
+        # Compute the latent heat of vaporisation at Tw
+        Lv_Tw = latent_heat_of_vaporisation(Tw)
+
+        # Compute the derivative of qs with respect to Tw
+        dqs_dTw = qs_Tw * (1 + qs_Tw / eps - qs_Tw) * Lv_Tw / (Rv * Tw**2)
+
+    elif phase == 'ice':
+
+        # Compute the latent heat of sublimation at Tw
+        Ls_Tw = latent_heat_of_sublimation(Tw)
+
+        # Compute the derivative of qs with respect to Tw
+        dqs_dTw = qs_Tw * (1 + qs_Tw / eps - qs_Tw) * Ls_Tw / (Rv * Tw**2)
+
+    elif phase == 'mixed':
+
+        # Compute the derivative of omega with respect to Tw
+        domega_dTw = ice_fraction_derivative(Tw)
+
+        # Compute the mixed-phase latent heat at Tw
+        Lx_Tw = mixed_phase_latent_heat(Tw, omega_Tw)
+
+        # Compute the saturation vapour pressues over liquid and ice at Tw
+        esl_Tw = saturation_vapour_pressure(T, phase='liquid')
+        esi_Tw = saturation_vapour_pressure(T, phase='ice')
+
+        # Compute the derivative of qs with respect to Tw
+        dqs_dTw = qs_Tw * (1 + qs_Tw / eps - qs_Tw) * \
+            (Lx_Tw / (Rv * Tw**2) + np.log(esi_Tw / esl_Tw) * domega_dTw)
+
+    # Compute f(Tw) and f'(Tw)
+    f = cpm_qs_Tw * (T - Tw) - L_T * (qs_Tw - q)
+    fprime = ((cpv - cpd) * (T - Tw) - L_T) * dqs_dTw - cpm_qs_Tw
+
+    # Update Tw using Newton's method
+    Tw = Tw - f / fprime
+
     return Tw
 
 
-def isobaric_wet_bulb_temperature(p, T, q, phase='liquid', converged=0.001):
+def isobaric_wet_bulb_temperature(p, T, q, phase='liquid', converged=0.001,
+                                  active_set=False, return_iterations=False):
     """
     Computes isobaric wet-bulb temperature.
 
@@ -1241,9 +2093,16 @@ def isobaric_wet_bulb_temperature(p, T, q, phase='liquid', converged=0.001):
             'liquid', 'ice', or 'mixed'; default is 'liquid')
         converged (float, optional): target precision for iterative solution
             (default is 0.001 K)
+        active_set (bool, optional): flag indicating whether to iterate only
+            over elements that have not yet converged (default is False)
+        return_iterations (bool, optional): flag indicating whether to also
+            return the number of iterations for each element (default is
+            False)
 
     Returns:
         Tw (float or ndarray): isobaric wet-bulb temperature (K)
+        niter (int or ndarray): number of iterations (only returned if
+            return_iterations is True)
 
     """
 
@@ -1255,97 +2114,54 @@ def isobaric_wet_bulb_temperature(p, T, q, phase='liquid', converged=0.001):
 
     # Compute the latent heat at temperature T
     if phase == 'liquid':
-        Lv_T = latent_heat_of_vaporisation(T)
+        L_T = latent_heat_of_vaporisation(T)
     elif phase == 'ice':
-        Ls_T = latent_heat_of_sublimation(T)
+        L_T = latent_heat_of_sublimation(T)
     elif phase == 'mixed':
         omega_T = ice_fraction(T)
-        Lx_T = mixed_phase_latent_heat(T, omega_T)
+        L_T = mixed_phase_latent_heat(T, omega_T)
     else:
         raise ValueError("phase must be one of 'liquid', 'ice', or 'mixed'")
 
-    # Iterate to convergence
-    delta = np.full_like(T, 10.)
-    count = 0
-    while np.max(delta) > converged:
+    update = partial(_isobaric_wet_bulb_temperature_update, phase=phase)
 
-        # Update the previous Tw value
-        Tw_prev = Tw
+    if active_set:
 
-        # Compute the ice fraction at Tw
-        if phase == 'liquid':
-            omega_Tw = 0.0
-        elif phase == 'ice':
-            omega_Tw = 1.0
-        elif phase == 'mixed':
-            omega_Tw = ice_fraction(Tw)
-
-        # Compute saturation specific humidity at Tw
-        qs_Tw = saturation_specific_humidity(p, Tw, phase=phase,
-                                             omega=omega_Tw)
-
-        # Compute the effective specific heat at qs(Tw)
-        cpm_qs_Tw = effective_specific_heat(qs_Tw)
-
-        if phase == 'liquid':
-
-            # Compute the latent heat of vaporisation at Tw
-            Lv_Tw = latent_heat_of_vaporisation(Tw)
-
-            # Compute the derivative of qs with respect to Tw
-            dqs_dTw = qs_Tw * (1 + qs_Tw / eps - qs_Tw) * Lv_Tw / (Rv * Tw**2)
-
-            # Compute f and f'
-            f = cpm_qs_Tw * (T - Tw) - Lv_T * (qs_Tw - q)
-            fprime = ((cpv - cpd) * (T - Tw) - Lv_T) * dqs_dTw - cpm_qs_Tw
-
-        elif phase == 'ice':
+        # Iterate to convergence, updating only unconverged elements
+        Tw, niter = _iterate_active_set(update, Tw, (p, T, q, L_T), converged,
+                                        'Tw')
 
-            # Compute the latent heat of sublimation at Tw
-            Ls_Tw = latent_heat_of_sublimation(Tw)
-
-            # Compute the derivative of qs with respect to Tw
-            dqs_dTw = qs_Tw * (1 + qs_Tw / eps - qs_Tw) * Ls_Tw / (Rv * Tw**2)
-
-            # Compute f and f'
-            f = cpm_qs_Tw * (T - Tw) - Ls_T * (qs_Tw - q)
-            fprime = ((cpv - cpd) * (T - Tw) - Ls_T) * dqs_dTw - cpm_qs_Tw
+    else:
 
-        elif phase == 'mixed':
+        # Iterate to convergence
+        delta = np.full_like(T, 10.)
+        count = 0
+        while np.max(delta) > converged:
 
-            # Compute the derivative of omega with respect to Tw
-            domega_dTw = ice_fraction_derivative(Tw)
+            # Update the previous Tw value
+            Tw_prev = Tw
 
-            # Compute the mixed-phase latent heat at Tw
-            Lx_Tw = mixed_phase_latent_heat(Tw, omega_Tw)
+            # Update Tw using Newton's method
+            Tw = update(p, T, q, L_T, Tw)
 
-            # Compute the saturation vapour pressues over liquid and ice at Tw
-            esl_Tw = saturation_vapour_pressure(T, phase='liquid')
-            esi_Tw = saturation_vapour_pressure(T, phase='ice')
+            # Check for convergence
+            delta = np.abs(Tw - Tw_prev)
+            count += 1
+            if count > 20:
+                print("Tw not converged after 20 iterations")
+                break
 
-            # Compute the derivative of qs with respect to Tw
-            dqs_dTw = qs_Tw * (1 + qs_Tw / eps - qs_Tw) * \
-                (Lx_Tw / (Rv * Tw**2) + np.log(esi_Tw / esl_Tw) * domega_dTw)
+        niter = np.full(np.shape(Tw), count)[()]
 
-            # Compute f(Tw) and f'(Tw)
-            f = cpm_qs_Tw * (T - Tw) - Lx_T * (qs_Tw - q)
-            fprime = ((cpv - cpd) * (T - Tw) - Lx_T) * dqs_dTw - cpm_qs_Tw
-       
-        # Update Tw using Newton's method
-        Tw = Tw - f / fprime
-
-        # Check for convergence
-        delta = np.abs(Tw - Tw_prev)
-        count += 1
-        if count > 20:
-            print("Tw not converged after 20 iterations")
-            break
+    if return_iterations:
+        return Tw, niter
 
     return Tw
 
 
 def wet_bulb_temperature(p, T, q, saturation='adiabatic', phase='liquid',
-                         pseudo_method='polynomial', converged=0.001):
+                         pseudo_method='polynomial', converged=0.001,
+                         active_set=False, return_iterations=False):
     """
     Computes wet-bulb temperature for specified saturation process.
 
@@ -1359,26 +2175,35 @@ def wet_bulb_temperature(p, T, q, saturation='adiabatic', phase='liquid',
             'liquid', 'ice', or 'mixed'; default is 'liquid')
         pseudo_method (str, optional): method for performing pseudoadiabatic
             descent in calculation of adiabatic Tw (valid options are
-            'polynomial' or 'iterative'; default is 'polynomial')
+            'polynomial', 'polynomial_approx', 'bicubic', 'iterative', or
+            'compiled'; default is 'polynomial')
         converged (float, optional): target precision for iterative solution
             of isobaric Tw (default is 0.001 K)
+        active_set (bool, optional): flag indicating whether iterative
+            calculations should operate only on elements that have not yet
+            converged (default is False)
+        return_iterations (bool, optional): flag indicating whether to also
+            return the number of iterations for each element (default is
+            False)
 
     Returns:
         Tw: wet-bulb temperature (K)
+        niter (int or ndarray): number of iterations (only returned if
+            return_iterations is True)
 
     """
 
     if saturation == 'adiabatic':
-        Tw = adiabatic_wet_bulb_temperature(p, T, q, phase=phase,
-                                            pseudo_method=pseudo_method)
+        return adiabatic_wet_bulb_temperature(
+            p, T, q, phase=phase, pseudo_method=pseudo_method,
+            active_set=active_set, return_iterations=return_iterations)
     elif saturation == 'isobaric':
-        Tw = isobaric_wet_bulb_temperature(p, T, q, phase=phase,
-                                           converged=converged)
+        return isobaric_wet_bulb_temperature(
+            p, T, q, phase=phase, converged=converged, active_set=active_set,
+            return_iterations=return_iterations)
     else:
         raise ValueError("saturation must be one of 'isobaric' or 'adiabatic'")
 
-    return Tw
-
 
 def dry_potential_temperature(p, T):
     """
@@ -1676,7 +2501,8 @@ def wet_bulb_potential_temperature(p, T, q, phase='liquid',
         phase (str, optional): condensed water phase (valid options are
             'liquid', 'ice', or 'mixed'; default is 'liquid')
         pseudo_method (str, optional): method for performing pseudoadiabatic
-            ascent/descent (valid options are 'polynomial' or 'iterative';
+            ascent/descent (valid options are 'polynomial',
+            'polynomial_approx', 'bicubic', 'iterative', or 'compiled';
             default is 'polynomial')
 
     Returns:
@@ -1684,7 +2510,12 @@ def wet_bulb_potential_temperature(p, T, q, phase='liquid',
 
     """
 
-    if phase == 'liquid':
+    if phase == 'liquid' and pseudo_method == 'polynomial':
+
+        # Compute the LCL and follow the pseudoadiabat in a single pass
+        thetaw = kernels.wet_bulb_potential_temperature(p, T, q)
+
+    elif phase == 'liquid':
 
         # Get pressure and temperature at the LCL
         p_lcl, T_lcl = lifting_condensation_level(p, T, q)
@@ -1729,7 +2560,8 @@ def saturation_wet_bulb_potential_temperature(p, T, phase='liquid',
         phase (str, optional): condensed water phase (valid options are
             'liquid', 'ice', or 'mixed'; default is 'liquid')
         pseudo_method (str, optional): method for performing pseudoadiabatic
-            ascent/descent (valid options are 'polynomial' or 'iterative';
+            ascent/descent (valid options are 'polynomial',
+            'polynomial_approx', 'bicubic', 'iterative', or 'compiled';
             default is 'polynomial')
 
     Returns:
@@ -0,0 +1,243 @@
+"""
+xarray accessor for the functions in atmos.thermo and atmos.moisture.
+
+Importing this module registers a Dataset accessor, ds.atmos, through which
+any thermo or moisture function can be applied to the variables of a Dataset
+(given by name) or to DataArrays, e.g.
+
+    import atmos.xarray
+    Tw = ds.atmos.wet_bulb(p='sp', T='t2m', Td='d2m')
+    RH = ds.atmos.relative_humidity('sp', 't2m', q)
+    p_lcl, T_lcl = ds.atmos.lifting_condensation_level('sp', 't2m', q)
+    Tf = ds.atmos.follow_moist_adiabat('sp', 50000., 't2m', qt='q',
+                                       pseudo=False)
+
+Each function is applied with xarray.apply_ufunc(dask='parallelized') and
+declared output dtypes, so dask-backed inputs give a single blockwise task
+per chunk (no meta inference on dummy data) and numpy-backed inputs are
+computed immediately. Keyword arguments that are DataArrays (or, through
+the accessor, names of variables in the Dataset) are aligned and passed
+block by block along with the positional arguments. With
+return_iterations=True, the number of iterations is returned as an
+additional integer output. wet_bulb computes specific humidity and wet-bulb
+temperature in the same task, using wet_bulb_from_dewpoint (which can also
+be called directly on NumPy arrays). Coordinates are kept, and each output
+is given a name, long_name, and units taken from the function docstring. Of
+the attributes of the first input, only the provenance attributes in
+KEEP_ATTRS are kept, since the others (e.g., standard_name, units, or GRIB_*
+keys) describe the input variable rather than the result.
+
+"""
+
+import re
+import numpy as np
+import xarray as xr
+from atmos import thermo, moisture
+
+# Functions that return more than one variable
+MULTIPLE_OUTPUTS = {'lifting_condensation_level': 2,
+                    'lifting_deposition_level': 2,
+                    'lifting_saturation_level': 2}
+
+# Attributes of the first input that are copied to the outputs
+KEEP_ATTRS = ('history', 'source', 'institution', 'references')
+
+_RETURNS = re.compile(r'^\s+(\w+) \([^)]*\): (.*?)(?: \(([^()]*)\))?$')
+
+
+def _lookup(name):
+    """
+    Returns the thermo or moisture function with the given name.
+
+    """
+    for module in (thermo, moisture):
+        func = getattr(module, name, None)
+        if callable(func) and not name.startswith('_') and \
+                getattr(func, '__module__', None) == module.__name__:
+            return func
+    raise AttributeError(f'atmos.thermo and atmos.moisture have no function '
+                         f'{name!r}')
+
+
+def _output_attrs(func):
+    """
+    Returns (name, attrs) for each output listed in the Returns section of
+    the function docstring.
+
+    """
+    doc = func.__doc__ or ''
+    section = doc.split('Returns:')[-1].splitlines()
+    outputs = []
+    for line in section:
+        match = _RETURNS.match(line)
+        if match:
+            name, long_name, units = match.groups()
+            # Drop a remark that continues on the next line, e.g. "(only
+            # returned if return_iterations is True)"
+            long_name = re.sub(r'\s*\([^)]*$', '', long_name)
+            attrs = {'long_name': long_name}
+            if units and not units.startswith('only returned'):
+                attrs['units'] = units
+            outputs.append((name, attrs))
+
+    return outputs
+
+
+def apply(func, *args, nout=None, dtype=None, **kwargs):
+    """
+    Applies a thermo or moisture function to DataArrays (or scalars) as a
+    single blockwise operation.
+
+    Args:
+        func (callable or str): function (or name of function in thermo or
+            moisture)
+        *args (DataArray or float): positional arguments of func
+        nout (int, optional): number of outputs (default is taken from
+            MULTIPLE_OUTPUTS, otherwise 1, plus 1 if return_iterations is
+            True)
+        dtype (dtype, optional): output dtype (default is the floating-point
+            type of the inputs; iteration counts are always integers)
+        **kwargs: keyword arguments of func (e.g., phase, pseudo_method, or
+            DataArrays such as qt, which are aligned with args)
+
+    Returns:
+        out (DataArray or tuple of DataArray): result(s) of func
+
+    """
+
+    if isinstance(func, str):
+        func = _lookup(func)
+    iterations = bool(kwargs.get('return_iterations', False))
+    if nout is None:
+        nout = MULTIPLE_OUTPUTS.get(func.__name__, 1) + iterations
+
+    # Pass array keyword arguments as inputs, so that they are aligned and
+    # split into blocks with the positional arguments
+    names = [k for k, v in kwargs.items() if isinstance(v, xr.DataArray)]
+    static = {k: v for k, v in kwargs.items() if k not in names}
+    inputs = list(args) + [kwargs[k] for k in names]
+    if dtype is None:
+        dtype = np.result_type(*[getattr(x, 'dtype', x) for x in inputs],
+                               1.0)
+    dtypes = [dtype] * (nout - iterations) + [int] * iterations
+
+    def inner(*data):
+        return func(*data[:len(args)], **static,
+                    **dict(zip(names, data[len(args):])))
+
+    out = xr.apply_ufunc(inner, *inputs, dask='parallelized',
+                         output_dtypes=dtypes, output_core_dims=[[]] * nout,
+                         keep_attrs=False)
+    out = out if nout > 1 else (out,)
+
+    # Get the provenance attributes of the first input
+    first = next((x for x in args if isinstance(x, xr.DataArray)), None)
+    kept = {k: v for k, v in getattr(first, 'attrs', {}).items()
+            if k in KEEP_ATTRS}
+
+    # Name the outputs and set their attributes
+    named = []
+    for i, da in enumerate(out):
+        if isinstance(da, xr.DataArray):
+            info = _output_attrs(func)
+            da.attrs = dict(kept)
+            if i < len(info):
+                da = da.rename(info[i][0])
+                da.attrs.update(info[i][1])
+        named.append(da)
+
+    return tuple(named) if nout > 1 else named[0]
+
+
+def wet_bulb_from_dewpoint(p, T, Td, phase='liquid',
+                           pseudo_method='polynomial'):
+    """
+    Computes adiabatic wet-bulb temperature from pressure, temperature, and
+    dewpoint temperature, computing specific humidity and wet-bulb
+    temperature in one pass over a block.
+
+    Args:
+        p (float or ndarray): pressure (Pa)
+        T (float or ndarray): temperature (K)
+        Td (float or ndarray): dewpoint temperature (K)
+        phase (str, optional): condensed water phase (valid options are
+            'liquid', 'ice', or 'mixed'; default is 'liquid')
+        pseudo_method (str, optional): method for performing pseudoadiabatic
+            descent (default is 'polynomial')
+
+    Returns:
+        Tw (float or ndarray): adiabatic wet-bulb temperature (K)
+
+    """
+    q = moisture.specific_humidity_from_dewpoint_temperature(p, Td)
+    return thermo.adiabatic_wet_bulb_temperature(p, T, q, phase=phase,
+                                                 pseudo_method=pseudo_method)
+
+
+@xr.register_dataset_accessor('atmos')
+class AtmosAccessor:
+    """
+    Dataset accessor giving access to the thermo and moisture functions,
+    with variables given by name or as DataArrays.
+
+    """
+
+    def __init__(self, ds):
+        self._ds = ds
+
+    def _get(self, x):
+        return self._ds[x] if isinstance(x, str) else x
+
+    def _get_kwarg(self, x):
+        # Strings are only variable names if the Dataset has such a
+        # variable (otherwise they are options, e.g. phase='ice')
+        return self._ds[x] if isinstance(x, str) and x in self._ds else x
+
+    def __getattr__(self, name):
+        func = _lookup(name)
+
+        def wrapped(*args, **kwargs):
+            return apply(func, *[self._get(x) for x in args],
+                         **{k: self._get_kwarg(v) for k, v in kwargs.items()})
+
+        wrapped.__name__ = name
+        wrapped.__doc__ = func.__doc__
+        return wrapped
+
+    def __dir__(self):
+        names = [n for module in (thermo, moisture) for n in dir(module)
+                 if not n.startswith('_')]
+        return sorted(set(list(super().__dir__()) + names))
+
+    def wet_bulb(self, p='sp', T='t2m', Td='d2m', q=None, phase='liquid',
+                 pseudo_method='polynomial'):
+        """
+        Computes adiabatic wet-bulb temperature from pressure, temperature,
+        and dewpoint temperature (or specific humidity), as a single blockwise
+        task per chunk.
+
+        Args:
+            p (str or DataArray, optional): pressure (Pa) (default is 'sp')
+            T (str or DataArray, optional): temperature (K) (default is 't2m')
+            Td (str or DataArray, optional): dewpoint temperature (K)
+                (default is 'd2m'; ignored if q is given)
+            q (str or DataArray, optional): specific humidity (kg/kg)
+                (default is None)
+            phase (str, optional): condensed water phase (valid options are
+                'liquid', 'ice', or 'mixed'; default is 'liquid')
+            pseudo_method (str, optional): method for performing
+                pseudoadiabatic descent (default is 'polynomial')
+
+        Returns:
+            Tw (DataArray): adiabatic wet-bulb temperature (K)
+
+        """
+
+        p, T = self._get(p), self._get(T)
+        if q is not None:
+            return apply(thermo.adiabatic_wet_bulb_temperature, p, T,
+                         self._get(q), phase=phase,
+                         pseudo_method=pseudo_method)
+
+        return apply(wet_bulb_from_dewpoint, p, T, self._get(Td),
+                     phase=phase, pseudo_method=pseudo_method)
@@ -0,0 +1,231 @@
+"""
+Benchmarks for the atmos.thermo functions used to compute wet-bulb
+temperature from ERA5.
+
+Each case is timed on synthetic ERA5-like surface fields (pressure 500-1050
+hPa, temperature -50 to 45 degC, dewpoint depression 0-30 K) of each size,
+and the following are recorded:
+* elements per second (best of several calls)
+* peak memory allocated during a call (by tracemalloc), in bytes per element
+* mean and maximum number of iterations, for functions that can return them
+
+Results can be saved as a baseline (JSON) and later runs compared against it,
+so that regressions in speed or memory are visible. Timings depend on the
+machine, so compare against a baseline made on the same machine.
+
+Usage (from the directory containing the atmos package):
+    python -m benchmarks.bench_thermo
+    python -m benchmarks.bench_thermo --sizes 1e3 1e5 1e7 --save benchmarks/baselines/mymachine.json
+    python -m benchmarks.bench_thermo --compare benchmarks/baselines/mymachine.json
+    python -m benchmarks.bench_thermo --cases adiabatic_wet_bulb_temperature --sizes 1e8
+
+Iterative cases (including the compiled integrator) are slow, so they are
+only run up to --max-iterative elements (default 1e5).
+
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+import numpy as np
+from atmos import thermo
+from atmos.moisture import specific_humidity_from_dewpoint_temperature
+
+# The approximate ice and mixed-phase polynomial fits warn on every call
+warnings.filterwarnings('ignore', message='the .* pseudoadiabat polynomial')
+
+# Benchmark cases: name -> (function, keyword arguments, inputs, iterative).
+# Inputs are 'pTq' for (p, T, q) or 'adiabat' for (pi, pf, Ti, qt).
+CASES = {}
+for phase in ('liquid', 'ice', 'mixed'):
+    polynomial = 'polynomial' if phase == 'liquid' else 'polynomial_approx'
+    for method in (polynomial, 'bicubic', 'compiled', 'iterative'):
+        CASES[f'adiabatic_wet_bulb_temperature[{phase},{method}]'] = (
+            thermo.adiabatic_wet_bulb_temperature,
+            dict(phase=phase, pseudo_method=method), 'pTq',
+            method in ('compiled', 'iterative'))
+    CASES[f'isobaric_wet_bulb_temperature[{phase}]'] = (
+        thermo.isobaric_wet_bulb_temperature, dict(phase=phase), 'pTq', True)
+    CASES[f'equivalent_potential_temperature[{phase}]'] = (
+        thermo.equivalent_potential_temperature, dict(phase=phase), 'pTq',
+        False)
+for method in ('polynomial', 'bicubic', 'compiled', 'iterative'):
+    CASES[f'follow_moist_adiabat[pseudo,{method}]'] = (
+        thermo.follow_moist_adiabat, dict(pseudo=True, pseudo_method=method),
+        'adiabat', method in ('compiled', 'iterative'))
+CASES['follow_moist_adiabat[saturated]'] = (
+    thermo.follow_moist_adiabat, dict(pseudo=False), 'adiabat', True)
+CASES['dewpoint_temperature'] = (thermo.dewpoint_temperature, {}, 'pTq',
+                                 False)
+CASES['lifting_condensation_level'] = (thermo.lifting_condensation_level, {},
+                                       'pTq', False)
+CASES['saturation_point_temperature'] = (
+    thermo.saturation_point_temperature, {}, 'pTq', True)
+
+# Functions that can return the number of iterations
+ITERATIONS = (thermo.saturation_point_temperature,
+              thermo.isobaric_wet_bulb_temperature,
+              thermo.follow_moist_adiabat)
+
+
+def make_inputs(n, kind='pTq', dtype=np.float64, seed=0):
+    """
+    Returns synthetic ERA5-like surface fields with n elements.
+
+    """
+    rng = np.random.default_rng(seed)
+    p = rng.uniform(50000., 105000., n)
+    T = rng.uniform(223.15, 318.15, n)
+    Td = T - rng.uniform(0., 30., n)
+    q = specific_humidity_from_dewpoint_temperature(p, Td)
+
+    if kind == 'adiabat':
+        # Lift saturated parcels from the surface to 500-900 hPa
+        pf = p - rng.uniform(10000., 40000., n)
+        Ti = thermo.saturation_point_temperature(p, T, q)
+        qt = thermo.saturation_specific_humidity(p, Ti)
+        return [x.astype(dtype) for x in (p, pf, Ti)], \
+            dict(qt=qt.astype(dtype))
+
+    return [x.astype(dtype) for x in (p, T, q)], {}
+
+
+def run_case(name, n, dtype=np.float64, repeats=3):
+    """
+    Times one case on n elements.
+
+    Returns:
+        result (dict): elements per second, seconds per call, peak memory
+            (bytes per element), and iterations (mean and max, or None)
+
+    """
+    func, kwargs, kind, _ = CASES[name]
+    args, extra = make_inputs(n, kind, dtype)
+    if kind == 'adiabat' and not kwargs.get('pseudo', True):
+        kwargs = dict(kwargs, **extra)
+
+    # Compile / warm up
+    func(*[x[:10] for x in args], **{k: v[:10] if isinstance(v, np.ndarray)
+                                     else v for k, v in kwargs.items()})
+
+    best = np.inf
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+
+    tracemalloc.start()
+    func(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    iterations = None
+    if func in ITERATIONS:
+        niter = func(*args, **kwargs, return_iterations=True)[-1]
+        iterations = dict(mean=float(np.mean(niter)), max=int(np.max(niter)))
+
+    return dict(elements_per_second=n / best, seconds=best,
+                peak_bytes_per_element=peak / n, iterations=iterations)
+
+
+def run(cases, sizes, dtype=np.float64, max_iterative=1e5, verbose=True):
+    """
+    Runs the benchmarks. Returns a dict of results keyed by 'case|size'.
+
+    """
+    results = {}
+    for name in cases:
+        for n in sizes:
+            if CASES[name][3] and n > max_iterative:
+                continue
+            repeats = 3 if n <= 1e6 else 1
+            res = run_case(name, n, dtype, repeats)
+            results[f'{name}|{n}'] = res
+            if verbose:
+                it = res['iterations']
+                it = f", {it['mean']:.1f} (max {it['max']}) iterations" \
+                    if it else ''
+                print(f"{name:55s} n={n:<10d} "
+                      f"{res['elements_per_second']:10.3g} elem/s, "
+                      f"{res['peak_bytes_per_element']:6.1f} B/elem{it}")
+
+    return results
+
+
+def compare(results, baseline, threshold=1.25):
+    """
+    Compares results with a baseline and prints regressions, i.e. cases
+    that are slower or use more memory than the baseline by more than the
+    given factor. Returns the number of regressions.
+
+    """
+    n_regressions = 0
+    for key, res in results.items():
+        if key not in baseline:
+            continue
+        base = baseline[key]
+        speed = base['elements_per_second'] / res['elements_per_second']
+        memory = res['peak_bytes_per_element'] / \
+            max(base['peak_bytes_per_element'], 1e-9)
+        flags = []
+        if speed > threshold:
+            flags.append(f'{speed:.2f}x slower')
+        if memory > threshold:
+            flags.append(f'{memory:.2f}x more memory')
+        if res['iterations'] and base['iterations'] and \
+                res['iterations']['mean'] > base['iterations']['mean'] + 0.5:
+            flags.append('more iterations')
+        if flags:
+            n_regressions += 1
+            print(f'REGRESSION {key}: ' + ', '.join(flags))
+
+    print(f'{n_regressions} regressions against baseline')
+
+    return n_regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark atmos.thermo')
+    parser.add_argument('--cases', nargs='*', default=list(CASES),
+                        help='cases to run (default is all; a function name '
+                        'selects all of its cases)')
+    parser.add_argument('--sizes', nargs='*', type=float,
+                        default=[1e3, 1e4, 1e5, 1e6],
+                        help='numbers of elements (default is 1e3-1e6)')
+    parser.add_argument('--dtype', default='float64',
+                        choices=['float32', 'float64'])
+    parser.add_argument('--max-iterative', type=float, default=1e5,
+                        help='largest size for iterative cases')
+    parser.add_argument('--save', help='save the results as a baseline')
+    parser.add_argument('--compare', help='compare against a baseline')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='slowdown/memory factor counted as a regression')
+    args = parser.parse_args(argv)
+
+    cases = [c for c in CASES if c in args.cases or
+             c.split('[')[0] in args.cases]
+    sizes = [int(n) for n in args.sizes]
+    results = run(cases, sizes, np.dtype(args.dtype), args.max_iterative)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(dict(machine=platform.platform(),
+                           processor=platform.processor(),
+                           dtype=args.dtype, results=results), f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('dtype', args.dtype) != args.dtype:
+            print('warning: baseline dtype is ' + baseline['dtype'])
+        if compare(results, baseline['results'], args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
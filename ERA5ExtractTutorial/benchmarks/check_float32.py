@@ -0,0 +1,180 @@
+"""
+Accuracy check for float32 inputs to atmos.thermo and atmos.moisture.
+
+Every public function in the two modules is called with float32 inputs and
+with the same inputs in float64, once for each condensed water phase,
+pseudoadiabat method, and saturation type it accepts. The check fails (exit
+status 1) if, for any function:
+* float32 inputs do not give float32 outputs
+* the outputs are NaN in one precision but not the other
+* the maximum difference relative to the largest magnitude of the float64
+    output exceeds TOL_RELATIVE = 1e-5 (single precision has a relative
+    round-off of 6e-8, which is amplified to a few times 1e-6 by the
+    exponential in the saturation vapour pressure)
+
+Inputs cover ERA5-like surface conditions: pressure 500-1050 hPa,
+temperature -40 to 50 degC, and dewpoint depression 0-40 K. The temperature
+at the last point is NaN, as in masked ERA5 fields (iterative calculations
+must not wait for it to converge). Moist adiabats are followed from the
+surface to 500 hPa and dry adiabats to 850 hPa.
+
+Usage (from the directory containing the atmos package):
+    python -m benchmarks.check_float32
+    python -m benchmarks.check_float32 --n 100000
+
+"""
+
+import argparse
+import inspect
+import itertools
+import sys
+import warnings
+import numpy as np
+from atmos import thermo, moisture
+
+# Ranges of pressure (Pa), temperature (K), and dewpoint depression (K)
+P_RANGE = (50000., 105000.)
+T_RANGE = (233.15, 323.15)
+D_RANGE = (0., 40.)
+
+# Tolerance (relative to the largest magnitude of the output)
+TOL_RELATIVE = 1e-5
+
+# Options that are checked for each function that accepts them
+OPTIONS = {
+    'phase': ('liquid', 'ice', 'mixed'),
+    'pseudo_method': ('polynomial', 'polynomial_approx', 'bicubic',
+                      'iterative', 'compiled'),
+    'saturation': ('adiabatic', 'isobaric'),
+    'active_set': (False, True),
+}
+
+
+def make_inputs(n, seed=0):
+    """
+    Returns a dictionary of float64 input arrays at n random points, keyed by
+    argument name.
+
+    """
+    rng = np.random.default_rng(seed)
+    p = rng.uniform(*P_RANGE, n)
+    T = rng.uniform(*T_RANGE, n)
+    Td = T - rng.uniform(*D_RANGE, n)
+    q = moisture.specific_humidity_from_dewpoint_temperature(p, Td)
+    T[-1] = np.nan
+    omega = thermo.ice_fraction(T)
+
+    return dict(
+        p=p, T=T, q=q, qt=q, Td=Td, omega=omega, Tstar=T,
+        r=thermo.mixing_ratio(q),
+        e=thermo.vapour_pressure(p, q),
+        RH=thermo.relative_humidity(p, T, q),
+        RH_in=thermo.relative_humidity(p, T, q),
+        Tf=thermo.frost_point_temperature(p, T, q),
+        Ts=thermo.saturation_point_temperature(p, T, q),
+        pi=p, Ti=T, pf=np.full(n, 50000.),
+    )
+
+
+def variants(func):
+    """
+    Yields the keyword arguments for each combination of options accepted by
+    func (the polynomial fits are only accurate for the liquid phase).
+
+    """
+    params = inspect.signature(func).parameters
+    names = [name for name in OPTIONS if name in params]
+    for values in itertools.product(*[OPTIONS[name] for name in names]):
+        kwargs = dict(zip(names, values))
+        if (kwargs.get('pseudo_method') == 'polynomial' and
+                kwargs.get('phase', 'liquid') != 'liquid'):
+            continue
+        if (kwargs.get('pseudo_method') == 'polynomial_approx' and
+                kwargs.get('phase') == 'liquid'):
+            continue
+        if (kwargs.get('pseudo_method') not in (None, 'polynomial') and
+                kwargs.get('saturation') == 'isobaric'):
+            continue
+        yield kwargs
+
+
+def call(func, inputs, dtype, kwargs):
+    """
+    Calls func with the named inputs cast to dtype and returns its outputs
+    as a tuple.
+
+    """
+    params = inspect.signature(func).parameters
+    args = {name: inputs[name].astype(dtype) for name in params
+            if name in inputs}
+    if func is thermo.follow_dry_adiabat:
+        args['pf'] = np.full_like(args['pi'], 85000.)
+    if 'phase_in' in params:
+        args.update(phase_in='liquid', phase_out='ice')
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        result = func(**args, **kwargs)
+
+    return result if isinstance(result, tuple) else (result,)
+
+
+def check(name, result, ref):
+    """
+    Prints the comparison of float32 outputs with float64 outputs and
+    returns True if they agree.
+
+    """
+    problems = []
+    max_diff = max_rel = 0.
+    for x, x_ref in zip(result, ref):
+        if x.dtype != np.float32:
+            problems.append(f'returned {x.dtype.name}')
+        nan_mismatch = np.count_nonzero(np.isnan(x) != np.isnan(x_ref))
+        if nan_mismatch:
+            problems.append(f'{nan_mismatch} NaN mismatches')
+        diff = np.abs(x.astype(np.float64) - x_ref)
+        if np.any(np.isfinite(diff)):
+            scale = np.nanmax(np.abs(x_ref))
+            max_diff = max(max_diff, np.nanmax(diff))
+            max_rel = max(max_rel, np.nanmax(diff) / scale if scale > 0 else
+                          np.nanmax(diff))
+    if max_rel > TOL_RELATIVE:
+        problems.append(f'relative difference {max_rel:.1e}')
+
+    print(f"{name:70s} max difference {max_diff:.2e} (relative "
+          f"{max_rel:.1e}): "
+          f"{'FAIL (' + ', '.join(problems) + ')' if problems else 'ok'}")
+
+    return not problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Check float32 against float64 results for every '
+                    'thermo and moisture function')
+    parser.add_argument('--n', type=float, default=1e4,
+                        help='number of random points (default is 1e4)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    inputs = make_inputs(int(args.n), args.seed)
+    ok = True
+    for module in (thermo, moisture):
+        for fname, func in inspect.getmembers(module, inspect.isfunction):
+            if fname.startswith('_') or func.__module__ != module.__name__:
+                continue
+            for kwargs in variants(func):
+                name = module.__name__.split('.')[-1] + '.' + fname
+                if kwargs:
+                    name += '[' + ', '.join(
+                        f'{key}={value}' if isinstance(value, bool) else
+                        value for key, value in kwargs.items()) + ']'
+                ref = call(func, inputs, np.float64, kwargs)
+                result = call(func, inputs, np.float32, kwargs)
+                ok &= check(name, result, ref)
+
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
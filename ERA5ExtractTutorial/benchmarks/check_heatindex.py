@@ -0,0 +1,180 @@
+"""
+Regression check for ClimFuncs.heatindex.
+
+heatindex is computed in a single pass by a numba ufunc (_heatindex). It is
+compared here with the masked-sum implementation it replaced, which is kept
+below (masked_sum_heatindex) exactly as it was, on numpy, xarray and dask
+inputs, in both float64 and float32, for all four unit combinations.
+
+Inputs are a grid of 40-130 degF (or the same range in degC) every STEP_T
+and 0-100 % relative humidity every STEP_RH, plus NaNs. The old
+implementation needs xarray inputs (it uses DataArray.where), so it is run
+on DataArrays and its values are the reference for every input type. The
+check fails (exit status 1) if:
+* float64 results differ from the reference at all, or NaNs differ
+* float32 results differ by more than TOL_FLOAT32 = 1e-3 degF (or degC),
+    except where the old float32 sum rounded the Steadman average to exactly
+    80 degF, where the old version returned 0 (at most MAX_ROUNDING = 1
+    points on the default grid)
+* the result type differs from the input type (numpy, DataArray, or dask
+    array, which must stay lazy), or float32 inputs do not give float32
+
+Usage (from the directory containing ClimFuncs.py):
+    python -m benchmarks.check_heatindex
+
+"""
+
+import argparse
+import sys
+import numpy as np
+import xarray as xr
+import dask.array as da
+from ClimFuncs import heatindex, C_to_F, F_to_C
+
+# Grid spacing (degF and %)
+STEP_T = 0.05
+STEP_RH = 0.05
+
+# Tolerance for float32 (degF or degC) and number of points where the old
+# float32 sum rounded the Steadman average to exactly 80 degF
+TOL_FLOAT32 = 1e-3
+MAX_ROUNDING = 1
+
+
+def masked_sum_heatindex(Tmax, RH, unit_in, unit_out):
+    """
+    The masked-sum heat index that ClimFuncs.heatindex replaced, unchanged.
+    Tmax and RH must be DataArrays.
+
+    """
+    # 1 convert C to F if needed
+    if unit_in == 'C':
+        Tmax = C_to_F(Tmax)
+
+    # 2 Apply Steadman's and average with Tmax
+    USE_STEADMAN = (0.5 * (Tmax + 61.0 + ((Tmax-68.0)*1.2) + (RH*0.094)) + Tmax) / 2 < 80
+    STEADMAN = USE_STEADMAN * (0.5 * (Tmax + 61.0 + ((Tmax-68.0)*1.2) + (RH*0.094)))
+
+    # 3 Use Rothfusz if (STEADMAN + Tmax) / 2 > 80
+    USE_ROTH = (0.5 * (Tmax + 61.0 + ((Tmax-68.0)*1.2) + (RH*0.094)) + Tmax) / 2 > 80
+    ROTH = USE_ROTH * (-42.379 + 2.04901523*Tmax + 10.14333127*RH - .22475541*Tmax *RH - .00683783*Tmax*Tmax - .05481717*RH*RH + .00122874*Tmax*Tmax*RH + .00085282*Tmax*RH*RH - .00000199*Tmax*Tmax*RH*RH)
+
+    # 3 Adjust Roth 1
+    USE_ADJ1 = (RH < 13) & (Tmax > 80) & (Tmax < 112)
+    ADJ1_RH = USE_ADJ1 * RH
+    ADJ1_RH = ADJ1_RH.where(ADJ1_RH != 0)
+    ADJ1_Tmax = USE_ADJ1 * Tmax
+    ADJ1_Tmax = ADJ1_Tmax.where(ADJ1_Tmax != 0)
+    ADJ1 = ((13-ADJ1_RH)/4)*np.sqrt((17-abs(ADJ1_Tmax-95.))/17)
+    ADJ1 = np.nan_to_num(ADJ1, 0)
+
+    ADJ1_ROTH = ROTH * USE_ADJ1
+    ADJ1_ROTH = ADJ1_ROTH - ADJ1
+
+    # 4 Adjust Roth 2
+    USE_ADJ2 = (RH > 85) & (Tmax > 80) & (Tmax < 87)
+    ADJ2_RH = USE_ADJ2 * RH
+    ADJ2_RH = ADJ2_RH.where(ADJ2_RH != 0)
+    ADJ2_Tmax = USE_ADJ2.astype(int) * Tmax
+    ADJ2_Tmax = ADJ2_Tmax.where(ADJ2_Tmax != 0)
+    ADJ2 = ((ADJ2_RH-85)/10) * ((87-ADJ2_Tmax)/5)
+    ADJ2 = np.nan_to_num(ADJ2, 0)
+
+    ADJ2_ROTH = ROTH * USE_ADJ2
+    ADJ2_ROTH = ADJ2_ROTH + ADJ2
+
+    # Roth w/o adjustments
+    ROTH = ROTH * ~USE_ADJ1 * ~USE_ADJ2
+
+    # sum the stacked arrays
+    HI = ROTH + STEADMAN + ADJ1_ROTH +  ADJ2_ROTH
+
+    # Convert HI to C if desired
+    if unit_out == 'C':
+        HI = F_to_C(HI)
+
+    return HI
+
+
+def make_inputs(unit_in, dtype):
+    """
+    Returns temperature and relative humidity DataArrays on the test grid
+    (with a row of NaN temperatures and a column of NaN humidities).
+
+    """
+    T = np.append(np.arange(40., 130. + STEP_T / 2, STEP_T), np.nan)
+    RH = np.append(np.arange(0., 100. + STEP_RH / 2, STEP_RH), np.nan)
+    if unit_in == 'C':
+        T = F_to_C(T)
+    T, RH = np.meshgrid(T, RH, indexing='ij')
+
+    return [xr.DataArray(x.astype(dtype), dims=('T', 'RH'), name=name)
+            for x, name in ((T, 'T'), (RH, 'RH'))]
+
+
+def check(name, result, ref, dtype, kind, zero=0.):
+    """
+    Prints the comparison of a result with the reference and returns True
+    if it passes. zero is the old result where the Steadman average was
+    exactly 80 degF (0 degF in the output unit).
+
+    """
+    problems = []
+    expected = dict(numpy=np.ndarray, xarray=xr.DataArray, dask=da.Array)[kind]
+    if not isinstance(result, expected):
+        problems.append(f'returned {type(result).__name__}')
+    elif kind == 'xarray' and not isinstance(result.data, np.ndarray):
+        problems.append('returned a lazy DataArray')
+    elif kind == 'dask':
+        result = result.compute()
+    result = np.asarray(result)
+    if result.dtype != dtype:
+        problems.append(f'returned {result.dtype.name}')
+
+    ref = np.asarray(ref)
+    if np.count_nonzero(np.isnan(result) != np.isnan(ref)):
+        problems.append('NaNs differ')
+    diff = np.abs(result.astype(np.float64) - ref.astype(np.float64))
+    max_diff = np.nanmax(diff)
+    if dtype == np.float64:
+        if max_diff > 0:
+            problems.append(f'max difference {max_diff:.2e}')
+    else:
+        bad = diff > TOL_FLOAT32
+        rounding = np.isclose(ref, zero, atol=TOL_FLOAT32)
+        if np.count_nonzero(bad & ~rounding) or np.count_nonzero(bad) > MAX_ROUNDING:
+            problems.append(f'{np.count_nonzero(bad)} points differ by more than '
+                            f'{TOL_FLOAT32:.0e}')
+        max_diff = np.nanmax(np.where(bad, 0, diff))
+
+    print(f"{name:25s} max difference {max_diff:.2e}: "
+          f"{'FAIL (' + ', '.join(problems) + ')' if problems else 'ok'}")
+
+    return not problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Check heatindex against the masked-sum implementation')
+    parser.parse_args(argv)
+
+    ok = True
+    for dtype in (np.float64, np.float32):
+        for unit_in in ('F', 'C'):
+            for unit_out in ('F', 'C'):
+                T, RH = make_inputs(unit_in, dtype)
+                ref = masked_sum_heatindex(T, RH, unit_in, unit_out)
+                inputs = dict(numpy=(T.values, RH.values), xarray=(T, RH),
+                              dask=(da.from_array(T.values, chunks=500),
+                                    da.from_array(RH.values, chunks=500)))
+                for kind, (t, rh) in inputs.items():
+                    result = heatindex(t, rh, unit_in, unit_out)
+                    name = f'{np.dtype(dtype).name} {unit_in}->{unit_out} {kind}'
+                    ok &= check(name, result, ref, dtype, kind,
+                                zero=0. if unit_out == 'F' else F_to_C(0.))
+
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
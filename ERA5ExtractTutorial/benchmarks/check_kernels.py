@@ -0,0 +1,190 @@
+"""
+Accuracy check for the fused wet-bulb kernels in atmos.kernels and the
+saturation-point temperatures in atmos.thermo.
+
+kernels.adiabatic_wet_bulb_temperature and
+kernels.wet_bulb_potential_temperature are compared with the unfused path
+they replace: the LCL followed by the pseudoadiabat polynomial fits
+(pseudoadiabat.wbpt and pseudoadiabat.temp, as used by
+thermo.follow_moist_adiabat with pseudo_method='polynomial'). Both the
+kernels and thermo use atmos.lambertw.lambertw_m1, so the reference
+evaluates the Romps (2017, 2021) expressions in double precision with
+scipy.special.lambertw(k=-1) instead. The dewpoint, frost-point, and
+saturation-point temperatures and the LCL, LDL, and LSL temperatures from
+atmos.thermo are compared with the same reference, for float64 and float32
+inputs (for ice, the Lambert W argument underflows in single precision).
+
+Inputs cover the range of ERA5 surface fields: pressure 450-1080 hPa,
+temperature -70 to 55 degC, and dewpoint depression 0-60 K, on a regular
+grid (which includes the edges of the range and saturated air) and at random
+points. The check fails (exit status 1) if any difference exceeds:
+* TOL_FLOAT64 = 1e-6 K for float64 inputs (the kernels should agree with the
+    unfused path to within round-off, amplified by the polynomial fits)
+* TOL_FLOAT32 = 5e-5 K for float32 inputs to the kernels (the kernels
+    compute in double precision and round the result, so the difference is
+    about half a unit in the last place of a float32 near 330 K, 1.5e-5 K)
+* TOL_SATURATION_FLOAT32 = 2e-4 K for float32 inputs to the thermo
+    functions (these compute relative humidity and the effective gas
+    constant and specific heat in single precision, giving differences of up
+    to about 8e-5 K; an underflowing Lambert W argument gives errors of
+    hundreds of K in the frost-point and saturation-point temperatures)
+or if a result is NaN where the reference is not, or vice versa (outside
+the range of the fits).
+
+Usage (from the directory containing the atmos package):
+    python -m benchmarks.check_kernels
+    python -m benchmarks.check_kernels --n 10000000
+
+"""
+
+import argparse
+import sys
+from unittest import mock
+import numpy as np
+from scipy.special import lambertw
+from atmos import thermo, kernels, pseudoadiabat
+from atmos.constant import p_ref
+from atmos.moisture import specific_humidity_from_dewpoint_temperature
+
+# Ranges of ERA5 surface pressure (Pa), temperature (K), and dewpoint
+# depression (K)
+P_RANGE = (45000., 108000.)
+T_RANGE = (203.15, 328.15)
+D_RANGE = (0., 60.)
+
+# Tolerances (K)
+TOL_FLOAT64 = 1e-6
+TOL_FLOAT32 = 5e-5
+TOL_SATURATION_FLOAT32 = 2e-4
+
+# Target precision for the iterative saturation-point and LSL temperatures
+# (attainable in single precision)
+CONVERGED = 1e-4
+
+
+def make_inputs(n, seed=0):
+    """
+    Returns pressure, temperature, and specific humidity on a regular grid
+    spanning the ERA5 range followed by n random points in the same range.
+
+    """
+    axes = [np.linspace(x0, x1, 41) for (x0, x1) in (P_RANGE, T_RANGE,
+                                                    D_RANGE)]
+    p, T, D = [x.ravel() for x in np.meshgrid(*axes, indexing='ij')]
+    rng = np.random.default_rng(seed)
+    p = np.concatenate([p, rng.uniform(*P_RANGE, n)])
+    T = np.concatenate([T, rng.uniform(*T_RANGE, n)])
+    D = np.concatenate([D, rng.uniform(*D_RANGE, n)])
+    q = specific_humidity_from_dewpoint_temperature(p, T - D)
+
+    return p, T, q
+
+
+def scipy_lambertw_m1(x):
+    """
+    Computes the k=-1 branch of the Lambert W function with scipy, mapping
+    arguments below -1/e to the branch point as atmos.lambertw.lambertw_m1
+    does.
+
+    """
+    x = np.maximum(np.asarray(x, dtype=np.float64), -np.exp(-1.))
+
+    return lambertw(x, k=-1).real
+
+
+def reference(p, T, q):
+    """
+    Computes Tw and thetaw by the unfused LCL + pseudoadiabat path and the
+    saturation-point temperatures in double precision, using
+    scipy.special.lambertw.
+
+    """
+    p, T, q = [np.asarray(x, dtype=np.float64) for x in (p, T, q)]
+    with mock.patch.object(thermo, 'lambertw_m1', scipy_lambertw_m1):
+        saturation = saturation_point_temperatures(p, T, q)
+    T_lcl = saturation['lifting_condensation_level']
+    p_lcl = thermo.lifting_condensation_level(p, T, q)[0]
+    thw = pseudoadiabat.wbpt(p_lcl, T_lcl)
+    Tw = pseudoadiabat.temp(p, thw)
+    thetaw = pseudoadiabat.temp(p_ref, thw)
+
+    return Tw, thetaw, saturation
+
+
+def saturation_point_temperatures(p, T, q):
+    """
+    Returns a dictionary of the temperatures computed by atmos.thermo using
+    the Lambert W function, keyed by function name.
+
+    """
+    return {
+        'dewpoint_temperature': thermo.dewpoint_temperature(p, T, q),
+        'frost_point_temperature': thermo.frost_point_temperature(p, T, q),
+        'saturation_point_temperature':
+            thermo.saturation_point_temperature(p, T, q, converged=CONVERGED),
+        'lifting_condensation_level':
+            thermo.lifting_condensation_level(p, T, q)[1],
+        'lifting_deposition_level':
+            thermo.lifting_deposition_level(p, T, q)[1],
+        'lifting_saturation_level':
+            thermo.lifting_saturation_level(p, T, q, converged=CONVERGED)[1],
+    }
+
+
+def check(name, result, ref, tol):
+    """
+    Prints the maximum difference between a kernel result and the reference
+    and returns True if it is within the tolerance.
+
+    """
+    nan_mismatch = np.count_nonzero(np.isnan(result) != np.isnan(ref))
+    diff = np.abs(result.astype(np.float64) - ref)
+    max_diff = np.nanmax(diff) if np.any(np.isfinite(diff)) else 0.
+    ok = nan_mismatch == 0 and max_diff <= tol
+    print(f"{name:45s} max difference {max_diff:.2e} K (tolerance "
+          f"{tol:.0e} K), {nan_mismatch} NaN mismatches: "
+          f"{'ok' if ok else 'FAIL'}")
+
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Check the fused wet-bulb kernels and saturation-point '
+                    'temperatures against a scipy reference')
+    parser.add_argument('--n', type=float, default=1e6,
+                        help='number of random points (default is 1e6)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    p, T, q = make_inputs(int(args.n), args.seed)
+    ok = True
+    for dtype, tol, tol_saturation in (
+            (np.float64, TOL_FLOAT64, TOL_FLOAT64),
+            (np.float32, TOL_FLOAT32, TOL_SATURATION_FLOAT32)):
+        x = [v.astype(dtype) for v in (p, T, q)]
+        Tw_ref, thetaw_ref, saturation_ref = reference(*x)
+        Tw = kernels.adiabatic_wet_bulb_temperature(*x)
+        thetaw = kernels.wet_bulb_potential_temperature(*x)
+        if Tw.dtype != dtype or thetaw.dtype != dtype:
+            print(f'{np.dtype(dtype).name} inputs gave {Tw.dtype.name} '
+                  f'outputs: FAIL')
+            ok = False
+        name = np.dtype(dtype).name
+        ok &= check(f'adiabatic_wet_bulb_temperature[{name}]', Tw, Tw_ref,
+                    tol)
+        ok &= check(f'wet_bulb_potential_temperature[{name}]', thetaw,
+                    thetaw_ref, tol)
+        for fname, result in saturation_point_temperatures(*x).items():
+            if result.dtype != dtype:
+                print(f'{fname}: {np.dtype(dtype).name} inputs gave '
+                      f'{result.dtype.name} outputs: FAIL')
+                ok = False
+            ok &= check(f'{fname}[{name}]', result, saturation_ref[fname],
+                        tol_saturation)
+
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
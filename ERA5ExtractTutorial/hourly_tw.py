@@ -2,78 +2,350 @@
 #########################################################################################################
 #
 #   Hourly tw
-#   Cascade Tuholske Jan 2024 cascade (d0t) tuholske1 (at) montana (d0t) edu 
+#   Cascade Tuholske Jan 2024 cascade (d0t) tuholske1 (at) montana (d0t) edu
 #
 #   Code to calculate hourly wet bulb globe temperture (tw) following the NEWT method
-#   from ERA5 surface pressure, dew point temperature, and 2m air temperature. 
+#   from ERA5 surface pressure, dew point temperature, and 2m air temperature.
 #
 #   NEWT code has been borrowed from: https://github.com/robwarrenwx/atmos/tree/main
 #
 #   Notes 2024-01-16: Set up to run on one small annual NetCDF File. Will need to be adjusted to
-#   to run on full global (cpt). 
+#   to run on full global (cpt).
+#
+#   Notes: Now runs on any number of monthly/annual ERA5 input files (glob pattern). Each file is
+#   processed one time block (e.g. one month) at a time, so only one block needs to fit in memory,
+#   and each block is written straight to a chunked NetCDF or Zarr output. Completed blocks are
+#   logged to <output>.done, so re-running the same command after a crash picks up where it left
+#   off. The log only applies to the output it was written with: creating a new Zarr store clears it,
+#   and a NetCDF block whose file is missing is computed again. Examples:
+#
+#       python hourly_tw.py --inputs '../data/raw/ERA5/BGD-WBT-Inputs-*.nc'
+#       python hourly_tw.py --inputs '../data/raw/ERA5/*-WBT-Inputs-*.nc' --format zarr --block MS
+#
+#   Notes: --incremental is for daily operational updates of a Zarr output. Each input day is
+#   checksummed and compared with the checksums from the last run (<output>.sums.json), and only
+#   new days, or days whose hourly inputs changed (e.g. preliminary ERA5T replaced by final ERA5),
+#   are computed and written (appended, or overwritten in place). --daily also keeps a store of
+#   daily maxima (twmax, tmin, tmax, himax, wbgtmax), updated for the same days. The cost of an
+#   update is the new days plus reading the inputs for the checksums (limit with --recheck-days):
+#
+#       python hourly_tw.py --inputs '../data/raw/ERA5/BGD-WBT-Inputs-2024.nc' --format zarr \
+#           --incremental --daily --recheck-days 90
+#
+#   Chunk sizes and the dask worker layout are planned from the machine's CPUs and memory (or
+#   --n-workers/--memory) and the measured cost of the tw kernel on the first hours of each file
+#   (see PlanFuncs.py). --time-chunk and --tile override the plan. A resumed Zarr run keeps the chunks
+#   of the existing store, whatever the plan or options.
+#
+#   Output is compressed (zstd by default) and can be packed to int16 (--packing int16, 0.002 °C
+#   precision) or float16 (zarr only). Zarr output needs zarr>=3 and numcodecs, which environment.yml
+#   does not include (see StoreFuncs.py). Chunks are time-chunk hours x --tile spatial tiles, which
+#   suits maps. For point extraction / time series make a time-contiguous copy afterwards:
+#
+#       import StoreFuncs
+#       StoreFuncs.rechunk('../data/processed/BGD-WBT-hr-2020.zarr',
+#                          '../data/processed/BGD-WBT-hr-2020-ts.zarr', layout='time')
 #
 #########################################################################################################
 
 # Dependencies
+import argparse
 import dask
 import os
 import glob
+import shutil
 import xarray as xr
 import numpy as np
 import pandas as pd
-import rioxarray as rio
-import sys
-import rasterio
-from dask.distributed import Client, LocalCluster
-from atmos import moisture 
-from atmos import thermo 
+import atmos.xarray # registers ds.atmos
+from atmos.xarray import wet_bulb_from_dewpoint
+import StoreFuncs
+import PlanFuncs
+import ClimFuncs
 
-# Run it
-if __name__ == "__main__":
-    
-    # start cluster 
-    n_cpu = 10 # number of CPUs for dask to work with 
-    cluster = LocalCluster(n_workers = n_cpu, threads_per_worker = 1) # online forms say 1 thread is fastests 
-    client = Client(cluster)
-    print('start!')
-    print('progress url:', client.dashboard_link)
-    
-    # Set up path + file
-    path = os.path.join('../data/raw/ERA5/')
-    fn = os.path.join(path, 'BGD-WBT-Inputs-2020.nc')
-    print('start: ', fn) 
-    
-    # Code to set up list of monthly .netcdf files if needed
-    
-    # File names to write hourly tw files 
-    handles = fn.split(path)[1].split('-')
-    fn_out = os.path.join('../data/processed/'+handles[0]+'-'+handles[1]+'-hr-'+handles[3])
-    print('File out:', fn_out)
-    
-    # Code to stack and open as Dask Array all monthly .netcdf files 
-    
-    # Open as Dask Array single file                                
-    chunk = dict(time='auto', latitude= 'auto', longitude= 'auto') # need  pull len the time dim automatically
-                                                                   # Chunk will need reconfiged for global raster       
-    ds = xr.open_dataset(fn, chunks = chunk)
-    
-    # Hourly WBT
-    
-    # first specific_humidity_from_dewpoint_temperature(p, Td) - Don't compute dask arrays yet
-    q = xr.apply_ufunc(moisture.specific_humidity_from_dewpoint_temperature, ds.sp, ds.d2m, dask='parallelized')
-    q = q.rename('q')
-    
-    # Compute dask arrays: adiabatic_wet_bulb_temperature(p, T, q, phase='liquid', pseudo_method='polynomial')
-    tw = xr.apply_ufunc(thermo.adiabatic_wet_bulb_temperature, ds.sp, ds.t2m, q, dask='parallelized').compute()
+#### Functions
+def parse_args(argv=None):
+    "Command line arguments"
+    parser = argparse.ArgumentParser(description='Hourly wet bulb temperature (tw) from ERA5')
+    parser.add_argument('--inputs', default='../data/raw/ERA5/*-WBT-Inputs-*.nc',
+                        help='glob pattern for ERA5 input files with sp, t2m and d2m')
+    parser.add_argument('--out-dir', default='../data/processed/', help='output directory')
+    parser.add_argument('--format', default='netcdf', choices=['netcdf', 'zarr'],
+                        help='output format (netcdf writes one file per block)')
+    parser.add_argument('--block', default='MS',
+                        help='pandas frequency of the time blocks processed at once (default is monthly)')
+    parser.add_argument('--time-chunk', type=int, default=None,
+                        help='time chunk size for dask and the output, a divisor of 24 (default is planned)')
+    parser.add_argument('--n-workers', type=int, default=None,
+                        help='number of dask workers (default is one per CPU, 0 uses the threaded scheduler)')
+    parser.add_argument('--threads-per-worker', type=int, default=1, help='threads per dask worker')
+    parser.add_argument('--memory', default=None,
+                        help='total memory for the workers, e.g. 32GB (default is 80%% of RAM)')
+    parser.add_argument('--tile', type=int, default=None,
+                        help='spatial tile size of the dask and output chunks (default is planned)')
+    parser.add_argument('--compression', default='zstd', choices=['zstd', 'blosc', 'zlib', 'none'],
+                        help='output compression (zlib is netcdf only)')
+    parser.add_argument('--level', type=int, default=3, help='compression level')
+    parser.add_argument('--packing', default='none', choices=['none', 'int16', 'float16'],
+                        help='pack output values (float16 is zarr only)')
+    parser.add_argument('--overwrite', action='store_true', help='recompute completed blocks')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only compute new days and days whose inputs changed (zarr only)')
+    parser.add_argument('--daily', action='store_true',
+                        help='with --incremental, also update a store of daily maxima')
+    parser.add_argument('--recheck-days', type=int, default=None,
+                        help='with --incremental, only checksum the last N days of each input (default all)')
+
+    args = parser.parse_args(argv)
+    if args.incremental and args.format != 'zarr':
+        parser.error('--incremental needs --format zarr')
+    if args.daily and not args.incremental:
+        parser.error('--daily needs --incremental')
+    if args.time_chunk is not None and (args.time_chunk < 1 or 24 % args.time_chunk):
+        # blocks are whole days, so chunks must divide a day for every block to start on a chunk
+        parser.error('--time-chunk must divide 24 (1, 2, 3, 4, 6, 8, 12 or 24)')
+
+    return args
+
+def output_path(fn, out_dir, fmt):
+    """Output name from input name, e.g. BGD-WBT-Inputs-2020.nc -> BGD-WBT-hr-2020.zarr for Zarr, or
+    the directory BGD-WBT-hr-2020/ holding one NetCDF file per block (open with xr.open_mfdataset)"""
+    handles = os.path.basename(fn).split('-')
+    name = handles[0]+'-'+handles[1]+'-hr-'+os.path.splitext(handles[3])[0]
+
+    return os.path.join(out_dir, name + ('.zarr' if fmt == 'zarr' else ''))
+
+def time_blocks(times, freq):
+    "Returns (label, slice) for each contiguous block of the time index at the given pandas frequency"
+    pos = pd.Series(np.arange(len(times)), index=pd.DatetimeIndex(times))
+    blocks = []
+    for label, group in pos.resample(freq):
+        if len(group) > 0:
+            blocks.append((label.strftime('%Y%m%d%H'), slice(int(group.iloc[0]), int(group.iloc[-1]) + 1)))
+
+    return blocks
+
+def read_done(fn_done):
+    "Set of completed block labels"
+    if not os.path.exists(fn_done):
+        return set()
+    with open(fn_done) as f:
+        return set(line.strip() for line in f if line.strip())
+
+def mark_done(fn_done, label):
+    "Log a completed block (flushed to disk so the log survives a crash)"
+    with open(fn_done, 'a') as f:
+        f.write(label + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+def wet_bulb(ds):
+    "Lazy hourly tw (°C) from a dataset with sp, t2m and d2m"
+
+    # specific_humidity_from_dewpoint_temperature(p, Td) then adiabatic_wet_bulb_temperature(p, T, q,
+    # phase='liquid', pseudo_method='polynomial'), fused into one dask task per chunk - still lazy
+    tw = ds.atmos.wet_bulb(p='sp', T='t2m', Td='d2m')
     tw = tw - 273.15 # k to c
     tw = tw.rename('tw')
-    
-    # To ds then write to disk
+    tw.attrs['units'] = '°C'
+
+    # To ds with attributes
     tw_ds = tw.to_dataset()
-    
-    # Add attributes 
-    # Needs spatial data from inputfile 
     tw_ds.attrs = dict(data = 'wet buble temperature from ERA5', method='NEWT', unit = '°C')
 
-    tw_ds.to_netcdf(fn_out)
-    print('done!')
\ No newline at end of file
+    return tw_ds
+
+def daily_path(fn_out):
+    "Daily output name from the hourly one, e.g. BGD-WBT-hr-2020.zarr -> BGD-WBT-day-2020.zarr"
+    head, tail = os.path.split(fn_out)
+
+    return os.path.join(head, tail.replace('-hr-', '-day-', 1))
+
+def daily_max(ds, tw_ds):
+    "Lazy daily twmax, tmin, tmax, himax and wbgtmax (°C) from hourly inputs and tw"
+    twmax = tw_ds.tw.resample(time='1D').max().rename('twmax')
+    heat = ClimFuncs.daily_heat(ds, 't2m', 'd2m', time='time')
+
+    return xr.merge([twmax, heat])
+
+def plan_file(fn, args, workers):
+    "Plan the chunks for one input file from its shape and the measured cost of the tw kernel"
+    with xr.open_dataset(fn) as ds:
+        sizes = dict(time=ds.sizes['time'], latitude=ds.sizes['latitude'], longitude=ds.sizes['longitude'])
+        sample = ds.isel(time=slice(0, 2))
+        args_k = [sample.sp.values, sample.t2m.values, sample.d2m.values]
+    cost, temp_mult = PlanFuncs.measure_kernel(wet_bulb_from_dewpoint, args_k)
+    plan = PlanFuncs.plan_chunks(sizes, args_k[1].dtype.itemsize, 3, 1, temp_mult, cost,
+                                 workers['n_workers'], workers['threads_per_worker'],
+                                 workers['memory_limit'], max_time_chunk=24)
+    print('plan:', PlanFuncs.describe(workers, plan))
+
+    return plan['chunks']
+
+def process_file(fn, args, workers):
+    "Compute and write hourly tw for one input file, one time block at a time"
+
+    fn_out = output_path(fn, args.out_dir, args.format)
+    fn_done = fn_out + '.done'
+    print('start: ', fn)
+    print('File out:', fn_out)
+
+    if args.overwrite and os.path.exists(fn_done):
+        os.remove(fn_done)
+    done = read_done(fn_done)
+
+    # Chunks: an existing Zarr store fixed them on its first write, so a resumed run keeps them.
+    # Otherwise planned, unless given on the command line
+    resume = args.format == 'zarr' and os.path.exists(fn_out) and not args.overwrite
+    if resume:
+        layout = StoreFuncs.store_chunks(fn_out)
+        print('chunks from existing store:', layout)
+    else:
+        layout = plan_file(fn, args, workers)
+        if args.time_chunk is not None:
+            layout['time'] = args.time_chunk
+        if args.tile is not None:
+            layout['latitude'] = layout['longitude'] = args.tile
+
+    # Open as Dask Array with the output chunks
+    ds = xr.open_dataset(fn, chunks = layout)
+    tw_ds = wet_bulb(ds)
+    blocks = time_blocks(ds.time.values, args.block)
+    compression = None if args.compression == 'none' else args.compression
+    packing = None if args.packing == 'none' else args.packing
+    encoding = StoreFuncs.make_encoding(tw_ds, args.format, layout, compression, args.level, packing)
+
+    # Zarr: write the metadata for the whole store once, then fill it block by block. A new store
+    # holds no blocks, whatever the log says (e.g. the old store was deleted but not its log)
+    if args.format == 'zarr' and not resume:
+        tw_ds.to_zarr(fn_out, mode='w', encoding=encoding, compute=False)
+        if os.path.exists(fn_done):
+            os.remove(fn_done)
+        done = set()
+    if args.format == 'zarr':
+        chunks = StoreFuncs.store_chunks(fn_out)
+    if args.format == 'netcdf':
+        os.makedirs(fn_out, exist_ok=True)
+
+    for label, block in blocks:
+        fn_block = os.path.join(fn_out, label + '.nc')
+        if label in done and (args.format == 'zarr' or os.path.exists(fn_block)):
+            print('skip (done):', label)
+            continue
+
+        tw_block = tw_ds.isel(time=block)
+        if args.format == 'zarr':
+            # drop coords that don't have a time dim, these are already in the store
+            tw_block = tw_block.drop_vars([v for v in tw_block.coords if 'time' not in tw_block[v].dims])
+            # in the store's chunks, so blocks that don't start on a chunk (e.g. inputs starting after
+            # 00 UTC) never have two tasks writing one chunk
+            StoreFuncs.write_pieces(tw_block, fn_out, block.start, chunks)
+        else:
+            # write to a temp file and rename, so a crash never leaves a partial block behind
+            fn_tmp = fn_block + '.tmp'
+            encoding = StoreFuncs.make_encoding(tw_block, 'netcdf', layout, compression, args.level,
+                                                packing)
+            delayed = tw_block.to_netcdf(fn_tmp, engine='netcdf4', encoding=encoding, compute=False)
+            dask.compute(delayed)
+            os.replace(fn_tmp, fn_block)
+
+        mark_done(fn_done, label)
+        print('block done:', label)
+
+    ds.close()
+
+def update_file(fn, args, workers):
+    """Incremental update: compute and write tw (and daily maxima) only for the days of one input file
+    that are new or whose inputs changed since the last run, found from per-day checksums"""
+
+    fn_out = output_path(fn, args.out_dir, args.format)
+    fn_day = daily_path(fn_out) if args.daily else None
+    fn_sums = fn_out + '.sums.json'
+    print('update: ', fn)
+    print('File out:', fn_out)
+
+    if args.overwrite:
+        for path in (fn_out, fn_day, fn_sums):
+            if path is not None and os.path.isdir(path):
+                shutil.rmtree(path)
+            elif path is not None and os.path.exists(path):
+                os.remove(path)
+    old = StoreFuncs.read_checksums(fn_sums)
+    if args.daily and not os.path.exists(fn_day):
+        old = {} # the daily store needs every day
+
+    # Checksum the input days (only the last --recheck-days, plus days never seen)
+    with xr.open_dataset(fn) as ds_raw:
+        days = pd.unique(pd.DatetimeIndex(ds_raw.time.values).strftime('%Y-%m-%d'))
+        check = set(days) if args.recheck_days is None else \
+            set(days[-args.recheck_days:]) | (set(days) - set(old))
+        new = StoreFuncs.day_checksums(ds_raw, ['sp', 't2m', 'd2m'], days=check)
+    todo = [d for d in days if d in new and old.get(d) != new[d]]
+    print(len(todo), 'of', len(days), 'days to compute')
+    if not todo:
+        return
+
+    layout = plan_file(fn, args, workers)
+    if args.time_chunk is not None:
+        layout['time'] = args.time_chunk
+    if args.tile is not None:
+        layout['latitude'] = layout['longitude'] = args.tile
+
+    ds = xr.open_dataset(fn, chunks = layout)
+    tw_ds = wet_bulb(ds)
+    compression = None if args.compression == 'none' else args.compression
+    packing = None if args.packing == 'none' else args.packing
+    encoding = StoreFuncs.make_encoding(tw_ds, 'zarr', layout, compression, args.level, packing)
+    labels = pd.DatetimeIndex(ds.time.values).strftime('%Y-%m-%d')
+
+    # Runs of consecutive days to compute are written in one go: updated in place, or appended
+    runs = np.split(np.array(todo), np.flatnonzero(np.diff(np.searchsorted(days, todo)) != 1) + 1)
+    for run in runs:
+        pos = np.flatnonzero((labels >= run[0]) & (labels <= run[-1]))
+        block = slice(pos[0], pos[-1] + 1)
+        n_upd, n_app = StoreFuncs.upsert(tw_ds.isel(time=block), fn_out, encoding=encoding)
+        if args.daily:
+            daily = daily_max(ds.isel(time=block), tw_ds.isel(time=block))
+            day_encoding = StoreFuncs.make_encoding(daily, 'zarr', dict(layout, time=-1), compression,
+                                                    args.level)
+            StoreFuncs.upsert(daily, fn_day, encoding=day_encoding)
+
+        # record the checksums only once the days are written, so a crash recomputes them
+        old.update({d: new[d] for d in run})
+        StoreFuncs.write_checksums(fn_sums, old)
+        print('days done:', run[0], '-', run[-1], '(%d hours updated, %d appended)' % (n_upd, n_app))
+
+    ds.close()
+
+# Run it
+if __name__ == "__main__":
+
+    args = parse_args()
+
+    # start cluster
+    if args.n_workers == 0:
+        # threaded scheduler, all CPUs share the memory
+        n_cpu, _ = PlanFuncs.system_resources()
+        workers = PlanFuncs.plan_workers(memory=args.memory, threads_per_worker=n_cpu)
+    else:
+        workers = PlanFuncs.plan_workers(n_cpu=args.n_workers and args.n_workers * args.threads_per_worker,
+                                         memory=args.memory, threads_per_worker=args.threads_per_worker)
+        from dask.distributed import Client, LocalCluster
+        cluster = LocalCluster(n_workers = workers['n_workers'], threads_per_worker = workers['threads_per_worker'],
+                               memory_limit = workers['memory_limit']) # online forms say 1 thread is fastests
+        client = Client(cluster)
+        print('progress url:', client.dashboard_link)
+    print('start!')
+
+    # Set up list of monthly/annual .netcdf files
+    fns = sorted(glob.glob(args.inputs))
+    print(len(fns), 'input files')
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    for fn in fns:
+        if args.incremental:
+            update_file(fn, args, workers)
+        else:
+            process_file(fn, args, workers)
+
+    print('done!')
@@ -0,0 +1,496 @@
+"""
+Generates Numba-compiled polynomial fits for pseudoadiabats.
+
+Fits the two functions of Moisseeva and Stull (2017):
+* wbpt(p, T): wet-bulb potential temperature thw of the pseudoadiabat that
+    passes through pressure p and temperature T (Eq. 4-6)
+* temp(p, thw): temperature T at pressure p on the pseudoadiabat with
+    wet-bulb potential temperature thw (Eq. 1-3)
+
+against a reference computed by integrating pseudoadiabats iteratively
+(thermo.follow_moist_adiabat with pseudo_method='compiled'), reports the
+maximum and RMS errors on a validation grid offset from the fitting grid, and
+writes a module containing the fitted functions.
+
+Each function is a polynomial in a reference function of pressure:
+* Tref(p) is the wet-bulb potential temperature of the pseudoadiabat passing
+    through T = -90 degC at pressure p
+* thref(p) is the temperature at pressure p on the pseudoadiabat with
+    thw = 20 degC
+which is fitted by a univariate polynomial in p, and a bivariate polynomial in
+Tref (thref) and T (thw). All polynomials are evaluated in Horner form in
+variables scaled to [-1, 1].
+
+Usage (from the directory containing the atmos package):
+    python -m pseudoadiabat_codegen.pseudoadiabat_codegen --phase ice
+    python -m pseudoadiabat_codegen.pseudoadiabat_codegen --phase mixed
+
+By default the output is written to atmos/pseudoadiabat_<phase>.py. The
+liquid fits in atmos/pseudoadiabat.py are not generated by this tool, so
+--phase liquid requires an explicit --out.
+
+With the --bicubic flag, the tables used by atmos.pseudoadiabat_bicubic are
+generated instead and written to atmos/pseudoadiabat_bicubic_<phase>.npz:
+    python -m pseudoadiabat_codegen.pseudoadiabat_codegen --bicubic
+
+References:
+* Moisseeva, N. and Stull, R., 2017. A noniterative approach to modelling
+    moist thermodynamics. Atmospheric Chemistry and Physics, 17, 15037-15043.
+
+"""
+
+import argparse
+import os
+import numpy as np
+from numpy.polynomial import chebyshev
+from atmos import thermo
+
+# Limits of the fits (hPa and degC)
+P_MIN, P_MAX = 50., 1100.
+T_MIN, T_MAX = -100., 50.
+THW_MIN, THW_MAX = -70., 50.
+
+# Reference temperature for Tref(p) and reference thw for thref(p) (degC)
+T_REF = -90.
+THW_REF = 20.
+
+# Fitting grid spacing (hPa and degC)
+DP = 5.
+DT = 0.5
+
+# Default polynomial degrees (in p, in Tref/thref, and in T/thw) by phase
+DEGREES = {'liquid': (20, 10, 20),
+           'ice': (24, 16, 30),
+           'mixed': (20, 14, 24)}
+
+HEADER = """\
+# *** This file is generated by pseudoadiabat_codegen/pseudoadiabat_codegen.py ***
+# *** Please ensure any updates are made in pseudoadiabat_codegen.py           ***
+"""
+
+TEMPLATE = '''{header}#
+# Phase: {phase}
+# wbpt: max error {wbpt_max:.4f} K, RMS error {wbpt_rms:.4f} K
+# temp: max error {temp_max:.4f} K, RMS error {temp_rms:.4f} K
+import numpy as np
+from numba import vectorize
+
+# Maximum errors on the validation grid (K)
+WBPT_MAX_ERROR = {wbpt_max:.4f}
+TEMP_MAX_ERROR = {temp_max:.4f}
+
+
+@vectorize(nopython=True, cache=True)
+def wbpt(p, T):
+    """
+    Computes the wet-bulb potential temperature (WBPT) thw of the
+    {phase} pseudoadiabat that passes through pressure p and temperature T.
+
+    Uses polynomial approximations of the form given by Moisseeva and
+    Stull (2017), fitted using pseudoadiabat_codegen.py.
+
+    Moisseeva, N. and Stull, R., 2017. A noniterative approach to
+        modelling moist thermodynamics. Atmospheric Chemistry and
+        Physics, 17, 15037-15043.
+
+    Args:
+        p: pressure (Pa)
+        T: temperature (K)
+
+    Returns:
+        thw: wet-bulb potential temperature (K)
+
+    """
+
+    # Convert p to hPa and T to degC
+    p_ = p / 100.
+    T_ = T - 273.15
+
+    # Check that values fall in the permitted range
+    if (T_ < {T_MIN}) or (T_ > {T_MAX}) or (p_ > {P_MAX}) or (p_ < {P_MIN}):
+        # print('T or p outside limits of polynomial fit', T_, p_)
+        return np.nan
+
+    # Compute theta-w using Eq. 4-6 from Moisseeva & Stull 2017
+    x = (p_ - {p_c!r}) / {p_s!r}
+    Tref = {Tref_poly}  # noqa: E501
+    y = (Tref - {Tref_c!r}) / {Tref_s!r}
+    z = (T_ - {T_c!r}) / {T_s!r}
+    thw = {thw_poly}  # noqa: E501
+
+    # Return theta-w converted to K
+    return thw + 273.15
+
+
+@vectorize(nopython=True, cache=True)
+def temp(p, thw):
+    """
+    Computes the temperature T at pressure p on a {phase} pseudoadiabat
+    with wet-bulb potential temperature thw.
+
+    Uses polynomial approximations of the form given by Moisseeva and
+    Stull (2017), fitted using pseudoadiabat_codegen.py.
+
+    Moisseeva, N. and Stull, R., 2017. A noniterative approach to
+        modelling moist thermodynamics. Atmospheric Chemistry and
+        Physics, 17, 15037-15043.
+
+    Args:
+        p: pressure (Pa)
+        thw: wet-bulb potential temperature (K)
+
+    Returns:
+        T: temperature (K)
+
+    """
+
+    # Convert p to hPa and theta-w to degC
+    p_ = p / 100.
+    thw_ = thw - 273.15
+
+    # Check that values fall in the permitted range
+    if (thw_ < {THW_MIN}) or (thw_ > {THW_MAX}) or (p_ > {P_MAX}) or (p_ < {P_MIN}):
+        # print('thw or p outside limits of polynomial fit', thw_, p_)
+        return np.nan
+
+    # Compute T using Eq. 1-3 from Moisseeva & Stull 2017
+    x = (p_ - {p_c!r}) / {p_s!r}
+    thref = {thref_poly}  # noqa: E501
+    y = (thref - {thref_c!r}) / {thref_s!r}
+    z = (thw_ - {thw_c!r}) / {thw_s!r}
+    T = {T_poly}  # noqa: E501
+
+    # Return T converted to K
+    return T + 273.15
+'''
+
+
+def reference_temp(p, thw, phase, pinc=500.0, converged=0.001):
+    """
+    Computes the reference temperature on a pseudoadiabat by integrating
+    from 1000 hPa.
+
+    Args:
+        p (ndarray): pressure (hPa)
+        thw (ndarray): wet-bulb potential temperature (degC)
+        phase (str): condensed water phase
+        pinc (float, optional): pressure increment (default is 500 Pa)
+        converged (float, optional): target precision (default is 0.001 K)
+
+    Returns:
+        T (ndarray): temperature (degC)
+
+    """
+    T = thermo.follow_moist_adiabat(1000e2, p * 100., thw + 273.15,
+                                    phase=phase, pseudo_method='compiled',
+                                    pinc=pinc, converged=converged)
+    return T - 273.15
+
+
+def reference_wbpt(p, T, phase, pinc=500.0, converged=0.001):
+    """
+    Computes the reference wet-bulb potential temperature by integrating
+    to 1000 hPa.
+
+    Args:
+        p (ndarray): pressure (hPa)
+        T (ndarray): temperature (degC)
+        phase (str): condensed water phase
+        pinc (float, optional): pressure increment (default is 500 Pa)
+        converged (float, optional): target precision (default is 0.001 K)
+
+    Returns:
+        thw (ndarray): wet-bulb potential temperature (degC)
+
+    """
+    thw = thermo.follow_moist_adiabat(p * 100., 1000e2, T + 273.15,
+                                      phase=phase, pseudo_method='compiled',
+                                      pinc=pinc, converged=converged)
+    return thw - 273.15
+
+
+def scaling(x):
+    """
+    Returns the centre and half-width used to scale x to [-1, 1].
+
+    """
+    lo, hi = np.min(x), np.max(x)
+    return float(0.5 * (hi + lo)), float(0.5 * (hi - lo))
+
+
+def _pad(c, n):
+    out = np.zeros(n + 1)
+    out[:len(c)] = c
+    return out
+
+
+def fit_1d(x, y, deg):
+    """
+    Fits a power series in x (already scaled to [-1, 1]) by least squares in
+    the Chebyshev basis.
+
+    Returns:
+        c (ndarray): power series coefficients (lowest order first)
+
+    """
+    cheb = chebyshev.chebfit(x, y, deg)
+    return _pad(chebyshev.cheb2poly(cheb), deg)
+
+
+def fit_2d(y, z, f, deg_y, deg_z):
+    """
+    Fits a bivariate power series in y and z (already scaled to [-1, 1]) by
+    least squares in the Chebyshev basis.
+
+    Returns:
+        c (ndarray): (deg_y + 1) x (deg_z + 1) power series coefficients
+            with c[i, j] multiplying y**i * z**j
+
+    """
+    V = chebyshev.chebvander2d(y, z, [deg_y, deg_z])
+    cheb, *_ = np.linalg.lstsq(V, f, rcond=None)
+    cheb = cheb.reshape(deg_y + 1, deg_z + 1)
+    My = np.column_stack([_pad(chebyshev.cheb2poly(np.eye(deg_y + 1)[i]),
+                               deg_y) for i in range(deg_y + 1)])
+    Mz = np.column_stack([_pad(chebyshev.cheb2poly(np.eye(deg_z + 1)[j]),
+                               deg_z) for j in range(deg_z + 1)])
+    return My @ cheb @ Mz.T
+
+
+def horner_1d(c, var):
+    """
+    Returns Horner-form source code for a power series in var.
+
+    """
+    expr = f'{c[-1]:.18e}'
+    for ci in c[-2::-1]:
+        expr = f'{ci:.18e} + {var}*({expr})'
+    return expr
+
+
+def horner_2d(c, var_outer, var_inner):
+    """
+    Returns nested Horner-form source code for a bivariate power series.
+
+    """
+    expr = horner_1d(c[-1], var_inner)
+    for ci in c[-2::-1]:
+        expr = f'{horner_1d(ci, var_inner)} + {var_outer}*({expr})'
+    return expr
+
+
+def eval_1d(c, x):
+    return np.polynomial.polynomial.polyval(x, c)
+
+
+def eval_2d(c, y, z):
+    return np.polynomial.polynomial.polyval2d(y, z, c)
+
+
+def generate(phase, deg_p=None, deg_ref=None, deg_T=None, verbose=True):
+    """
+    Fits wbpt and temp for the specified phase and returns the module source.
+
+    Args:
+        phase (str): condensed water phase ('liquid', 'ice', or 'mixed')
+        deg_p (int, optional): degree of Tref(p) and thref(p) (default is
+            given by DEGREES)
+        deg_ref (int, optional): degree in Tref/thref (default is given by
+            DEGREES)
+        deg_T (int, optional): degree in T/thw (default is given by DEGREES)
+        verbose (bool, optional): print progress and errors (default is True)
+
+    Returns:
+        src (str): module source code
+        errors (dict): max and RMS errors on the validation grid (K)
+
+    """
+
+    deg_p, deg_ref, deg_T = [default if deg is None else deg for deg, default
+                             in zip((deg_p, deg_ref, deg_T), DEGREES[phase])]
+
+    # Fitting and validation pressures (validation offset by half a step)
+    p_fit = np.arange(P_MIN, P_MAX + DP / 2, DP)
+    p_val = p_fit[:-1] + DP / 2
+    p_c, p_s = scaling(p_fit)
+
+    # Reference functions of pressure
+    if verbose:
+        print('Fitting Tref(p) and thref(p)')
+    Tref = reference_wbpt(p_fit, np.full_like(p_fit, T_REF), phase)
+    thref = reference_temp(p_fit, np.full_like(p_fit, THW_REF), phase)
+    Tref_coeffs = fit_1d((p_fit - p_c) / p_s, Tref, deg_p)
+    thref_coeffs = fit_1d((p_fit - p_c) / p_s, thref, deg_p)
+
+    def samples(p, dT):
+        # (p, thw, T) triples on the physically reachable part of the domain
+        thw = np.arange(T_MIN, THW_MAX + 10. + dT / 2, dT)
+        pp, tt = np.meshgrid(p, thw, indexing='ij')
+        TT = reference_temp(pp.ravel(), tt.ravel(), phase)
+        return pp.ravel(), tt.ravel(), TT
+
+    if verbose:
+        print('Computing reference pseudoadiabats')
+    pp, tt, TT = samples(p_fit, DT)
+    pv, tv, Tv = samples(p_val, DT)
+
+    # Fit wbpt(p, T) on points with T in the permitted range
+    if verbose:
+        print('Fitting wbpt')
+    ok = (TT >= T_MIN) & (TT <= T_MAX) & np.isfinite(TT)
+    Tref_fit = eval_1d(Tref_coeffs, (pp[ok] - p_c) / p_s)
+    Tref_c, Tref_s = scaling(Tref_fit)
+    T_c, T_s = scaling(TT[ok])
+    wbpt_coeffs = fit_2d((Tref_fit - Tref_c) / Tref_s, (TT[ok] - T_c) / T_s,
+                         tt[ok], deg_ref, deg_T)
+
+    # Fit temp(p, thw) on points with thw in the permitted range
+    if verbose:
+        print('Fitting temp')
+    ok2 = (tt >= THW_MIN) & (tt <= THW_MAX) & np.isfinite(TT)
+    thref_fit = eval_1d(thref_coeffs, (pp[ok2] - p_c) / p_s)
+    thref_c, thref_s = scaling(thref_fit)
+    thw_c, thw_s = scaling(tt[ok2])
+    temp_coeffs = fit_2d((thref_fit - thref_c) / thref_s,
+                         (tt[ok2] - thw_c) / thw_s, TT[ok2], deg_ref, deg_T)
+
+    # Validate both fits on the offset grid
+    okv = (Tv >= T_MIN) & (Tv <= T_MAX) & np.isfinite(Tv)
+    y = (eval_1d(Tref_coeffs, (pv[okv] - p_c) / p_s) - Tref_c) / Tref_s
+    err = eval_2d(wbpt_coeffs, y, (Tv[okv] - T_c) / T_s) - tv[okv]
+    okv2 = (tv >= THW_MIN) & (tv <= THW_MAX) & np.isfinite(Tv)
+    y = (eval_1d(thref_coeffs, (pv[okv2] - p_c) / p_s) - thref_c) / thref_s
+    err2 = eval_2d(temp_coeffs, y, (tv[okv2] - thw_c) / thw_s) - Tv[okv2]
+    errors = dict(wbpt_max=np.max(np.abs(err)),
+                  wbpt_rms=np.sqrt(np.mean(err**2)),
+                  temp_max=np.max(np.abs(err2)),
+                  temp_rms=np.sqrt(np.mean(err2**2)))
+    if verbose:
+        print(f"wbpt: max error {errors['wbpt_max']:.4f} K, "
+              f"RMS error {errors['wbpt_rms']:.4f} K")
+        print(f"temp: max error {errors['temp_max']:.4f} K, "
+              f"RMS error {errors['temp_rms']:.4f} K")
+
+    src = TEMPLATE.format(
+        header=HEADER, phase=phase, **errors,
+        P_MIN=P_MIN, P_MAX=P_MAX, T_MIN=T_MIN, T_MAX=T_MAX,
+        THW_MIN=THW_MIN, THW_MAX=THW_MAX,
+        p_c=p_c, p_s=p_s,
+        Tref_c=Tref_c, Tref_s=Tref_s, T_c=T_c, T_s=T_s,
+        thref_c=thref_c, thref_s=thref_s, thw_c=thw_c, thw_s=thw_s,
+        Tref_poly=horner_1d(Tref_coeffs, 'x'),
+        thw_poly=horner_2d(wbpt_coeffs, 'y', 'z'),
+        thref_poly=horner_1d(thref_coeffs, 'x'),
+        T_poly=horner_2d(temp_coeffs, 'y', 'z'),
+    )
+
+    return src, errors
+
+
+def generate_tables(phase, dp=10., dT=1., verbose=True):
+    """
+    Computes the reference tables used by atmos.pseudoadiabat_bicubic.
+
+    Args:
+        phase (str): condensed water phase ('liquid', 'ice', or 'mixed')
+        dp (float, optional): table pressure spacing (default is 10 hPa)
+        dT (float, optional): table temperature spacing (default is 1 K)
+        verbose (bool, optional): print progress and errors (default is True)
+
+    Returns:
+        tables (dict): table arrays and grid definitions
+        errors (dict): max and RMS errors at the table cell centres (K)
+
+    """
+    from atmos import pseudoadiabat_bicubic
+
+    # Table nodes and validation points (offset by half a step)
+    p = np.arange(P_MIN, P_MAX + dp / 2, dp)
+    T = np.arange(T_MIN, T_MAX + dT / 2, dT)
+    thw = np.arange(THW_MIN, THW_MAX + dT / 2, dT)
+    p_val = p[:-1] + dp / 2
+
+    if verbose:
+        print('Computing reference tables')
+    pp, TT = np.meshgrid(p, T, indexing='ij')
+    wbpt = reference_wbpt(pp, TT, phase)
+    pp, tt = np.meshgrid(p, thw, indexing='ij')
+    temp = reference_temp(pp, tt, phase)
+    tables = dict(wbpt=wbpt, wbpt_grid=np.array([P_MIN, dp, T_MIN, dT]),
+                  temp=temp, temp_grid=np.array([P_MIN, dp, THW_MIN, dT]))
+
+    # Validate at the cell centres, restricting wbpt to points with thw in
+    # the range covered by temp (the rest of the table is unphysical)
+    pseudoadiabat_bicubic.load_tables.cache_clear()
+    evaluate = pseudoadiabat_bicubic._interpolate_columns
+    pv, Tv = [x.ravel() for x in np.meshgrid(p_val, T[:-1] + dT / 2,
+                                             indexing='ij')]
+    ref = reference_wbpt(pv, Tv, phase)
+    approx = np.empty_like(ref)
+    evaluate(wbpt, P_MIN, dp, T_MIN, dT, pv, Tv, 0., approx)
+    ok = (ref >= THW_MIN) & (ref <= THW_MAX)
+    err = approx[ok] - ref[ok]
+    pv, tv = [x.ravel() for x in np.meshgrid(p_val, thw[:-1] + dT / 2,
+                                             indexing='ij')]
+    ref = reference_temp(pv, tv, phase)
+    approx = np.empty_like(ref)
+    evaluate(temp, P_MIN, dp, THW_MIN, dT, pv, tv, 0., approx)
+    ok = (ref >= T_MIN) & (ref <= T_MAX)
+    err2 = approx[ok] - ref[ok]
+    errors = dict(wbpt_max=np.max(np.abs(err)),
+                  wbpt_rms=np.sqrt(np.mean(err**2)),
+                  temp_max=np.max(np.abs(err2)),
+                  temp_rms=np.sqrt(np.mean(err2**2)))
+    if verbose:
+        print(f"wbpt: max error {errors['wbpt_max']:.4f} K, "
+              f"RMS error {errors['wbpt_rms']:.4f} K")
+        print(f"temp: max error {errors['temp_max']:.4f} K, "
+              f"RMS error {errors['temp_rms']:.4f} K")
+
+    return tables, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--phase', default='liquid',
+                        choices=['liquid', 'ice', 'mixed'])
+    parser.add_argument('--out', default=None,
+                        help='output file (default is '
+                             'atmos/pseudoadiabat_<phase>.py; required for '
+                             'liquid)')
+    parser.add_argument('--deg-p', type=int, default=None)
+    parser.add_argument('--deg-ref', type=int, default=None)
+    parser.add_argument('--deg-T', type=int, default=None)
+    parser.add_argument('--bicubic', action='store_true',
+                        help='generate tables for pseudoadiabat_bicubic')
+    parser.add_argument('--dp', type=float, default=10.,
+                        help='table pressure spacing (hPa)')
+    parser.add_argument('--dT', type=float, default=1.,
+                        help='table temperature spacing (K)')
+    args = parser.parse_args()
+
+    if args.bicubic:
+        if args.out is None:
+            args.out = os.path.join(os.path.dirname(thermo.__file__),
+                                    f'pseudoadiabat_bicubic_{args.phase}.npz')
+        tables, _ = generate_tables(args.phase, dp=args.dp, dT=args.dT)
+        np.savez_compressed(args.out, **tables)
+        print('Written', args.out)
+        return
+
+    if args.out is None:
+        if args.phase == 'liquid':
+            # Never overwrite the liquid fits in atmos/pseudoadiabat.py
+            parser.error('--out is required for --phase liquid')
+        args.out = os.path.join(os.path.dirname(thermo.__file__),
+                                f'pseudoadiabat_{args.phase}.py')
+
+    src, _ = generate(args.phase, deg_p=args.deg_p, deg_ref=args.deg_ref,
+                      deg_T=args.deg_T)
+    with open(args.out, 'w') as f:
+        f.write(src)
+    print('Written', args.out)
+
+
+if __name__ == '__main__':
+    main()